@@ -2,18 +2,24 @@ import streamlit as st
 import numpy as np
 import sys
 from pathlib import Path
-import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
-import tempfile
-import os
+import hashlib
 
 sys.path.append(str(Path(__file__).parent))
 
+from src._lazy import lazy_import
 from src.preprocessing.audio_processor import AudioProcessor
 from src.features.feature_extractor import FeatureExtractor
 from src.models.classifier import InstrumentClassifier
 from src.models.dataset_manager import DatasetManager
+from src.models.model_registry import ModelRegistry, ModelWatcher
+from src.inference.batch import BatchClassificationJob
+from src.inference.cache import PredictionCache
+from src.inference.warmup import warmup
+
+# Only needed once there is something to plot or tabulate
+go = lazy_import('plotly.graph_objects')
+px = lazy_import('plotly.express')
+pd = lazy_import('pandas')
 
 st.set_page_config(
     page_title="Isan Musical Instruments Classifier",
@@ -32,23 +38,122 @@ This application uses machine learning to identify and analyze traditional Isan
 **Built with cultural respect and ethical AI practices**
 """)
 
+def check_model_metadata(metadata: dict):
+    if metadata.get('sample_rate', 22050) != 22050:
+        raise ValueError(f"Model expects {metadata['sample_rate']} Hz audio; the app decodes at 22050 Hz")
+
 @st.cache_resource
 def load_models():
     processor = AudioProcessor(target_sr=22050)
     extractor = FeatureExtractor(sr=22050)
-    classifier = InstrumentClassifier()
+    # Shared by all sessions; follows the registry's current version, so a
+    # newly trained model is served without restarting the app
+    watcher = ModelWatcher(ModelRegistry(), poll_interval=5.0, validate=check_model_metadata)
+    # Pay numba's compile time once per server process, not on the first upload
+    current = watcher.get()
+    warmup(22050, classifier=current[0] if current else None,
+           processor=processor, extractor=extractor, transcribe=False)
+    return processor, extractor, watcher
+
+processor, extractor, model_watcher = load_models()
+current_model = model_watcher.get()
+model_loaded = current_model is not None
+if model_loaded:
+    classifier, model_metadata = current_model
+    model_version = model_metadata.get('version', 'legacy')
+else:
+    classifier, model_metadata, model_version = InstrumentClassifier(), {}, None
+
+# Timeline windows match the segments the model was trained on (train_model.py)
+SEGMENT_DURATION = 3.0
+SEGMENT_OVERLAP = 0.5
+
+@st.cache_resource
+def load_prediction_cache():
+    # Shared by all sessions and kept on disk, so demo files and re-uploads
+    # are classified once per model version, even across restarts
+    return PredictionCache(max_entries=512, cache_dir="data/cache/predictions",
+                           sr=22050, segment_duration=SEGMENT_DURATION)
+
+prediction_cache = load_prediction_cache()
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def analyze_upload(file_hash: str, _data: bytes, suffix: str, model_version: str,
+                   timeline: bool = False, full_detail: bool = False):
+    # Keyed on the content hash (Streamlit skips hashing "_" arguments), so
+    # reruns triggered by widgets skip decoding and feature extraction.
+    # model_version is part of the key so results follow model updates.
+    # The prediction cache is checked before decoding: a file classified
+    # before (also by another session or before a restart) is not decoded
+    variant = ('timeline-full' if full_detail else 'timeline') if timeline else ''
+    prediction = prediction_cache.get(file_hash, model_version, variant)
+    if prediction is not None:
+        quality = {'duration': prediction.get('duration'), 'is_valid': True, 'cached': True}
+        return processor.target_sr, quality, prediction
+    
+    # Decoded from memory; the suffix only matters if a temp file is needed
+    audio, sr, quality = processor.preprocess_audio(_data, suffix=suffix)
+    if not quality['is_valid']:
+        return sr, quality, None
     
-    model_path = Path("models/instrument_classifier.pkl")
-    if model_path.exists():
-        classifier.load_model(str(model_path))
-        return processor, extractor, classifier, True
+    if timeline:
+        segments = processor.extract_segments(audio, sr, SEGMENT_DURATION, SEGMENT_OVERLAP)
+        hop_seconds = processor.segment_hop(sr, SEGMENT_DURATION, SEGMENT_OVERLAP) / sr
+        prediction = classifier.predict_timeline(
+            segments, extractor, hop_seconds, early_exit=not full_detail
+        )
     else:
-        return processor, extractor, classifier, False
+        prediction = classifier.predict_single(extractor.extract(audio).vector)
+    prediction = dict(prediction, duration=quality['duration'])
+    prediction_cache.put(file_hash, model_version, prediction, variant)
+    return sr, quality, prediction
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def upload_features(file_hash: str, _data: bytes, suffix: str):
+    # Only decoded when the feature plots are asked for
+    audio, _, _ = processor.preprocess_audio(_data, suffix=suffix)
+    return extractor.extract(audio)
+
+@st.cache_resource
+def load_dataset_manager():
+    # Shared across sessions; reads pick up other writers' changes automatically
+    return DatasetManager()
 
-processor, extractor, classifier, model_loaded = load_models()
+def show_batch_job(was_running: bool):
+    batch_job = st.session_state['batch_job']
+    progress = batch_job.progress()
+    st.progress(
+        progress['completed'] / max(1, progress['total']),
+        text=f"{progress['completed']} / {progress['total']} files "
+             f"({progress['failed']} failed, {progress['cached']} from cache, "
+             f"{progress['files_per_second']:.1f} files/s)"
+    )
+    
+    results_df = batch_job.to_dataframe()
+    if not results_df.empty:
+        st.dataframe(results_df, use_container_width=True, hide_index=True)
+    
+    if progress['done'] and not results_df.empty:
+        csv_col, parquet_col = st.columns(2)
+        with csv_col:
+            st.download_button("Download CSV", batch_job.to_csv(),
+                               file_name="batch_predictions.csv", mime="text/csv")
+        with parquet_col:
+            try:
+                st.download_button("Download Parquet", batch_job.to_parquet(),
+                                   file_name="batch_predictions.parquet",
+                                   mime="application/octet-stream")
+            except ImportError:
+                st.caption("Install pyarrow for Parquet export")
+    
+    if was_running and progress['done']:
+        # One full rerun re-enables the controls drawn while the job ran
+        # and stops the polling
+        st.rerun()
 
-tab1, tab2, tab3, tab4 = st.tabs([
+tab1, tab_batch, tab2, tab3, tab4 = st.tabs([
     "🎵 Classify Audio", 
+    "📁 Batch Classify",
     "📊 Dataset Management", 
     "📚 Documentation",
     "ℹ️ About"
@@ -59,6 +164,8 @@ with tab1:
     
     if not model_loaded:
         st.warning("⚠️ No trained model found. Please train a model first using the training pipeline or add sample data.")
+        if model_watcher.last_error:
+            st.error(model_watcher.last_error)
         st.info("""
         To get started:
         1. Use the Dataset Management tab to add audio samples
@@ -66,28 +173,56 @@ with tab1:
         3. Return here to classify new audio files
         """)
     else:
-        st.success("✅ Model loaded successfully!")
+        st.success(f"✅ Model loaded successfully! (version {model_version})")
+        if model_watcher.last_error:
+            st.warning(f"Still serving version {model_version}: {model_watcher.last_error}")
         
         uploaded_file = st.file_uploader(
             "Upload an audio file (WAV, MP3, FLAC, OGG)", 
             type=['wav', 'mp3', 'flac', 'ogg']
         )
         
+        mode_col, detail_col = st.columns([2, 1])
+        with mode_col:
+            analysis_mode = st.radio(
+                "Analysis mode", ["Whole file", "Timeline (per window)"], horizontal=True,
+                help="Timeline mode classifies 3-second windows and averages them; "
+                     "use it for long recordings or ones where instruments alternate"
+            )
+        timeline_mode = analysis_mode.startswith("Timeline")
+        with detail_col:
+            full_detail = st.checkbox(
+                "Full detail", value=False, disabled=not timeline_mode,
+                help="Analyze every window instead of stopping once the result is confident"
+            )
+        
         if uploaded_file is not None:
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
-                tmp_file.write(uploaded_file.read())
-                tmp_path = tmp_file.name
+            data = uploaded_file.getvalue()
+            file_hash = hashlib.sha256(data).hexdigest()
+            suffix = Path(uploaded_file.name).suffix.lower()
             
-            try:
-                col1, col2 = st.columns([1, 1])
+            col1, col2 = st.columns([1, 1])
+            
+            with col1:
+                st.subheader("Audio Analysis")
                 
-                with col1:
-                    st.subheader("Audio Analysis")
-                    
-                    with st.spinner("Processing audio..."):
-                        audio, sr, quality = processor.preprocess_audio(tmp_path)
-                    
-                    st.write("**Audio Quality Metrics:**")
+                with st.spinner("Processing audio..."):
+                    sr, quality, prediction = analyze_upload(
+                        file_hash, data, suffix, model_version,
+                        timeline=timeline_mode, full_detail=full_detail
+                    )
+                
+                st.write("**Audio Quality Metrics:**")
+                if quality.get('cached'):
+                    # Known file: the result came from the prediction cache without decoding
+                    duration = quality['duration']
+                    st.json({
+                        'Duration': f"{duration:.2f} seconds" if duration is not None else "unknown",
+                        'Sample Rate': f"{sr} Hz",
+                        'Valid': quality['is_valid']
+                    })
+                    st.caption("Result from the prediction cache; audio was not decoded again")
+                else:
                     st.json({
                         'Duration': f"{quality['duration']:.2f} seconds",
                         'Sample Rate': f"{sr} Hz",
@@ -95,79 +230,153 @@ with tab1:
                         'Max Amplitude': f"{quality['max_amplitude']:.4f}",
                         'Valid': quality['is_valid']
                     })
-                    
-                    if quality['is_valid']:
-                        st.audio(uploaded_file, format='audio/wav')
-                
-                with col2:
-                    if quality['is_valid']:
-                        st.subheader("Classification Results")
-                        
-                        with st.spinner("Extracting features and predicting..."):
-                            features = extractor.extract_all_features(audio)
-                            prediction = classifier.predict_single(features)
-                        
-                        st.markdown(f"### Predicted Instrument: **{prediction['predicted_instrument']}**")
-                        st.metric("Confidence", f"{prediction['confidence']*100:.2f}%")
-                        
-                        st.write("**All Probabilities:**")
-                        prob_df = pd.DataFrame([
-                            {'Instrument': k, 'Probability': f"{v*100:.2f}%"} 
-                            for k, v in prediction['all_probabilities'].items()
-                        ])
-                        st.dataframe(prob_df, hide_index=True)
-                        
-                        fig = px.bar(
-                            x=list(prediction['all_probabilities'].keys()),
-                            y=[v*100 for v in prediction['all_probabilities'].values()],
-                            labels={'x': 'Instrument', 'y': 'Probability (%)'},
-                            title='Classification Probabilities'
-                        )
-                        st.plotly_chart(fig, use_container_width=True)
-                    else:
-                        st.error(f"Audio quality issue: {quality.get('reason', 'Unknown')}")
                 
                 if quality['is_valid']:
-                    st.subheader("Feature Visualization")
-                    
-                    mfcc = extractor.extract_mfcc_features(audio)
-                    spectral = extractor.extract_spectral_features(audio)
+                    st.audio(data, format=uploaded_file.type or 'audio/wav')
+            
+            with col2:
+                if quality['is_valid']:
+                    st.subheader("Classification Results")
                     
-                    col3, col4 = st.columns(2)
+                    st.markdown(f"### Predicted Instrument: **{prediction['predicted_instrument']}**")
+                    st.metric("Confidence", f"{prediction['confidence']*100:.2f}%")
                     
-                    with col3:
-                        fig_mfcc = go.Figure()
-                        fig_mfcc.add_trace(go.Bar(
-                            y=mfcc['mfcc_mean'],
-                            name='MFCC Mean'
-                        ))
-                        fig_mfcc.update_layout(
-                            title='MFCC Coefficients',
-                            xaxis_title='Coefficient Index',
-                            yaxis_title='Value'
+                    if timeline_mode:
+                        st.caption(
+                            f"Averaged over {prediction['windows_analyzed']} of "
+                            f"{prediction['windows_total']} windows"
+                            + (" (stopped early once confident)" if prediction['stopped_early'] else "")
                         )
-                        st.plotly_chart(fig_mfcc, use_container_width=True)
                     
-                    with col4:
-                        spectral_df = pd.DataFrame([
-                            {'Feature': k, 'Value': v} 
-                            for k, v in spectral.items()
-                        ])
-                        fig_spectral = px.bar(
-                            spectral_df, x='Feature', y='Value',
-                            title='Spectral Features'
-                        )
-                        fig_spectral.update_xaxes(tickangle=45)
-                        st.plotly_chart(fig_spectral, use_container_width=True)
+                    st.write("**All Probabilities:**")
+                    prob_df = pd.DataFrame([
+                        {'Instrument': k, 'Probability': f"{v*100:.2f}%"} 
+                        for k, v in prediction['all_probabilities'].items()
+                    ])
+                    st.dataframe(prob_df, hide_index=True)
+                    
+                    fig = px.bar(
+                        x=list(prediction['all_probabilities'].keys()),
+                        y=[v*100 for v in prediction['all_probabilities'].values()],
+                        labels={'x': 'Instrument', 'y': 'Probability (%)'},
+                        title='Classification Probabilities'
+                    )
+                    st.plotly_chart(fig, use_container_width=True)
+                else:
+                    st.error(f"Audio quality issue: {quality.get('reason', 'Unknown')}")
+            
+            if quality['is_valid'] and timeline_mode:
+                st.subheader("Instrument Timeline")
+                
+                timeline_df = pd.DataFrame([
+                    {'Time (s)': (window['start'] + window['end']) / 2,
+                     'Instrument': instrument, 'Probability (%)': prob * 100}
+                    for window in prediction['windows']
+                    for instrument, prob in window['all_probabilities'].items()
+                ])
+                fig_timeline = px.line(
+                    timeline_df, x='Time (s)', y='Probability (%)', color='Instrument',
+                    markers=True, title='Per-window Probabilities'
+                )
+                st.plotly_chart(fig_timeline, use_container_width=True)
             
-            finally:
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
+            elif quality['is_valid'] and st.checkbox("Show feature visualization", value=False,
+                                                     help="Decodes the file and extracts its features"):
+                st.subheader("Feature Visualization")
+                
+                with st.spinner("Extracting features..."):
+                    features = upload_features(file_hash, data, suffix)
+                mfcc = features['mfcc']
+                spectral = features['spectral']
+                
+                col3, col4 = st.columns(2)
+                
+                with col3:
+                    fig_mfcc = go.Figure()
+                    fig_mfcc.add_trace(go.Bar(
+                        y=mfcc['mfcc_mean'],
+                        name='MFCC Mean'
+                    ))
+                    fig_mfcc.update_layout(
+                        title='MFCC Coefficients',
+                        xaxis_title='Coefficient Index',
+                        yaxis_title='Value'
+                    )
+                    st.plotly_chart(fig_mfcc, use_container_width=True)
+                
+                with col4:
+                    spectral_df = pd.DataFrame([
+                        {'Feature': k, 'Value': v} 
+                        for k, v in spectral.items()
+                    ])
+                    fig_spectral = px.bar(
+                        spectral_df, x='Feature', y='Value',
+                        title='Spectral Features'
+                    )
+                    fig_spectral.update_xaxes(tickangle=45)
+                    st.plotly_chart(fig_spectral, use_container_width=True)
+
+with tab_batch:
+    st.header("Batch Classification")
+    
+    if not model_loaded:
+        st.warning("⚠️ No trained model found. Train a model before classifying in batch.")
+    else:
+        st.markdown("Label many recordings at once. Files are decoded and analyzed in parallel "
+                    "in the background; results appear below as they finish.")
+        
+        batch_job = st.session_state.get('batch_job')
+        running = batch_job is not None and not batch_job.done
+        
+        source_type = st.radio("Source", ["Upload files", "Server directory"], horizontal=True,
+                               disabled=running)
+        if source_type == "Upload files":
+            batch_files = st.file_uploader(
+                "Upload audio files (WAV, MP3, FLAC, OGG)",
+                type=['wav', 'mp3', 'flac', 'ogg'], accept_multiple_files=True,
+                disabled=running
+            )
+        else:
+            batch_directory = st.text_input("Directory on the server", disabled=running)
+            recursive = st.checkbox("Include subdirectories", value=True, disabled=running)
+        
+        start_col, cancel_col = st.columns([1, 1])
+        with start_col:
+            start_batch = st.button("Start batch", disabled=running, type="primary")
+        with cancel_col:
+            if running and st.button("Cancel"):
+                batch_job.cancel()
+        
+        if start_batch:
+            try:
+                if source_type == "Upload files":
+                    if not batch_files:
+                        raise ValueError("Upload at least one file")
+                    batch_job = BatchClassificationJob(
+                        classifier, [(f.name, f.getvalue()) for f in batch_files],
+                        sr=processor.target_sr, cache=prediction_cache, model_version=model_version
+                    )
+                else:
+                    batch_job = BatchClassificationJob.from_directory(
+                        classifier, batch_directory, recursive=recursive, sr=processor.target_sr,
+                        cache=prediction_cache, model_version=model_version
+                    )
+                    if not batch_job.sources:
+                        raise ValueError(f"No audio files found in {batch_directory}")
+                st.session_state['batch_job'] = batch_job.start()
+                running = True
+            except ValueError as e:
+                st.error(str(e))
+        
+        if batch_job is not None:
+            # Only this block refreshes while the job runs, so the other tabs
+            # keep handling their widgets
+            st.fragment(show_batch_job, run_every=1.0 if running else None)(running)
 
 with tab2:
     st.header("Dataset Management")
     
-    dataset_manager = DatasetManager()
+    dataset_manager = load_dataset_manager()
     
     st.subheader("Add New Recording")
     
@@ -213,9 +422,7 @@ with tab2:
         
         with col1:
             st.write("**Instruments:**")
-            instruments = dataset_manager.get_all_instruments()
-            for inst in instruments:
-                count = len(dataset_manager.get_recordings_by_instrument(inst))
+            for inst, count in dataset_manager.get_instrument_counts().items():
                 st.write(f"- {inst}: {count} recordings")
         
         with col2:
@@ -0,0 +1,337 @@
+"""
+Load test for the classification path: how many concurrent classifications
+a host sustains, and where the time goes
+
+Drives either an in-process InferenceService (the same decode pool and
+micro-batcher serve.py runs) or a running service over HTTP, with
+synthetic Phin/Khaen clips or replayed audio files. Two load shapes:
+
+- closed loop (--concurrency N): N clients send back to back
+- open loop (--rate R): Poisson arrivals at R requests/second, with
+  latency measured from each request's scheduled arrival, so queueing
+  delay is counted even when the client falls behind
+
+Reports p50/p95/p99 latency, throughput, error and rejection (HTTP 503)
+rates, and per-stage percentiles (decode, features, queue, predict) from
+the service's own timings.
+
+Usage:
+    python benchmarks/load_test.py --concurrency 1,4,16
+    python benchmarks/load_test.py --rate 5,10,20 --requests 300
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --concurrency 8
+    python benchmarks/load_test.py --replay data/raw --concurrency 4
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from examples.generate_demo_data import generate_synthetic_audio
+from src.features.feature_extractor import FeatureExtractor
+from src.inference.batch import find_audio_files
+from src.inference.server import InferenceService, ServiceBusy
+from src.models.classifier import InstrumentClassifier
+from src.models.model_registry import ModelRegistry
+
+SR = 22050
+STAGES = ['decode', 'features', 'queue', 'predict']
+
+
+def make_clips(n_clips: int, duration: float, audio_format: str = 'FLAC',
+               seed: int = 0) -> List[Tuple[str, bytes]]:
+    """Synthetic clips encoded as they would arrive over the wire"""
+    np.random.seed(seed)
+    clips = []
+    for i in range(n_clips):
+        instrument = "Phin" if i % 2 == 0 else "Khaen"
+        audio, sr = generate_synthetic_audio(instrument, duration=duration, sr=SR)
+        buffer = io.BytesIO()
+        sf.write(buffer, audio, sr, format=audio_format)
+        clips.append((f"{instrument.lower()}_{i}.{audio_format.lower()}", buffer.getvalue()))
+    return clips
+
+
+def load_clips(directory: str, limit: Optional[int] = None) -> List[Tuple[str, bytes]]:
+    """Replay real recordings: every audio file under a directory, as bytes"""
+    files = find_audio_files(directory)[:limit]
+    if not files:
+        raise ValueError(f"No audio files found in {directory}")
+    return [(path.name, path.read_bytes()) for path in files]
+
+
+def synthetic_classifier(n_clips: int = 20) -> InstrumentClassifier:
+    """Small model on synthetic clips, for load testing without a trained one"""
+    extractor = FeatureExtractor(sr=SR)
+    X, y = [], []
+    for i in range(n_clips):
+        instrument = "Phin" if i % 2 == 0 else "Khaen"
+        audio, _ = generate_synthetic_audio(instrument, duration=3.0, sr=SR)
+        X.append(extractor.extract_all_features(audio))
+        y.append(instrument)
+    classifier = InstrumentClassifier(n_estimators=50)
+    classifier.train(np.array(X), np.array(y))
+    return classifier
+
+
+class HTTPTarget:
+    """Posts raw audio to a running serve.py"""
+
+    def __init__(self, url: str, timeout: float = 60.0):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def __call__(self, name: str, data: bytes) -> Dict:
+        request = urllib.request.Request(f"{self.url}/classify?filename={name}", data=data,
+                                         headers={'Content-Type': 'application/octet-stream'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            if e.code == 503:
+                raise ServiceBusy(e.read().decode('utf-8', 'replace'))
+            raise RuntimeError(f"HTTP {e.code}: {e.read().decode('utf-8', 'replace')}")
+
+    def server_metrics(self) -> Optional[Dict]:
+        try:
+            with urllib.request.urlopen(f"{self.url}/metrics", timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except Exception:
+            return None
+
+
+class InProcessTarget:
+    """Calls an InferenceService directly, skipping HTTP"""
+
+    def __init__(self, service: InferenceService):
+        self.service = service
+
+    def __call__(self, name: str, data: bytes) -> Dict:
+        return self.service.classify(data, name)
+
+    def server_metrics(self) -> Optional[Dict]:
+        return self.service.stats()
+
+
+def _send(target: Callable, clip: Tuple[str, bytes], scheduled: float) -> Dict:
+    try:
+        result = target(*clip)
+        status = 'ok'
+    except ServiceBusy:
+        result, status = {}, 'rejected'
+    except Exception as e:
+        result, status = {'error': str(e)}, 'error'
+    return {
+        'status': status,
+        'latency_ms': (time.perf_counter() - scheduled) * 1000,
+        'timings_ms': result.get('timings_ms', {}),
+        'error': result.get('error')
+    }
+
+
+def run_closed_loop(target: Callable, clips: List[Tuple[str, bytes]],
+                    concurrency: int, n_requests: int) -> Tuple[List[Dict], float]:
+    samples: List[Dict] = []
+    lock = threading.Lock()
+    next_index = [0]
+
+    def client():
+        while True:
+            with lock:
+                index = next_index[0]
+                next_index[0] += 1
+            if index >= n_requests:
+                return
+            sample = _send(target, clips[index % len(clips)], time.perf_counter())
+            with lock:
+                samples.append(sample)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+def run_open_loop(target: Callable, clips: List[Tuple[str, bytes]], rate: float,
+                  n_requests: int, max_outstanding: int = 256,
+                  seed: int = 0) -> Tuple[List[Dict], float]:
+    rng = np.random.default_rng(seed)
+    arrivals = np.cumsum(rng.exponential(1.0 / rate, n_requests))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_outstanding) as pool:
+        futures = []
+        for index, offset in enumerate(arrivals):
+            scheduled = started + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(_send, target, clips[index % len(clips)], scheduled))
+        samples = [future.result() for future in futures]
+    return samples, time.perf_counter() - started
+
+
+def _percentiles(values: List[float]) -> Optional[Dict]:
+    if not values:
+        return None
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {'p50': round(float(p50), 2), 'p95': round(float(p95), 2),
+            'p99': round(float(p99), 2), 'mean': round(float(np.mean(values)), 2)}
+
+
+def summarize(samples: List[Dict], elapsed: float) -> Dict:
+    ok = [s for s in samples if s['status'] == 'ok']
+    errors = [s for s in samples if s['status'] == 'error']
+    return {
+        'requests': len(samples),
+        'elapsed_seconds': round(elapsed, 3),
+        'throughput_rps': round(len(ok) / elapsed, 2) if elapsed > 0 else 0.0,
+        'error_rate': round(len(errors) / len(samples), 4) if samples else 0.0,
+        'rejection_rate': round(sum(s['status'] == 'rejected' for s in samples) / len(samples), 4)
+        if samples else 0.0,
+        'latency_ms': _percentiles([s['latency_ms'] for s in ok]),
+        'stages_ms': {
+            stage: _percentiles([s['timings_ms'][stage] for s in ok if stage in s['timings_ms']])
+            for stage in STAGES
+        },
+        'sample_errors': sorted({s['error'] for s in errors if s['error']})[:5]
+    }
+
+
+def print_summary(results: List[Dict]):
+    print(f"{'Load':<14} {'Req':>5} {'RPS':>7} {'Err%':>6} {'503%':>6} "
+          f"{'p50':>8} {'p95':>8} {'p99':>8}   "
+          + " ".join(f"{stage + ' p50':>12}" for stage in STAGES))
+    print("-" * 130)
+    for r in results:
+        load = f"c={r['concurrency']}" if r['mode'] == 'closed' else f"{r['rate']:g} req/s"
+        latency = r['latency_ms'] or {'p50': float('nan'), 'p95': float('nan'), 'p99': float('nan')}
+        stages = " ".join(
+            f"{(r['stages_ms'][stage] or {'p50': float('nan')})['p50']:>12.1f}" for stage in STAGES
+        )
+        print(f"{load:<14} {r['requests']:>5} {r['throughput_rps']:>7.2f} "
+              f"{r['error_rate']*100:>6.1f} {r['rejection_rate']*100:>6.1f} "
+              f"{latency['p50']:>8.1f} {latency['p95']:>8.1f} {latency['p99']:>8.1f}   {stages}")
+    print("(latencies in ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the classification service")
+    parser.add_argument('--url', help='Running service to test over HTTP (default: in-process)')
+    parser.add_argument('--model', help='Model file for in-process runs (default: the registry\'s '
+                                        'current model, or a small synthetic one if there is none)')
+    parser.add_argument('--concurrency', default='1,4,16',
+                        help='Comma-separated closed-loop client counts')
+    parser.add_argument('--rate', help='Comma-separated open-loop arrival rates (req/s); '
+                                       'overrides --concurrency')
+    parser.add_argument('--requests', type=int, default=100, help='Requests per load level')
+    parser.add_argument('--warmup', type=int, default=None,
+                        help='Unmeasured requests first (default: two per worker)')
+    parser.add_argument('--replay', help='Directory of audio files to send instead of synthetic clips')
+    parser.add_argument('--n-clips', type=int, default=16)
+    parser.add_argument('--clip-duration', type=float, default=5.0)
+    parser.add_argument('--format', default='FLAC', choices=['WAV', 'FLAC', 'OGG', 'MP3'])
+    parser.add_argument('--workers', type=int, default=None, help='In-process worker processes')
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    parser.add_argument('--max-pending', type=int, default=256)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmarks/results/load_test.json')
+    args = parser.parse_args()
+
+    clips = load_clips(args.replay) if args.replay else \
+        make_clips(args.n_clips, args.clip_duration, args.format, args.seed)
+
+    service = None
+    if args.url:
+        target = HTTPTarget(args.url)
+    else:
+        loaded = None
+        if args.model:
+            classifier = InstrumentClassifier()
+            classifier.load_model(args.model)
+            loaded = (classifier, {'version': Path(args.model).name})
+        else:
+            loaded = ModelRegistry().load_current_or_legacy()
+        if loaded is None:
+            print("No trained model; training a small synthetic one")
+            loaded = (synthetic_classifier(), {'version': 'synthetic'})
+        classifier, metadata = loaded
+        service = InferenceService(classifier, sr=SR, workers=args.workers,
+                                   max_batch_size=args.max_batch_size,
+                                   max_wait_ms=args.max_wait_ms, max_pending=args.max_pending,
+                                   model_version=metadata.get('version'))
+        target = InProcessTarget(service)
+
+    try:
+        # Cold workers spend seconds in numba JIT; keep that out of the numbers
+        warmup = args.warmup if args.warmup is not None else 2 * (args.workers or os.cpu_count() or 1)
+        if warmup:
+            print(f"Warming up with {warmup} requests...")
+            run_closed_loop(target, clips, min(warmup, 16), warmup)
+
+        results = []
+        if args.rate:
+            for rate in (float(r) for r in args.rate.split(',')):
+                samples, elapsed = run_open_loop(target, clips, rate, args.requests, seed=args.seed)
+                results.append(dict(mode='open', rate=rate, **summarize(samples, elapsed)))
+        else:
+            for concurrency in (int(c) for c in args.concurrency.split(',')):
+                samples, elapsed = run_closed_loop(target, clips, concurrency, args.requests)
+                results.append(dict(mode='closed', concurrency=concurrency,
+                                    **summarize(samples, elapsed)))
+
+        print_summary(results)
+
+        report = {
+            'generated_at': datetime.now().isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'cpu_count': os.cpu_count()
+            },
+            'target': args.url or 'in-process',
+            'clips': {
+                'source': args.replay or 'synthetic',
+                'count': len(clips),
+                'mean_bytes': int(np.mean([len(data) for _, data in clips]))
+            },
+            'service_config': None if args.url else {
+                'workers': args.workers,
+                'max_batch_size': args.max_batch_size,
+                'max_wait_ms': args.max_wait_ms,
+                'max_pending': args.max_pending
+            },
+            'results': results,
+            'server_metrics': target.server_metrics()
+        }
+    finally:
+        if service is not None:
+            service.close()
+
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Results saved to: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
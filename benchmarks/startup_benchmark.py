@@ -0,0 +1,209 @@
+"""
+Startup benchmark: what a fresh process pays before its first result
+
+Every measurement runs in a new Python interpreter, so nothing is cached
+in memory (the OS file cache and numba's on-disk cache still apply, as
+they would for a restarted service):
+
+- import time of each package module, and which heavy dependencies it
+  actually loads (lazy imports should keep plotting, training-only
+  scikit-learn and pandas out of serving processes)
+- first-request latency of a cold process: decode, features, predict
+- the same request after warmup(), plus how long warmup() itself took
+
+Usage:
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --repeats 5 --model models/registry/versions/<version>/model.pkl
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+SR = 22050
+
+MODULES = [
+    'src.preprocessing.audio_processor',
+    'src.features.feature_extractor',
+    'src.models.classifier',
+    'src.transcription.music_transcriber',
+    'src.evaluation.model_evaluator',
+    'src.search.audio_fingerprint',
+    'src.inference.server',
+]
+
+HEAVY_DEPENDENCIES = [
+    'matplotlib', 'seaborn', 'pandas', 'pretty_midi', 'scipy.signal',
+    'scipy.ndimage', 'sklearn.model_selection', 'sklearn.metrics', 'numba',
+]
+
+
+def run_child(args: List[str]) -> Dict:
+    """Run this script in a fresh interpreter and parse its JSON output"""
+    output = subprocess.run(
+        [sys.executable, __file__, '--child', *args],
+        cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def child_import(module: str) -> Dict:
+    started = time.perf_counter()
+    __import__(module)
+    seconds = time.perf_counter() - started
+    return {
+        'module': module,
+        'import_seconds': seconds,
+        'loaded': [name for name in HEAVY_DEPENDENCIES if name in sys.modules]
+    }
+
+
+def child_first_request(model_path: str, warm: bool) -> Dict:
+    started = time.perf_counter()
+    from src.features.feature_extractor import FeatureExtractor
+    from src.inference.warmup import synthetic_wav, warmup
+    from src.models.classifier import InstrumentClassifier
+    from src.preprocessing.audio_processor import AudioProcessor
+
+    processor = AudioProcessor(target_sr=SR)
+    extractor = FeatureExtractor(sr=SR)
+    classifier = InstrumentClassifier()
+    classifier.load_model(model_path)
+    result = {'startup_seconds': time.perf_counter() - started}
+
+    if warm:
+        result['warmup'] = warmup(SR, classifier=classifier, processor=processor,
+                                  extractor=extractor, transcribe=False)
+
+    # A different clip than warmup's, as a real first upload would be
+    data = synthetic_wav(SR, duration=3.0)
+    started = time.perf_counter()
+    audio, _, _ = processor.preprocess_audio(data, suffix='.wav')
+    decoded = time.perf_counter()
+    features = extractor.extract_all_features(audio)
+    extracted = time.perf_counter()
+    classifier.predict_single(features)
+    finished = time.perf_counter()
+
+    result['first_request'] = {
+        'decode': decoded - started,
+        'features': extracted - decoded,
+        'predict': finished - extracted,
+        'total': finished - started
+    }
+    return result
+
+
+def train_model(path: str):
+    """Small synthetic model, so the benchmark runs without a trained one"""
+    from benchmarks.load_test import synthetic_classifier
+    synthetic_classifier().save_model(path)
+
+
+def median_of(runs: List[Dict], *keys: str) -> Optional[float]:
+    values = []
+    for run in runs:
+        value = run
+        for key in keys:
+            value = value.get(key) if isinstance(value, dict) else None
+        if value is not None:
+            values.append(value)
+    return float(np.median(values)) if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure import and first-request latency of fresh processes')
+    parser.add_argument('--repeats', type=int, default=3, help='Fresh processes per measurement')
+    parser.add_argument('--model', default=None,
+                        help='Model file (default: the registry\'s current one, else a synthetic model)')
+    parser.add_argument('--output', default='benchmarks/results/startup_benchmark.json')
+    parser.add_argument('--child', nargs='+', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, *rest = args.child
+        if mode == 'import':
+            result = child_import(rest[0])
+        else:
+            result = child_first_request(rest[0], warm=mode == 'warm')
+        print(json.dumps(result))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = args.model
+        if model_path is None:
+            from src.models.model_registry import ModelRegistry
+            registry = ModelRegistry()
+            version = registry.current_version()
+            if version is not None:
+                model_path = str(registry.versions_dir / version / "model.pkl")
+        if model_path is None:
+            print("No trained model; training a small synthetic one")
+            model_path = str(Path(tmp) / "model.pkl")
+            train_model(model_path)
+
+        print(f"Module imports ({args.repeats} fresh processes each):")
+        imports = []
+        for module in MODULES:
+            runs = [run_child(['import', module]) for _ in range(args.repeats)]
+            imports.append({
+                'module': module,
+                'import_seconds': median_of(runs, 'import_seconds'),
+                'loaded': runs[-1]['loaded']
+            })
+            print(f"  {module:40s} {imports[-1]['import_seconds']:6.2f}s  "
+                  f"loads: {', '.join(imports[-1]['loaded']) or '-'}")
+
+        requests = {}
+        for mode in ('cold', 'warm'):
+            runs = [run_child([mode, model_path]) for _ in range(args.repeats)]
+            requests[mode] = {
+                'startup_seconds': median_of(runs, 'startup_seconds'),
+                'warmup_seconds': median_of(runs, 'warmup', 'total'),
+                'first_request_seconds': {
+                    stage: median_of(runs, 'first_request', stage)
+                    for stage in ('decode', 'features', 'predict', 'total')
+                }
+            }
+
+    print("\nFirst request in a fresh process (median):")
+    for mode, result in requests.items():
+        first = result['first_request_seconds']
+        warmup = f"  after {result['warmup_seconds']:.2f}s warmup" if result['warmup_seconds'] else ""
+        print(f"  {mode:5s} total {first['total']:6.2f}s  (decode {first['decode']:.2f}s, "
+              f"features {first['features']:.2f}s, predict {first['predict']:.3f}s){warmup}")
+
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'cpu_count': os.cpu_count()
+        },
+        'repeats': args.repeats,
+        'model': args.model or 'registry/synthetic',
+        'imports': imports,
+        'first_request': requests
+    }
+
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
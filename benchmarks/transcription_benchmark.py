@@ -0,0 +1,396 @@
+"""
+Transcription accuracy/speed benchmark
+
+Runs the onset detectors and the full MusicTranscriber (monophonic and
+polyphonic) over synthetic Phin and Khaen melodies with exact ground truth
+(see examples/generate_demo_data.py), scores them with mir_eval and
+records speed and peak memory next to accuracy. Both transcribers are
+also scored on multi-voice clips (a drone under the melody, or the melody
+doubled a fourth below) against every sounding note. Results are written
+as JSON so two runs can be diffed, and --baseline flags regressions in
+either speed or accuracy.
+
+Usage:
+    python benchmarks/transcription_benchmark.py
+    python benchmarks/transcription_benchmark.py --quick --workers 4
+    python benchmarks/transcription_benchmark.py --baseline benchmarks/results/baseline.json
+"""
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import librosa
+import mir_eval
+
+from examples.generate_demo_data import generate_note_sequence
+from src.transcription.onset_detector import OnsetDetector
+from src.transcription.music_transcriber import MusicTranscriber
+
+SR = 22050
+ONSET_WINDOW = 0.05
+PITCH_TOLERANCE_CENTS = 50.0
+
+PARAMETER_GRID = {
+    'threshold_ratio': [1.2, 1.5, 2.0],
+    'min_duration': [0.03, 0.05, 0.1],
+    'window_size': [0.03, 0.05, 0.1],
+}
+
+QUICK_GRID = {
+    'threshold_ratio': [1.5],
+    'min_duration': [0.05],
+    'window_size': [0.05],
+}
+
+_corpus = []
+
+
+def build_corpus(n_clips: int = 4, duration: float = 10.0, sr: int = SR,
+                 seed: int = 0) -> List[Dict]:
+    """
+    Generate n_clips melodies per instrument with ground-truth notes, plus
+    max(1, n_clips // 2) multi-voice clips per instrument, alternating a
+    drone under the melody and the melody doubled a fourth below
+    ('polyphonic': True; speed is only measured on the melodies)
+    """
+    corpus = []
+    for instrument in ("Phin", "Khaen"):
+        for i in range(n_clips):
+            clip_seed = seed + i
+            audio, notes = generate_note_sequence(instrument, duration=duration,
+                                                  sr=sr, seed=clip_seed)
+            corpus.append({
+                'name': f"{instrument.lower()}_{clip_seed}",
+                'instrument': instrument,
+                'audio': audio,
+                'notes': notes,
+                'polyphonic': False
+            })
+
+        for i in range(max(1, n_clips // 2)):
+            clip_seed = seed + 1000 + i
+            texture = 'drone' if i % 2 == 0 else 'harmony'
+            audio, notes = generate_note_sequence(instrument, duration=duration, sr=sr,
+                                                  seed=clip_seed, **{texture: True})
+            corpus.append({
+                'name': f"{instrument.lower()}_{texture}_{clip_seed}",
+                'instrument': instrument,
+                'audio': audio,
+                'notes': notes,
+                'polyphonic': True
+            })
+    return corpus
+
+
+def build_cases(grid: Dict) -> List[Dict]:
+    """Expand the parameter grid into one case per method/parameter combination"""
+    cases = [
+        {'method': 'detect_onsets_with_librosa', 'params': {}},
+        {'method': 'transcribe_polyphonic', 'params': {}},
+    ]
+
+    for threshold_ratio, min_duration in itertools.product(
+            grid['threshold_ratio'], grid['min_duration']):
+        cases.append({
+            'method': 'detect_onsets',
+            'params': {'threshold_ratio': threshold_ratio, 'min_duration': min_duration}
+        })
+
+    for threshold_ratio, min_duration, window_size in itertools.product(
+            grid['threshold_ratio'], grid['min_duration'], grid['window_size']):
+        cases.append({
+            'method': 'transcribe',
+            'params': {
+                'threshold_ratio': threshold_ratio,
+                'min_duration': min_duration,
+                'window_size': window_size
+            }
+        })
+
+    return cases
+
+
+def score_onsets(notes: List[Dict], est_onsets: np.ndarray) -> Dict[str, float]:
+    ref_onsets = np.array([note['onset_time'] for note in notes])
+    f, p, r = mir_eval.onset.f_measure(ref_onsets, np.asarray(est_onsets, dtype=float),
+                                       window=ONSET_WINDOW)
+    return {'f_measure': float(f), 'precision': float(p), 'recall': float(r)}
+
+
+def score_notes(notes: List[Dict], transcription: Dict) -> Dict[str, float]:
+    ref_intervals = np.array([[n['onset_time'], n['offset_time']] for n in notes])
+    ref_pitches = np.array([n['frequency'] for n in notes])
+
+    est = [n for n in transcription['notes'] if n['duration'] > 0]
+    est_intervals = np.array(
+        [[n['onset_time'], n['onset_time'] + n['duration']] for n in est]
+    ).reshape(-1, 2)
+    est_pitches = librosa.midi_to_hz(np.array([n['midi_note'] for n in est], dtype=float))
+
+    p, r, f, _ = mir_eval.transcription.precision_recall_f1_overlap(
+        ref_intervals, ref_pitches, est_intervals, est_pitches,
+        onset_tolerance=ONSET_WINDOW, pitch_tolerance=PITCH_TOLERANCE_CENTS,
+        offset_ratio=None
+    )
+    onset_scores = score_onsets(notes, np.array([n['onset_time'] for n in est]))
+
+    return {
+        'f_measure': float(f),
+        'precision': float(p),
+        'recall': float(r),
+        'onset_f_measure': onset_scores['f_measure']
+    }
+
+
+def _run_method(method: str, params: Dict, audio: np.ndarray,
+                onset_detector: OnsetDetector, transcriber: MusicTranscriber):
+    if method == 'detect_onsets':
+        return onset_detector.detect_onsets(audio, **params)
+    if method == 'detect_onsets_with_librosa':
+        return onset_detector.detect_onsets_with_librosa(audio)
+    if method == 'transcribe':
+        return transcriber.transcribe(audio, **params)
+    if method == 'transcribe_polyphonic':
+        return transcriber.transcribe_polyphonic(audio, **params)
+    raise ValueError(f"Unknown benchmark method: {method}")
+
+
+def _init_worker(corpus: List[Dict]):
+    global _corpus
+    _corpus = corpus
+
+
+def run_case(case: Dict) -> Dict:
+    """
+    Benchmark one method/parameter combination over the whole corpus
+
+    Timing and memory are measured in separate passes, since tracemalloc
+    itself slows allocation-heavy code down.
+    """
+    method, params = case['method'], case['params']
+    onset_detector = OnsetDetector(sr=SR)
+    transcriber = MusicTranscriber(sr=SR)
+    melodies = [clip for clip in _corpus if not clip['polyphonic']]
+
+    # First librosa calls pay for numba compilation; keep that out of the timings
+    _run_method(method, params, melodies[0]['audio'][:SR], onset_detector, transcriber)
+
+    total_audio_seconds = sum(len(clip['audio']) / SR for clip in melodies)
+
+    outputs = []
+    start = time.perf_counter()
+    for clip in melodies:
+        outputs.append(_run_method(method, params, clip['audio'], onset_detector, transcriber))
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for clip in melodies:
+        _run_method(method, params, clip['audio'], onset_detector, transcriber)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_clip = []
+    for clip, output in zip(melodies, outputs):
+        if method.startswith('transcribe'):
+            scores = score_notes(clip['notes'], output)
+        else:
+            scores = score_onsets(clip['notes'], output)
+        scores['clip'] = clip['name']
+        scores['instrument'] = clip['instrument']
+        scores['polyphonic'] = False
+        per_clip.append(scores)
+
+    accuracy = {'f_measure': float(np.mean([s['f_measure'] for s in per_clip]))}
+    for instrument in sorted(set(s['instrument'] for s in per_clip)):
+        accuracy[f'f_measure_{instrument.lower()}'] = float(np.mean(
+            [s['f_measure'] for s in per_clip if s['instrument'] == instrument]
+        ))
+
+    # Multi-voice clips are scored against every voice, drone included
+    if method.startswith('transcribe'):
+        poly_scores = []
+        for clip in (clip for clip in _corpus if clip['polyphonic']):
+            output = _run_method(method, params, clip['audio'], onset_detector, transcriber)
+            scores = score_notes(clip['notes'], output)
+            scores['clip'] = clip['name']
+            scores['instrument'] = clip['instrument']
+            scores['polyphonic'] = True
+            poly_scores.append(scores)
+        if poly_scores:
+            accuracy['f_measure_polyphonic'] = float(np.mean([s['f_measure'] for s in poly_scores]))
+            accuracy['recall_polyphonic'] = float(np.mean([s['recall'] for s in poly_scores]))
+            per_clip += poly_scores
+
+    return {
+        'method': method,
+        'params': params,
+        'accuracy': accuracy,
+        'ms_per_audio_second': elapsed * 1000 / total_audio_seconds,
+        'realtime_factor': total_audio_seconds / elapsed if elapsed > 0 else float('inf'),
+        'peak_memory_mb': peak_bytes / (1024 * 1024),
+        'per_clip': per_clip
+    }
+
+
+def case_key(result: Dict) -> str:
+    return f"{result['method']}:{json.dumps(result['params'], sort_keys=True)}"
+
+
+def compare_to_baseline(results: List[Dict], baseline: Dict,
+                        speed_tolerance: float = 0.25,
+                        accuracy_tolerance: float = 0.02) -> List[Dict]:
+    """
+    Compare a run against a previous results file
+
+    Returns:
+        List of regressions; a case regresses when it is more than
+        speed_tolerance (relative) slower or loses more than
+        accuracy_tolerance (absolute) F-measure
+    """
+    baseline_results = {case_key(r): r for r in baseline.get('results', [])}
+    regressions = []
+
+    for result in results:
+        previous = baseline_results.get(case_key(result))
+        if previous is None:
+            continue
+
+        old_speed = previous['ms_per_audio_second']
+        new_speed = result['ms_per_audio_second']
+        if old_speed > 0 and new_speed > old_speed * (1 + speed_tolerance):
+            regressions.append({
+                'case': case_key(result),
+                'metric': 'ms_per_audio_second',
+                'baseline': old_speed,
+                'current': new_speed
+            })
+
+        for metric in ('f_measure', 'f_measure_polyphonic'):
+            old_f = previous['accuracy'].get(metric)
+            new_f = result['accuracy'].get(metric)
+            if old_f is not None and new_f is not None and new_f < old_f - accuracy_tolerance:
+                regressions.append({
+                    'case': case_key(result),
+                    'metric': metric,
+                    'baseline': old_f,
+                    'current': new_f
+                })
+
+    return regressions
+
+
+def run_benchmark(n_clips: int = 4, duration: float = 10.0, grid: Optional[Dict] = None,
+                  workers: int = 1, seed: int = 0) -> Dict:
+    grid = grid or PARAMETER_GRID
+    corpus = build_corpus(n_clips=n_clips, duration=duration, seed=seed)
+    cases = build_cases(grid)
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(corpus,)) as executor:
+            results = list(executor.map(run_case, cases))
+    else:
+        _init_worker(corpus)
+        results = [run_case(case) for case in cases]
+
+    return {
+        'generated_at': datetime.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'librosa': librosa.__version__,
+            'mir_eval': getattr(mir_eval, '__version__', 'unknown'),
+            'workers': workers
+        },
+        'corpus': {
+            'n_clips_per_instrument': n_clips,
+            'n_polyphonic_clips': sum(1 for clip in corpus if clip['polyphonic']),
+            'clip_duration': duration,
+            'sample_rate': SR,
+            'seed': seed,
+            'total_reference_notes': sum(len(clip['notes']) for clip in corpus)
+        },
+        'scoring': {
+            'onset_window': ONSET_WINDOW,
+            'pitch_tolerance_cents': PITCH_TOLERANCE_CENTS
+        },
+        'grid': grid,
+        'results': results
+    }
+
+
+def print_summary(report: Dict):
+    print(f"{'Method':<28} {'Params':<58} {'F1':>6} {'PolyF1':>7} {'ms/s':>8} {'MB':>7}")
+    print("-" * 119)
+    for result in sorted(report['results'], key=lambda r: (r['method'], -r['accuracy']['f_measure'])):
+        params = ", ".join(f"{k}={v}" for k, v in result['params'].items())
+        poly_f = result['accuracy'].get('f_measure_polyphonic')
+        poly_f = f"{poly_f:.3f}" if poly_f is not None else "-"
+        print(f"{result['method']:<28} {params:<58} "
+              f"{result['accuracy']['f_measure']:>6.3f} "
+              f"{poly_f:>7} "
+              f"{result['ms_per_audio_second']:>8.2f} "
+              f"{result['peak_memory_mb']:>7.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark onset detection and transcription")
+    parser.add_argument('--output', default='benchmarks/results/transcription_benchmark.json')
+    parser.add_argument('--baseline', help='Previous results file to check for regressions')
+    parser.add_argument('--n-clips', type=int, default=4, help='Clips per instrument')
+    parser.add_argument('--duration', type=float, default=10.0, help='Clip length in seconds')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Parallel sweep workers (use 1 for the most stable timings)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--quick', action='store_true', help='Default parameters only')
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        n_clips=args.n_clips,
+        duration=args.duration,
+        grid=QUICK_GRID if args.quick else PARAMETER_GRID,
+        workers=args.workers,
+        seed=args.seed
+    )
+
+    print_summary(report)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report['results'], baseline)
+        report['regressions'] = regressions
+        if regressions:
+            exit_code = 1
+            print(f"\n⚠️  {len(regressions)} regression(s) against {args.baseline}:")
+            for reg in regressions:
+                print(f"  - {reg['case']} {reg['metric']}: "
+                      f"{reg['baseline']:.4f} -> {reg['current']:.4f}")
+        else:
+            print(f"\n✓ No regressions against {args.baseline}")
+
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Results saved to: {output_path}")
+
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
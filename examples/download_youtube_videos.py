@@ -5,6 +5,7 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from src.data_collection.youtube_downloader import YouTubeAudioDownloader, create_phin_video_list
 from src.models.dataset_manager import DatasetManager
+from src.preprocessing.deduplication import Deduplicator
 
 
 def download_phin_tutorials():
@@ -32,7 +33,7 @@ def download_phin_tutorials():
         print("\nDownload cancelled.")
         return
     
-    downloader = YouTubeAudioDownloader(output_dir="data/raw")
+    downloader = YouTubeAudioDownloader(output_dir="data/raw", deduplicator=Deduplicator())
     video_list = create_phin_video_list()
     
     print(f"\n📋 Videos to download: {len(video_list)}")
@@ -57,16 +58,28 @@ def download_phin_tutorials():
         for result in successful_downloads:
             metadata = result['metadata']
             
+            if metadata.get('recording_id'):
+                continue
+            if result['duplicate'] or dataset_manager.find_by_checksum(metadata['sha256']):
+                print(f"  ⚠️  Skipped duplicate audio: {metadata['title'][:50]}...")
+                continue
+            if metadata.get('near_duplicates'):
+                similar = ', '.join(Path(m['file_path']).name for m in metadata['near_duplicates'])
+                print(f"  ⚠️  Possible re-upload of: {similar}")
+            
             try:
-                rec_id = dataset_manager.add_recording(
-                    file_path=metadata['file_path'],
-                    instrument=metadata['instrument'],
-                    technique=metadata['technique'] or 'Unknown',
-                    performer_name=metadata['uploader'],
-                    consent_status=True,
-                    cultural_attribution=f"YouTube: {metadata['title']} by {metadata['uploader']}",
-                    notes=f"YouTube video ID: {metadata['video_id']}. {metadata.get('attribution_notes', '')}"
-                )
+                rec_id = dataset_manager.add_recordings([{
+                    'file_path': metadata['file_path'],
+                    'instrument': metadata['instrument'],
+                    'technique': metadata['technique'] or 'Unknown',
+                    'performer_name': metadata['uploader'],
+                    'consent_status': True,
+                    'cultural_attribution': f"YouTube: {metadata['title']} by {metadata['uploader']}",
+                    'notes': f"YouTube video ID: {metadata['video_id']}. {metadata.get('attribution_notes', '')}",
+                    'audio_info': dict(metadata['audio_info'],
+                                       near_duplicates=metadata.get('near_duplicates', []))
+                }])[0]
+                downloader.index.link_recording(metadata['video_id'], rec_id)
                 print(f"  ✓ Added to dataset: {rec_id} - {metadata['title'][:50]}...")
             
             except Exception as e:
@@ -77,8 +90,8 @@ def download_phin_tutorials():
         print(f"{'='*70}")
         print(f"\n✓ Successfully downloaded: {len(successful_downloads)}/{len(video_list)} videos")
         print(f"✓ Added to dataset with proper attribution")
-        print(f"\n📁 Audio files saved to: data/raw/")
-        print(f"📋 Metadata saved to: data/raw/*_metadata.json")
+        print(f"\n📁 Audio files saved to: data/raw/ (mono 22050 Hz FLAC)")
+        print(f"📋 Metadata saved to: data/raw/download_index.db")
         
         print(f"\n💡 Next steps:")
         print(f"  1. Review downloaded audio quality")
@@ -116,15 +129,30 @@ def preview_video_info():
             print(f"  ✗ Error: {info.get('error', 'Unknown error')}")
 
 
+def migrate_download_metadata():
+    """Move existing *_metadata.json sidecars into the download index"""
+    downloader = YouTubeAudioDownloader(output_dir="data/raw")
+    
+    count = downloader.index.migrate_sidecars("data/raw", remove=True)
+    print(f"✓ Migrated {count} metadata files into {downloader.index.index_path}")
+    
+    summary = downloader.index.sync_with_dataset(DatasetManager())
+    print(f"✓ Linked to dataset: {summary['linked']}, not in dataset: {summary['unlinked']}")
+
+
 if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description='Download Phin tutorial videos from YouTube')
     parser.add_argument('--preview', action='store_true', help='Preview video info without downloading')
+    parser.add_argument('--migrate', action='store_true',
+                        help='Move *_metadata.json sidecars into the download index and link them to the dataset')
     
     args = parser.parse_args()
     
     if args.preview:
         preview_video_info()
+    elif args.migrate:
+        migrate_download_metadata()
     else:
         download_phin_tutorials()
@@ -43,6 +43,133 @@ def generate_synthetic_audio(instrument_type: str, duration: float = 5.0, sr: in
     return audio, sr
 
 
+PHIN_SCALE_MIDI = [57, 59, 60, 62, 64, 67, 69, 71, 72, 74, 76]
+KHAEN_SCALE_MIDI = [57, 59, 60, 62, 64, 65, 67, 69, 71, 72]
+
+
+def midi_to_hz(midi_note: float) -> float:
+    return 440.0 * 2.0 ** ((midi_note - 69) / 12.0)
+
+
+def phin_tone(freq: float, n_samples: int, sr: int, decay: float = 4.0) -> np.ndarray:
+    """Plucked-string tone: bright attack, upper partials die away faster"""
+    t = np.arange(n_samples) / sr
+    tone = np.zeros(n_samples)
+    for h in range(1, 7):
+        if freq * h >= sr / 2:
+            break
+        partial_decay = decay * (1 + 0.6 * (h - 1))
+        tone += (0.8 ** (h - 1)) * np.exp(-partial_decay * t) * np.sin(2 * np.pi * freq * h * t)
+    attack = np.minimum(1.0, t / 0.003)
+    return tone * attack
+
+
+def khaen_tone(freq: float, n_samples: int, sr: int) -> np.ndarray:
+    """Free-reed tone: sustained, reedy spectrum with breath tremolo"""
+    t = np.arange(n_samples) / sr
+    tone = np.zeros(n_samples)
+    for h in range(1, 9):
+        if freq * h >= sr / 2:
+            break
+        amp = 1.0 / h if h % 2 == 1 else 0.6 / h
+        tone += amp * np.sin(2 * np.pi * freq * h * t)
+    attack = np.minimum(1.0, t / 0.03)
+    release = np.minimum(1.0, (t[-1] - t) / 0.02) if n_samples > 1 else np.ones(n_samples)
+    tremolo = 1 + 0.15 * np.sin(2 * np.pi * 5.5 * t)
+    return tone * attack * release * tremolo
+
+
+def generate_note_sequence(instrument_type: str, duration: float = 10.0, sr: int = 22050,
+                           seed: int = 0, drone: bool = False, harmony: bool = False,
+                           min_note: float = 0.12, max_note: float = 0.6):
+    """
+    Generate a melody with exact ground truth for benchmarking transcription
+
+    Args:
+        instrument_type: "Phin" (plucked lute) or "Khaen" (free-reed mouth organ)
+        duration: Total length in seconds
+        sr: Sample rate
+        seed: Random seed, so the same corpus can be regenerated anywhere
+        drone: Add a sustained khaen drone (tonic + fifth) under the melody
+        harmony: Double every melody note a fourth below, as khaen players
+            do with two pipes at once
+        min_note, max_note: Range of note durations in seconds
+
+    Returns:
+        (audio, notes) where notes is a list of dicts with onset_time,
+        offset_time, midi_note, frequency and voice ('melody', 'harmony'
+        or 'drone') for every sounding note, in onset order
+    """
+    rng = np.random.default_rng(seed)
+    scale = PHIN_SCALE_MIDI if instrument_type == "Phin" else KHAEN_SCALE_MIDI
+
+    n_samples = int(sr * duration)
+    audio = np.zeros(n_samples)
+    notes = []
+
+    onset = 0.1
+    while True:
+        note_duration = float(rng.uniform(min_note, max_note))
+        offset = onset + note_duration
+        if offset > duration - 0.05:
+            break
+
+        midi_note = int(rng.choice(scale))
+        freq = midi_to_hz(midi_note)
+        start = int(onset * sr)
+        length = int(note_duration * sr)
+
+        if instrument_type == "Phin":
+            tone = phin_tone(freq, length, sr)
+        else:
+            tone = khaen_tone(freq, length, sr)
+
+        velocity = rng.uniform(0.6, 1.0)
+        audio[start:start + length] += tone * velocity
+        notes.append({
+            'onset_time': onset,
+            'offset_time': offset,
+            'midi_note': midi_note,
+            'frequency': freq,
+            'voice': 'melody'
+        })
+
+        if harmony:
+            # No extra random draws, so the melody matches the harmony=False clip
+            lower = midi_note - 5
+            tone_fn = phin_tone if instrument_type == "Phin" else khaen_tone
+            audio[start:start + length] += 0.7 * velocity * tone_fn(midi_to_hz(lower), length, sr)
+            notes.append({
+                'onset_time': onset,
+                'offset_time': offset,
+                'midi_note': lower,
+                'frequency': midi_to_hz(lower),
+                'voice': 'harmony'
+            })
+
+        gap = float(rng.uniform(0.0, 0.08)) if instrument_type == "Phin" else float(rng.uniform(0.03, 0.1))
+        onset = offset + gap
+
+    if drone:
+        for midi_note in (scale[0] - 12, scale[0] - 5):
+            audio += 0.35 * khaen_tone(midi_to_hz(midi_note), n_samples, sr)
+            notes.append({
+                'onset_time': 0.0,
+                'offset_time': duration,
+                'midi_note': midi_note,
+                'frequency': midi_to_hz(midi_note),
+                'voice': 'drone'
+            })
+        notes.sort(key=lambda note: (note['onset_time'], note['midi_note']))
+
+    peak = np.max(np.abs(audio))
+    if peak > 0:
+        audio = audio / peak * 0.8
+    audio = audio + rng.standard_normal(n_samples) * 0.005
+
+    return audio.astype(np.float32), notes
+
+
 def create_demo_dataset():
     print("Creating demonstration dataset...")
     print("=" * 60)
@@ -0,0 +1,58 @@
+import sys
+import json
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.data_collection.youtube_downloader import YouTubeAudioDownloader, create_phin_video_list
+from src.models.dataset_manager import DatasetManager
+from src.pipeline.ingest import IngestPipeline
+
+
+def ingest_collection(video_list: list, download_workers: int = 4, feature_workers: int = 4):
+    """
+    Download, register and featurize a video collection in one streaming pass
+    
+    Interrupted runs resume from data/pipeline/ingest_checkpoint.json;
+    afterwards train_model.py reuses the cached feature matrices.
+    """
+    pipeline = IngestPipeline(
+        downloader=YouTubeAudioDownloader(output_dir="data/raw"),
+        dataset_manager=DatasetManager(),
+        workers={'download': download_workers, 'features': feature_workers}
+    )
+    
+    summary = pipeline.run(video_list)
+    
+    print("=" * 70)
+    print(f"Ingest complete in {summary['metrics']['wall_seconds']:.1f}s: {summary['statuses']}")
+    print("=" * 70)
+    
+    for name, stage in summary['metrics']['stages'].items():
+        print(f"  {name:<9} processed={stage['processed']:<4} failed={stage['failed']:<3} "
+              f"busy={stage['busy_seconds']:.1f}s blocked={stage['blocked_seconds']:.1f}s "
+              f"utilization={stage['utilization']:.0%}")
+    
+    for failure in summary['failures']:
+        print(f"  ✗ [{failure['stage']}] {failure['url']}: {failure['error']}")
+    
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Stream a YouTube collection into the dataset')
+    parser.add_argument('--videos', help='JSON file with a list of {url, instrument, technique, notes}')
+    parser.add_argument('--download-workers', type=int, default=4)
+    parser.add_argument('--feature-workers', type=int, default=4)
+    
+    args = parser.parse_args()
+    
+    if args.videos:
+        with open(args.videos, 'r', encoding='utf-8') as f:
+            videos = json.load(f)
+    else:
+        videos = create_phin_video_list()
+    
+    ingest_collection(videos, args.download_workers, args.feature_workers)
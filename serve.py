@@ -0,0 +1,101 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from src.models.classifier import InstrumentClassifier
+from src.models.model_registry import ModelRegistry, ModelWatcher
+from src.inference.cache import PredictionCache
+from src.inference.server import InferenceService, serve
+
+SAMPLE_RATE = 22050
+
+
+def check_model_metadata(metadata: dict):
+    if metadata.get('sample_rate', SAMPLE_RATE) != SAMPLE_RATE:
+        raise ValueError(f"Model expects {metadata['sample_rate']} Hz audio, service runs at {SAMPLE_RATE} Hz")
+
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Headless instrument classification service')
+    parser.add_argument('--model', help='Serve this model file as-is instead of following the registry')
+    parser.add_argument('--registry', default='models/registry')
+    parser.add_argument('--poll-interval', type=float, default=5.0,
+                        help='Seconds between checks for a newly published model')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Decode/feature worker processes (default: one per CPU)')
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    parser.add_argument('--max-pending', type=int, default=64,
+                        help='Requests in flight before new ones get HTTP 503')
+    parser.add_argument('--cache-size', type=int, default=1024,
+                        help='Results kept in memory for repeated clips (0 disables caching)')
+    parser.add_argument('--cache-dir', default=None,
+                        help='Also keep results on disk here, across restarts')
+    parser.add_argument('--data-root', default=None,
+                        help='Allow JSON {"path": ...} requests for files under this directory')
+    parser.add_argument('--max-body-mb', type=float, default=50.0,
+                        help='Larger request bodies get HTTP 413')
+    parser.add_argument('--no-warmup', action='store_true',
+                        help='Skip warming the workers (first requests will be slow)')
+    
+    args = parser.parse_args()
+    
+    watcher = None
+    if args.model:
+        if not Path(args.model).exists():
+            print(f"No trained model at {args.model}.")
+            sys.exit(1)
+        classifier = InstrumentClassifier()
+        classifier.load_model(args.model)
+        version = Path(args.model).name
+    else:
+        watcher = ModelWatcher(ModelRegistry(args.registry), poll_interval=args.poll_interval,
+                               validate=check_model_metadata)
+        if watcher.get() is None:
+            print(watcher.last_error or f"No trained model in {args.registry}. Run train_model.py first.")
+            sys.exit(1)
+        classifier, metadata = watcher.get()
+        version = metadata.get('version')
+    
+    cache = None
+    if args.cache_size > 0:
+        cache = PredictionCache(max_entries=args.cache_size, cache_dir=args.cache_dir, sr=SAMPLE_RATE)
+    service = InferenceService(
+        classifier, sr=SAMPLE_RATE, workers=args.workers, max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms, max_pending=args.max_pending, model_version=version,
+        cache=cache
+    )
+    if not args.no_warmup:
+        print(f"Warming up {service.workers} workers...")
+        timings = service.warmup()
+        print(f"  ready in {timings['total']:.1f}s")
+    if watcher is not None:
+        # Swap newly published models in without a restart
+        def swap(new_classifier, metadata):
+            service.swap_model(new_classifier, metadata.get('version'))
+            print(f"Now serving model {metadata.get('version')}")
+        watcher.on_change(swap)
+        watcher.start()
+    server = serve(service, args.host, args.port, data_root=args.data_root,
+                   max_body_bytes=int(args.max_body_mb * 1024 * 1024))
+    
+    print(f"Serving model {version} on http://{args.host}:{args.port}")
+    print("  POST /classify   audio bytes (?filename=clip.mp3)"
+          + (f" or JSON {{\"path\": ...}} under {args.data_root}" if args.data_root else ""))
+    print("  GET  /metrics    latency percentiles, throughput, batch sizes")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+def extract_video_id(url: str) -> Optional[str]:
+    """
+    YouTube video ID from a watch, short, embed or youtu.be URL, without a
+    network round-trip; None for anything else
+    """
+    parsed = urlparse(url)
+    host = parsed.netloc.lower().split(':')[0]
+    if host.startswith(('www.', 'm.', 'music.')):
+        host = host.split('.', 1)[1]
+
+    if host == 'youtu.be':
+        return parsed.path.strip('/').split('/')[0] or None
+    if host == 'youtube.com':
+        if parsed.path == '/watch':
+            return parse_qs(parsed.query).get('v', [None])[0]
+        parts = parsed.path.strip('/').split('/')
+        if len(parts) >= 2 and parts[0] in ('shorts', 'embed', 'live', 'v'):
+            return parts[1]
+    return None
+
+
+class DownloadIndex:
+    """
+    One SQLite catalogue of downloaded videos, keyed by video_id
+    Holds the metadata download_audio() used to write to per-video
+    '<title>_<id>_metadata.json' sidecars, so "have we got video X?" is a
+    primary-key lookup and "all Phin downloads by uploader Y" an indexed
+    query, with no globbing or parsing of small files
+
+    Safe to share between downloader threads. Each entry can be linked to
+    the DatasetManager recording made from it (see sync_with_dataset).
+    """
+
+    COLUMNS = ('video_id', 'url', 'title', 'uploader', 'instrument', 'technique',
+               'file_path', 'sha256', 'metadata_path', 'recording_id', 'downloaded_at', 'data')
+
+    def __init__(self, index_path: str = "data/raw/download_index.db"):
+        self.index_path = Path(index_path)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.index_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS downloads (
+                    video_id TEXT PRIMARY KEY,
+                    url TEXT,
+                    title TEXT,
+                    uploader TEXT,
+                    instrument TEXT,
+                    technique TEXT,
+                    file_path TEXT NOT NULL,
+                    sha256 TEXT,
+                    metadata_path TEXT,
+                    recording_id TEXT,
+                    downloaded_at TEXT,
+                    data TEXT NOT NULL
+                );
+            """)
+            self._add_missing_columns()
+            self.conn.executescript("""
+                CREATE INDEX IF NOT EXISTS idx_downloads_url ON downloads (url);
+                CREATE INDEX IF NOT EXISTS idx_downloads_instrument
+                    ON downloads (instrument COLLATE NOCASE);
+                CREATE INDEX IF NOT EXISTS idx_downloads_uploader ON downloads (uploader);
+                CREATE INDEX IF NOT EXISTS idx_downloads_file_path ON downloads (file_path);
+                CREATE INDEX IF NOT EXISTS idx_downloads_sha256 ON downloads (sha256);
+            """)
+
+    def _add_missing_columns(self):
+        # Indexes created before the catalogue held searchable columns are
+        # widened and backfilled from the stored metadata
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(downloads)")}
+        missing = [column for column in self.COLUMNS if column not in existing]
+        for column in missing:
+            self.conn.execute(f"ALTER TABLE downloads ADD COLUMN {column} TEXT")
+
+        if missing:
+            rows = self.conn.execute("SELECT data, metadata_path FROM downloads").fetchall()
+            self.put_many((json.loads(data), metadata_path) for data, metadata_path in rows)
+
+    def put(self, metadata: Dict, metadata_path: Optional[str] = None):
+        """Insert or replace a download's metadata (as written by download_audio)"""
+        self.put_many([(metadata, metadata_path)])
+
+    def put_many(self, items: Iterable[Tuple[Dict, Optional[str]]]) -> int:
+        """Insert or replace many (metadata, metadata_path) pairs in one transaction"""
+        rows = [
+            (metadata['video_id'], metadata.get('url'), metadata.get('title'),
+             metadata.get('uploader'), metadata.get('instrument'), metadata.get('technique'),
+             metadata['file_path'], metadata.get('sha256'),
+             str(metadata_path) if metadata_path else None,
+             metadata.get('recording_id'), metadata.get('downloaded_at'),
+             json.dumps(metadata, ensure_ascii=False))
+            for metadata, metadata_path in items
+        ]
+        with self._lock, self.conn:
+            # Keep an existing dataset link when a video is re-downloaded
+            self.conn.executemany(
+                f"""INSERT INTO downloads ({', '.join(self.COLUMNS)})
+                    VALUES ({', '.join('?' * len(self.COLUMNS))})
+                    ON CONFLICT (video_id) DO UPDATE SET
+                        url = excluded.url, title = excluded.title,
+                        uploader = excluded.uploader, instrument = excluded.instrument,
+                        technique = excluded.technique, file_path = excluded.file_path,
+                        sha256 = excluded.sha256, metadata_path = excluded.metadata_path,
+                        recording_id = COALESCE(excluded.recording_id, recording_id),
+                        downloaded_at = excluded.downloaded_at, data = excluded.data""",
+                rows
+            )
+        return len(rows)
+
+    @staticmethod
+    def _entry(row) -> Dict:
+        data, metadata_path, recording_id = row
+        metadata = json.loads(data)
+        metadata['metadata_path'] = metadata_path
+        metadata['recording_id'] = recording_id
+        return metadata
+
+    def _select(self, where: str = "", params: tuple = ()) -> List[Dict]:
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT data, metadata_path, recording_id FROM downloads {where}", params
+            ).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def get(self, video_id: str) -> Optional[Dict]:
+        entries = self._select("WHERE video_id = ?", (video_id,))
+        return entries[0] if entries else None
+
+    def find(self, url: str) -> Optional[Dict]:
+        """Look a URL up by its video ID, or verbatim for non-YouTube URLs"""
+        video_id = extract_video_id(url)
+        if video_id is not None:
+            return self.get(video_id)
+        entries = self._select("WHERE url = ?", (url,))
+        return entries[0] if entries else None
+
+    def query(self, instrument: Optional[str] = None, uploader: Optional[str] = None,
+              technique: Optional[str] = None,
+              linked: Optional[bool] = None) -> List[Dict]:
+        """
+        Filter downloads on indexed columns
+
+        Args:
+            instrument: Instrument type (case-insensitive)
+            uploader: Exact uploader name
+            technique: Playing technique (case-insensitive)
+            linked: True/False for downloads with/without a dataset recording
+        """
+        clauses, params = [], []
+        if instrument is not None:
+            clauses.append("instrument = ? COLLATE NOCASE")
+            params.append(instrument)
+        if uploader is not None:
+            clauses.append("uploader = ?")
+            params.append(uploader)
+        if technique is not None:
+            clauses.append("technique = ? COLLATE NOCASE")
+            params.append(technique)
+        if linked is not None:
+            clauses.append("recording_id IS NOT NULL" if linked else "recording_id IS NULL")
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._select(f"{where} ORDER BY downloaded_at", tuple(params))
+
+    def is_complete(self, metadata: Optional[Dict]) -> bool:
+        """True if an entry's audio (and sidecar, if it has one) is still on disk"""
+        if metadata is None:
+            return False
+        metadata_path = metadata.get('metadata_path')
+        return Path(metadata['file_path']).exists() and \
+            (metadata_path is None or Path(metadata_path).exists())
+
+    def link_recording(self, video_id: str, recording_id: Optional[str]):
+        """Record which DatasetManager recording was made from a download"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE downloads SET recording_id = ? WHERE video_id = ?",
+                (recording_id, video_id)
+            )
+
+    def migrate_sidecars(self, directory: str, remove: bool = False) -> int:
+        """
+        One-shot import of existing '*_metadata.json' sidecar files
+
+        Args:
+            directory: Directory the downloader wrote to
+            remove: Delete each sidecar once it is in the index
+
+        Returns:
+            Number of sidecars imported
+        """
+        items, sidecars = [], []
+        for sidecar in sorted(Path(directory).glob('*_metadata.json')):
+            with open(sidecar, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+            if 'video_id' not in metadata or 'file_path' not in metadata:
+                continue
+            items.append((metadata, None if remove else sidecar))
+            sidecars.append(sidecar)
+
+        count = self.put_many(items)
+        if remove:
+            for sidecar in sidecars:
+                sidecar.unlink()
+        return count
+
+    def sync_with_dataset(self, dataset_manager) -> Dict:
+        """
+        Link downloads to the DatasetManager recordings made from them
+
+        A download matches a recording with the same file path or, failing
+        that, the same sha256. Links to recordings that no longer exist
+        are cleared.
+
+        Returns:
+            Counts of linked and unlinked downloads and the IDs of
+            downloads with no recording in the dataset
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT video_id, file_path, sha256, recording_id FROM downloads"
+            ).fetchall()
+
+        updates, unlinked = [], []
+        for video_id, file_path, sha256, recording_id in rows:
+            if recording_id is not None and dataset_manager.get_recording(recording_id) is not None:
+                continue
+
+            matches = dataset_manager.get_recordings_by_file(file_path)
+            if not matches and sha256:
+                matches = dataset_manager.find_by_checksum(sha256)
+            new_id = matches[0]['recording_id'] if matches else None
+
+            if new_id is None:
+                unlinked.append(video_id)
+            if new_id != recording_id:
+                updates.append((new_id, video_id))
+
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "UPDATE downloads SET recording_id = ? WHERE video_id = ?", updates
+            )
+
+        return {
+            'linked': len(rows) - len(unlinked),
+            'unlinked': len(unlinked),
+            'unlinked_video_ids': unlinked
+        }
+
+    def remove(self, video_id: str):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM downloads WHERE video_id = ?", (video_id,))
+
+    def __contains__(self, video_id: str) -> bool:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT 1 FROM downloads WHERE video_id = ?", (video_id,)
+            ).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM downloads").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
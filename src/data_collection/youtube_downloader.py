@@ -1,24 +1,130 @@
-import yt_dlp
+try:
+    import yt_dlp
+except ImportError:
+    yt_dlp = None
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
 import json
 from datetime import datetime
 
+from .download_index import DownloadIndex
+from ..preprocessing.audio_probe import probe_audio_file
+from ..preprocessing.deduplication import Deduplicator
+
+# yt-dlp errors that no amount of retrying will fix
+PERMANENT_ERRORS = (
+    'Private video',
+    'Video unavailable',
+    'This video has been removed',
+    'Sign in to confirm your age',
+    'members-only',
+    'Unsupported URL',
+)
+
+
+class HostRateLimiter:
+    """
+    Spaces out requests to each host so concurrent workers stay under
+    `rate` requests per second per host; other hosts are not delayed
+    """
+    
+    def __init__(self, rate: float = 1.0):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot: Dict[str, float] = {}
+    
+    def wait(self, url: str):
+        host = urlparse(url).netloc.lower()
+        if host.startswith(('www.', 'm.')):
+            host = host.split('.', 1)[1]
+        if host == 'youtu.be':
+            host = 'youtube.com'
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
 
 class YouTubeAudioDownloader:
     """
     Download audio from YouTube videos with proper attribution tracking
     Ensures ethical data collection for Thai music research
+    
+    By default audio is stored analysis-ready: mono FLAC at the project's
+    22050 Hz target rate, about 4-8x smaller than full-rate stereo WAV, and
+    loaded by AudioProcessor without a resample step. The header facts
+    (sample rate, channels, duration) and checksum are kept in the
+    metadata as 'audio_info'.
+    
+    Every download's metadata is kept in one DownloadIndex catalogue
+    keyed by video_id (per-video '_metadata.json' sidecars are optional),
+    so batches can skip videos that are already on disk. With a
+    Deduplicator, each download is checked as soon as it lands:
+    byte-identical audio is deleted in favour of the existing copy, and
+    near duplicates (re-uploads of the same performance) are recorded in
+    the metadata.
     """
     
-    def __init__(self, output_dir: str = "data/raw"):
+    def __init__(self, output_dir: str = "data/raw",
+                 deduplicator: Optional[Deduplicator] = None,
+                 index: Optional[DownloadIndex] = None,
+                 ydl_factory: Optional[Callable] = None,
+                 audio_format: str = 'flac', sample_rate: Optional[int] = 22050,
+                 mono: bool = True, write_sidecars: bool = False):
+        """
+        Args:
+            output_dir: Directory for audio and metadata files
+            audio_format: Codec for FFmpegExtractAudio ('flac', 'wav', ...)
+            sample_rate: Resample to this rate while extracting; None keeps
+                the source rate
+            mono: Downmix to one channel while extracting
+            write_sidecars: Also write '<title>_<id>_metadata.json' next to
+                each download, as older versions did
+            deduplicator: Optional duplicate check for each download
+            index: Download catalogue (default: download_index.db in output_dir)
+            ydl_factory: Callable taking yt-dlp options and returning a
+                YoutubeDL-like context manager; defaults to yt_dlp.YoutubeDL
+                (a stand-in extractor can be injected for offline runs)
+        """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.deduplicator = deduplicator
+        self.index = index or DownloadIndex(str(self.output_dir / "download_index.db"))
+        self.ydl_factory = ydl_factory or self._default_ydl_factory
+        self.audio_format = audio_format
+        self.sample_rate = sample_rate
+        self.mono = mono
+        self.write_sidecars = write_sidecars
+    
+    @staticmethod
+    def _default_ydl_factory(ydl_opts: Dict):
+        if yt_dlp is None:
+            raise ImportError("yt-dlp is required for downloading: pip install yt-dlp")
+        return yt_dlp.YoutubeDL(ydl_opts)
+    
+    def _ffmpeg_args(self) -> List[str]:
+        args = []
+        if self.mono:
+            args += ['-ac', '1']
+        if self.sample_rate is not None:
+            args += ['-ar', str(self.sample_rate)]
+        if self.audio_format == 'flac':
+            # Web audio is lossy at source; 16-bit keeps every detail it has
+            args += ['-sample_fmt', 's16']
+        return args
     
     def download_audio(self, url: str, 
                       instrument: str,
                       technique: Optional[str] = None,
-                      attribution_notes: Optional[str] = None) -> Dict:
+                      attribution_notes: Optional[str] = None,
+                      quiet: bool = False) -> Dict:
         """
         Download audio from YouTube with metadata tracking
         
@@ -27,6 +133,7 @@ class YouTubeAudioDownloader:
             instrument: Instrument type (Phin, Khaen, etc.)
             technique: Playing technique/pattern (ลายพิณ)
             attribution_notes: Additional attribution information
+            quiet: Suppress yt-dlp's console output
         
         Returns:
             Dictionary with download info and file path
@@ -35,16 +142,18 @@ class YouTubeAudioDownloader:
             'format': 'bestaudio/best',
             'postprocessors': [{
                 'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'wav',
+                'preferredcodec': self.audio_format,
                 'preferredquality': '192',
             }],
+            'postprocessor_args': {'extractaudio': self._ffmpeg_args()},
             'outtmpl': str(self.output_dir / '%(title)s_%(id)s.%(ext)s'),
-            'quiet': False,
-            'no_warnings': False,
+            'quiet': quiet,
+            'noprogress': quiet,
+            'no_warnings': quiet,
         }
         
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            with self.ydl_factory(ydl_opts) as ydl:
                 info = ydl.extract_info(url, download=True)
                 
                 video_id = info['id']
@@ -54,7 +163,10 @@ class YouTubeAudioDownloader:
                 duration = info.get('duration', 0)
                 view_count = info.get('view_count', 0)
                 
-                audio_file = self.output_dir / f"{title}_{video_id}.wav"
+                requested = info.get('requested_downloads') or [{}]
+                audio_file = Path(requested[0].get('filepath') or
+                                  self.output_dir / f"{title}_{video_id}.{self.audio_format}")
+                audio_info = probe_audio_file(str(audio_file), checksum=True)
                 
                 metadata = {
                     'source': 'YouTube',
@@ -70,19 +182,40 @@ class YouTubeAudioDownloader:
                     'attribution_notes': attribution_notes,
                     'downloaded_at': datetime.now().isoformat(),
                     'file_path': str(audio_file),
+                    'audio_info': audio_info,
+                    'sha256': audio_info['sha256'],
                     'consent_status': 'Public YouTube video - Fair use for research',
                     'ethical_notes': 'Downloaded for educational and cultural preservation purposes'
                 }
                 
-                metadata_file = self.output_dir / f"{title}_{video_id}_metadata.json"
-                with open(metadata_file, 'w', encoding='utf-8') as f:
-                    json.dump(metadata, f, indent=2, ensure_ascii=False)
+                if self.deduplicator is not None:
+                    dedup = self.deduplicator.check(str(audio_file), sha256=audio_info['sha256'])
+                    if dedup['duplicate_of'] is not None:
+                        # Keep this upload's attribution, but only one copy of the audio
+                        audio_file.unlink()
+                        audio_file = Path(dedup['duplicate_of'])
+                        metadata['file_path'] = str(audio_file)
+                        metadata['duplicate_of'] = dedup['duplicate_of']
+                    if dedup['near_duplicates']:
+                        metadata['near_duplicates'] = dedup['near_duplicates']
+                
+                metadata_file = None
+                if self.write_sidecars:
+                    metadata_file = self.output_dir / f"{title}_{video_id}_metadata.json"
+                    with open(metadata_file, 'w', encoding='utf-8') as f:
+                        json.dump(metadata, f, indent=2, ensure_ascii=False)
+                self.index.put(metadata, metadata_file)
+                
+                message = f'Successfully downloaded: {title}'
+                if 'duplicate_of' in metadata:
+                    message = f'Duplicate of {audio_file.name}: {title}'
                 
                 return {
                     'success': True,
                     'file_path': str(audio_file),
                     'metadata': metadata,
-                    'message': f'Successfully downloaded: {title}'
+                    'duplicate': 'duplicate_of' in metadata,
+                    'message': message
                 }
         
         except Exception as e:
@@ -93,42 +226,117 @@ class YouTubeAudioDownloader:
                 'message': f'Failed to download: {str(e)}'
             }
     
-    def download_batch(self, video_list: list) -> list:
+    def download_video(self, video_info: Dict, rate_limiter: Optional[HostRateLimiter] = None,
+                       max_retries: int = 3, backoff: float = 2.0,
+                       skip_existing: bool = True) -> Dict:
         """
-        Download multiple videos in batch
+        Download one video_list entry with retries, or return its existing download
         
         Args:
-            video_list: List of dicts with 'url', 'instrument', 'technique', 'notes'
+            video_info: Dict with 'url', 'instrument', 'technique', 'notes'
+            rate_limiter: Shared per-host limiter when called from many threads
+            max_retries: Retries after transient failures
+            backoff: Base delay in seconds, doubled on every retry
+            skip_existing: Return the indexed download if its files still exist
         
         Returns:
-            List of download results
+            download_audio() result with 'skipped' and 'attempts' added
         """
-        results = []
+        url = video_info['url']
+        rate_limiter = rate_limiter or HostRateLimiter()
         
-        for i, video_info in enumerate(video_list, 1):
-            print(f"\n[{i}/{len(video_list)}] Processing: {video_info.get('url', 'Unknown URL')}")
-            
+        if skip_existing:
+            existing = self.index.find(url)
+            if self.index.is_complete(existing):
+                existing.pop('metadata_path', None)
+                return {
+                    'success': True,
+                    'skipped': True,
+                    'file_path': existing['file_path'],
+                    'metadata': existing,
+                    'duplicate': 'duplicate_of' in existing,
+                    'attempts': 0,
+                    'message': f"Already downloaded: {existing['title']}"
+                }
+        
+        for attempt in range(1, max_retries + 2):
+            rate_limiter.wait(url)
             result = self.download_audio(
-                url=video_info['url'],
+                url=url,
                 instrument=video_info.get('instrument', 'Unknown'),
                 technique=video_info.get('technique'),
-                attribution_notes=video_info.get('notes')
+                attribution_notes=video_info.get('notes'),
+                quiet=True
             )
+            result['attempts'] = attempt
+            result['skipped'] = False
             
-            results.append(result)
+            if result['success'] or attempt > max_retries or \
+                    any(marker in result['error'] for marker in PERMANENT_ERRORS):
+                return result
             
-            if result['success']:
-                print(f"  ✓ {result['message']}")
-            else:
-                print(f"  ✗ {result['message']}")
+            # Exponential backoff with jitter, so workers do not retry in lockstep
+            time.sleep(backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
         
-        success_count = sum(1 for r in results if r['success'])
-        print(f"\n{'='*60}")
-        print(f"Batch download complete: {success_count}/{len(video_list)} successful")
-        print(f"{'='*60}")
+        return result
+    
+    def download_batch(self, video_list: list, max_workers: int = 4,
+                       requests_per_second: float = 1.0, max_retries: int = 3,
+                       backoff: float = 2.0, skip_existing: bool = True,
+                       verbose: bool = True) -> list:
+        """
+        Download multiple videos concurrently
+        
+        Videos already in the download index (audio and metadata still on
+        disk) are skipped, so an interrupted batch resumes where it stopped.
+        
+        Args:
+            video_list: List of dicts with 'url', 'instrument', 'technique', 'notes'
+            max_workers: Concurrent downloads
+            requests_per_second: Request rate limit per host
+            max_retries: Retries per video after transient failures
+            backoff: Base delay in seconds, doubled on every retry
+            skip_existing: Skip videos that were already downloaded
+            verbose: Print a summary once the batch finishes
+        
+        Returns:
+            List of download results, in input order; each has 'skipped'
+            and 'attempts' besides the download_audio() fields
+        """
+        rate_limiter = HostRateLimiter(requests_per_second)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(
+                lambda video_info: self.download_video(
+                    video_info, rate_limiter, max_retries, backoff, skip_existing
+                ),
+                video_list
+            ))
+        
+        if verbose:
+            self._print_batch_summary(results)
         
         return results
     
+    @staticmethod
+    def _print_batch_summary(results: List[Dict]):
+        downloaded = [r for r in results if r['success'] and not r['skipped']]
+        skipped = [r for r in results if r.get('skipped')]
+        duplicates = [r for r in results if r.get('duplicate')]
+        failed = [r for r in results if not r['success']]
+        retried = sum(1 for r in results if r.get('attempts', 0) > 1)
+        
+        print(f"\n{'='*60}")
+        print(f"Batch download complete: {len(results) - len(failed)}/{len(results)} successful")
+        print(f"  Downloaded: {len(downloaded)}")
+        print(f"  Already present (skipped): {len(skipped)}")
+        print(f"  Duplicates of existing audio: {len(duplicates)}")
+        print(f"  Needed retries: {retried}")
+        print(f"  Failed: {len(failed)}")
+        for result in failed:
+            print(f"    ✗ {result['url']}: {result['error']}")
+        print(f"{'='*60}")
+    
     def get_video_info(self, url: str) -> Dict:
         """Get video information without downloading"""
         ydl_opts = {
@@ -137,7 +345,7 @@ class YouTubeAudioDownloader:
         }
         
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            with self.ydl_factory(ydl_opts) as ydl:
                 info = ydl.extract_info(url, download=False)
                 
                 return {
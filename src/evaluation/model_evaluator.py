@@ -1,11 +1,14 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.metrics import confusion_matrix, classification_report, roc_curve, auc
-from sklearn.preprocessing import label_binarize
 from typing import Dict, List
 import json
 
+from .._lazy import lazy_import
+
+# Plotting libraries cost seconds to import; only the plot_* methods need them
+plt = lazy_import('matplotlib.pyplot')
+sns = lazy_import('seaborn')
+sk_metrics = lazy_import('sklearn.metrics')
+
 
 class ModelEvaluator:
     def __init__(self):
@@ -13,8 +16,8 @@ class ModelEvaluator:
     
     def evaluate_predictions(self, y_true: np.ndarray, y_pred: np.ndarray, 
                            class_names: List[str]) -> Dict:
-        cm = confusion_matrix(y_true, y_pred)
-        report = classification_report(y_true, y_pred, target_names=class_names, output_dict=True)
+        cm = sk_metrics.confusion_matrix(y_true, y_pred)
+        report = sk_metrics.classification_report(y_true, y_pred, target_names=class_names, output_dict=True)
         
         self.evaluation_results = {
             'confusion_matrix': cm.tolist(),
@@ -0,0 +1,32 @@
+import os
+import numpy as np
+from pathlib import Path
+from typing import Optional
+
+FEATURE_CACHE_DIR = Path("data/features")
+# Bump when FeatureExtractor output changes so cached vectors are not reused
+FEATURE_CACHE_VERSION = 1
+
+
+def feature_cache_path(sha256: str, sr: int, segment_duration: float = 3.0,
+                       cache_dir: Path = FEATURE_CACHE_DIR) -> Path:
+    """
+    Cache file for one recording's per-segment feature matrix
+    Keyed by content hash, so renamed or moved files still hit the cache
+    """
+    return Path(cache_dir) / f"{sha256}_{sr}_{segment_duration:g}s_v{FEATURE_CACHE_VERSION}.npy"
+
+
+def load_cached_features(path: Path) -> Optional[np.ndarray]:
+    if not Path(path).exists():
+        return None
+    return np.load(path)
+
+
+def save_cached_features(path: Path, features: np.ndarray):
+    """Write via a temp file and rename, so a crash never leaves a truncated cache entry"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npy")
+    np.save(tmp_path, features)
+    os.replace(tmp_path, path)
@@ -1,11 +1,45 @@
 import numpy as np
 import librosa
-from typing import Dict
+from typing import Dict, List
 import warnings
 
 warnings.filterwarnings('ignore')
 
 
+class FeatureSet:
+    """
+    Output of FeatureExtractor.extract(): the per-group feature dicts
+    ('mfcc', 'chroma', 'spectral', 'temporal', 'pitch') together with the
+    flat vector the classifier consumes
+    
+    The vector concatenates every feature in sorted key order, expanding
+    array-valued features element by element, so it matches the layout
+    models were trained on.
+    """
+    
+    def __init__(self, groups: Dict[str, Dict]):
+        self.groups = groups
+        self.features: Dict = {}
+        for group in groups.values():
+            self.features.update(group)
+        
+        values, names = [], []
+        for key in sorted(self.features.keys()):
+            value = self.features[key]
+            if isinstance(value, np.ndarray):
+                values.extend(value.tolist())
+                names.extend(f"{key}_{i}" for i in range(len(value)))
+            else:
+                values.append(value)
+                names.append(key)
+        
+        self.vector = np.array(values)
+        self.names: List[str] = names
+    
+    def __getitem__(self, group: str) -> Dict:
+        return self.groups[group]
+
+
 class FeatureExtractor:
     def __init__(self, sr: int = 22050):
         self.sr = sr
@@ -55,7 +89,7 @@ class FeatureExtractor:
         
         return {
             'zero_crossing_rate': float(zcr / len(audio)),
-            'tempo': float(tempo),
+            'tempo': float(np.atleast_1d(tempo)[0]),
             'rms_mean': float(np.mean(rms)),
             'rms_std': float(np.std(rms)),
             'rms_max': float(np.max(rms))
@@ -86,54 +120,25 @@ class FeatureExtractor:
                 'pitch_min': 0.0
             }
     
+    def extract(self, audio: np.ndarray) -> FeatureSet:
+        """
+        Run every feature group once and keep the results inspectable
+        
+        Callers that also want to show individual groups (e.g. MFCCs or
+        spectral statistics in the app) read them from the returned
+        FeatureSet instead of recomputing them.
+        """
+        return FeatureSet({
+            'mfcc': self.extract_mfcc_features(audio),
+            'chroma': self.extract_chroma_features(audio),
+            'spectral': self.extract_spectral_features(audio),
+            'temporal': self.extract_temporal_features(audio),
+            'pitch': self.extract_pitch_features(audio)
+        })
+    
     def extract_all_features(self, audio: np.ndarray) -> np.ndarray:
-        feature_dict = {}
-        
-        mfcc = self.extract_mfcc_features(audio)
-        chroma = self.extract_chroma_features(audio)
-        spectral = self.extract_spectral_features(audio)
-        temporal = self.extract_temporal_features(audio)
-        pitch = self.extract_pitch_features(audio)
-        
-        feature_dict.update(mfcc)
-        feature_dict.update(chroma)
-        feature_dict.update(spectral)
-        feature_dict.update(temporal)
-        feature_dict.update(pitch)
-        
-        features = []
-        for key in sorted(feature_dict.keys()):
-            value = feature_dict[key]
-            if isinstance(value, np.ndarray):
-                features.extend(value.tolist())
-            else:
-                features.append(value)
-        
-        return np.array(features)
+        return self.extract(audio).vector
     
     def get_feature_names(self) -> list:
         dummy_audio = np.random.randn(self.sr * 3)
-        feature_dict = {}
-        
-        mfcc = self.extract_mfcc_features(dummy_audio)
-        chroma = self.extract_chroma_features(dummy_audio)
-        spectral = self.extract_spectral_features(dummy_audio)
-        temporal = self.extract_temporal_features(dummy_audio)
-        pitch = self.extract_pitch_features(dummy_audio)
-        
-        feature_dict.update(mfcc)
-        feature_dict.update(chroma)
-        feature_dict.update(spectral)
-        feature_dict.update(temporal)
-        feature_dict.update(pitch)
-        
-        feature_names = []
-        for key in sorted(feature_dict.keys()):
-            value = feature_dict[key]
-            if isinstance(value, np.ndarray):
-                for i in range(len(value)):
-                    feature_names.append(f"{key}_{i}")
-            else:
-                feature_names.append(key)
-        
-        return feature_names
+        return self.extract(dummy_audio).names
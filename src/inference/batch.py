@@ -0,0 +1,232 @@
+import io
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from .._lazy import lazy_import
+from ..features.feature_extractor import FeatureExtractor
+from ..models.classifier import InstrumentClassifier
+from ..preprocessing.audio_processor import AudioProcessor
+from .cache import PredictionCache, content_hash
+from .warmup import warmup
+
+pd = lazy_import('pandas')
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.flac', '.ogg')
+
+# Per-process decoder and extractor, created once by _init_worker
+_worker_processor: Optional[AudioProcessor] = None
+_worker_extractor: Optional[FeatureExtractor] = None
+
+
+def _init_worker(sr: int):
+    global _worker_processor, _worker_extractor
+    _worker_processor = AudioProcessor(target_sr=sr)
+    _worker_extractor = FeatureExtractor(sr=sr)
+    # Compile librosa's numba kernels now rather than during the first file
+    warmup(sr, processor=_worker_processor, extractor=_worker_extractor, transcribe=False)
+
+
+def _analyze_file(name: str, source: Union[str, bytes]) -> Dict:
+    """Decode and featurize one file (runs in a worker process)"""
+    started = time.perf_counter()
+    result = {'name': name}
+    try:
+        audio, sr, quality = _worker_processor.preprocess_audio(source, suffix=Path(name).suffix)
+        result['decode_seconds'] = time.perf_counter() - started
+        if not quality['is_valid']:
+            raise ValueError(f"Quality check failed: {quality.get('reason', 'Unknown')}")
+        
+        result['duration'] = quality['duration']
+        result['features'] = _worker_extractor.extract_all_features(audio)
+        result['features_seconds'] = time.perf_counter() - started - result['decode_seconds']
+    except Exception as e:
+        result['error'] = str(e)
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+def find_audio_files(directory: str, recursive: bool = True) -> List[Path]:
+    """Audio files under a server-side directory, in path order"""
+    directory = Path(directory)
+    if not directory.is_dir():
+        raise ValueError(f"Not a directory: {directory}")
+    pattern = '**/*' if recursive else '*'
+    return sorted(
+        path for path in directory.glob(pattern)
+        if path.is_file() and path.suffix.lower() in AUDIO_EXTENSIONS
+    )
+
+
+class BatchClassificationJob:
+    """
+    Classifies many files in the background
+    
+    Decoding and feature extraction run on a process pool; a coordinator
+    thread predicts each file with the shared classifier as soon as its
+    features arrive, so results stream in while the rest are processed.
+    The caller (e.g. a Streamlit fragment rerun every second) polls
+    progress() and to_dataframe() without ever blocking on the pool.
+    """
+    
+    def __init__(self, classifier: InstrumentClassifier, sources: Iterable[Tuple[str, Union[str, bytes]]],
+                 sr: int = 22050, max_workers: Optional[int] = None,
+                 cache: Optional[PredictionCache] = None, model_version: Optional[str] = None):
+        """
+        Args:
+            classifier: Trained classifier (predictions run in this process)
+            sources: (name, path or encoded bytes) pairs
+            sr: Sample rate the classifier's features were extracted at
+            max_workers: Worker processes (default: one per CPU)
+            cache: Files classified before by the same model are taken from here
+            model_version: Version of classifier, part of the cache key
+        """
+        self.classifier = classifier
+        self.sources = list(sources)
+        self.sr = sr
+        self.max_workers = max_workers
+        self.cache = cache
+        self.model_version = model_version
+        self.results: List[Dict] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    @classmethod
+    def from_directory(cls, classifier: InstrumentClassifier, directory: str,
+                       recursive: bool = True, **kwargs) -> 'BatchClassificationJob':
+        files = find_audio_files(directory, recursive)
+        return cls(classifier, [(str(path), str(path)) for path in files], **kwargs)
+    
+    def start(self) -> 'BatchClassificationJob':
+        if self._thread is not None:
+            raise ValueError("Job already started")
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+    
+    def cancel(self):
+        """Stop submitting further files; files already being processed still finish"""
+        self._cancelled.set()
+    
+    def _add_cached(self, name: str, sha256: Optional[str]) -> bool:
+        """Record a file's cached result; False if there is none"""
+        cached = self.cache.get(sha256, self.model_version) if sha256 else None
+        if cached is None:
+            return False
+        row = {
+            'file': name,
+            'predicted_instrument': cached['predicted_instrument'],
+            'confidence': cached['confidence'],
+            'duration': cached.get('duration'),
+            'processing_seconds': 0.0,
+            'error': None,
+            'cached': True
+        }
+        for instrument, prob in cached['all_probabilities'].items():
+            row[f"p_{instrument}"] = prob
+        with self._lock:
+            self.results.append(row)
+        return True
+    
+    def _run(self):
+        try:
+            to_analyze = []
+            for name, source in self.sources:
+                if self._cancelled.is_set():
+                    return
+                sha256 = None
+                if self.cache is not None:
+                    try:
+                        sha256 = content_hash(source)
+                    except OSError:
+                        pass  # Unreadable; the worker reports the error
+                    if self._add_cached(name, sha256):
+                        continue
+                to_analyze.append((name, source, sha256))
+            if not to_analyze:
+                return
+            
+            with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                     initargs=(self.sr,)) as pool:
+                futures = {
+                    pool.submit(_analyze_file, name, source): sha256
+                    for name, source, sha256 in to_analyze
+                }
+                for future in as_completed(futures):
+                    if self._cancelled.is_set():
+                        for pending in futures:
+                            pending.cancel()
+                    if future.cancelled():
+                        continue
+                    self._add_result(future.result(), futures[future])
+        finally:
+            self.finished_at = time.time()
+    
+    def _add_result(self, analysis: Dict, sha256: Optional[str] = None):
+        row = {
+            'file': analysis['name'],
+            'predicted_instrument': None,
+            'confidence': None,
+            'duration': analysis.get('duration'),
+            'processing_seconds': round(analysis['seconds'], 3),
+            'error': analysis.get('error'),
+            'cached': False
+        }
+        if 'features' in analysis:
+            try:
+                prediction = self.classifier.predict_single(analysis['features'])
+                row['predicted_instrument'] = prediction['predicted_instrument']
+                row['confidence'] = prediction['confidence']
+                for instrument, prob in prediction['all_probabilities'].items():
+                    row[f"p_{instrument}"] = prob
+                if self.cache is not None and sha256:
+                    self.cache.put(sha256, self.model_version,
+                                   dict(prediction, duration=row['duration']))
+            except Exception as e:
+                row['error'] = str(e)
+        with self._lock:
+            self.results.append(row)
+    
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+    
+    def wait(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+    
+    def progress(self) -> Dict:
+        with self._lock:
+            completed = len(self.results)
+            failed = sum(1 for row in self.results if row['error'])
+            cached = sum(1 for row in self.results if row['cached'])
+        elapsed = ((self.finished_at or time.time()) - self.started_at) if self.started_at else 0.0
+        return {
+            'total': len(self.sources),
+            'completed': completed,
+            'failed': failed,
+            'cached': cached,
+            'elapsed_seconds': elapsed,
+            'files_per_second': completed / elapsed if elapsed > 0 else 0.0,
+            'done': self.done
+        }
+    
+    def to_dataframe(self) -> 'pd.DataFrame':
+        with self._lock:
+            rows = list(self.results)
+        return pd.DataFrame(rows)
+    
+    def to_csv(self) -> bytes:
+        return self.to_dataframe().to_csv(index=False).encode('utf-8')
+    
+    def to_parquet(self) -> bytes:
+        """Parquet export; needs pyarrow or fastparquet"""
+        buffer = io.BytesIO()
+        self.to_dataframe().to_parquet(buffer, index=False)
+        return buffer.getvalue()
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from ..features.feature_cache import FEATURE_CACHE_VERSION
+from ..models.storage import atomic_write_text
+
+
+def content_hash(source: Union[str, Path, bytes]) -> str:
+    """sha256 of encoded audio bytes, or of a file's contents"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(source).hexdigest()
+    digest = hashlib.sha256()
+    with open(source, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """
+    Classification results keyed by audio content, so repeated clips skip
+    decoding, feature extraction and prediction
+
+    An in-memory LRU of at most max_entries results, optionally backed by
+    JSON files under cache_dir (kept below max_disk_bytes, least recently
+    used first out) that survive restarts and are shared between
+    processes. A key is the audio's sha256 plus the model version and
+    the extractor configuration (sample rate, segment length, feature
+    version), and a 'variant' naming the kind of result (whole file,
+    timeline). Results of one model are never returned for another, since
+    the version is part of every key. The first time a new version is
+    seen, the memory entries of the versions before it are dropped; while
+    a swap is in progress, requests still on the old model keep working
+    without clearing the new model's entries. Disk entries of other
+    versions age out through the size bound (processes sharing cache_dir
+    may briefly serve different versions, e.g. during a rollout). Safe to
+    share between threads.
+    """
+
+    def __init__(self, max_entries: int = 1024, cache_dir: Optional[str] = None,
+                 max_disk_bytes: int = 256 * 1024 * 1024, sr: int = 22050,
+                 segment_duration: float = 3.0):
+        """
+        Args:
+            max_entries: Results kept in memory
+            cache_dir: Directory for the on-disk layer (default: memory only)
+            max_disk_bytes: Size bound of the on-disk layer
+            sr: Sample rate features are extracted at
+            segment_duration: Segment length of timeline results (seconds)
+        """
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_disk_bytes = max_disk_bytes
+        self.config = f"{sr}_{segment_duration:g}s_v{FEATURE_CACHE_VERSION}"
+        self.model_version: Optional[str] = None
+        self._seen_versions = set()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(path.stat().st_size for path in self.cache_dir.glob('*/*.json'))
+
+    def _version_dir(self, model_version: str) -> Path:
+        # Version names come from the registry, but keep them path-safe regardless
+        safe = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in model_version)
+        return self.cache_dir / safe
+
+    def _disk_path(self, model_version: str, sha256: str, variant: str) -> Path:
+        suffix = f"_{variant}" if variant else ""
+        return self._version_dir(model_version) / f"{sha256}_{self.config}{suffix}.json"
+
+    def _use_version(self, model_version: str):
+        """On a version's first appearance, drop other versions' memory entries (lock held)"""
+        if model_version in self._seen_versions:
+            return
+        if self._seen_versions:
+            self.invalidations += 1
+            for key in [key for key in self._entries if key[0] != model_version]:
+                del self._entries[key]
+        self._seen_versions.add(model_version)
+        self.model_version = model_version
+
+    def get(self, sha256: str, model_version: Optional[str], variant: str = "") -> Optional[Dict]:
+        """Cached result for this audio under this model, or None"""
+        model_version = model_version or 'unversioned'
+        with self._lock:
+            self._use_version(model_version)
+            key = (model_version, sha256, variant)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(self._entries[key])
+
+            if self.cache_dir is not None:
+                path = self._disk_path(model_version, sha256, variant)
+                try:
+                    result = json.loads(path.read_text(encoding='utf-8'))
+                    os.utime(path)
+                except (OSError, ValueError):
+                    result = None
+                if result is not None:
+                    self._remember(key, result)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return dict(result)
+
+            self.misses += 1
+            return None
+
+    def put(self, sha256: str, model_version: Optional[str], result: Dict, variant: str = ""):
+        """Store a JSON-serializable result"""
+        model_version = model_version or 'unversioned'
+        with self._lock:
+            self._use_version(model_version)
+            self._remember((model_version, sha256, variant), dict(result))
+
+            if self.cache_dir is not None:
+                path = self._disk_path(model_version, sha256, variant)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                previous = path.stat().st_size if path.exists() else 0
+                atomic_write_text(path, json.dumps(result, ensure_ascii=False))
+                self._disk_bytes += path.stat().st_size - previous
+                if self._disk_bytes > self.max_disk_bytes:
+                    self._evict_disk()
+
+    def _remember(self, key, result: Dict):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _evict_disk(self):
+        """Delete least recently used files until below 90% of the bound (lock held)"""
+        files = sorted(self.cache_dir.glob('*/*.json'), key=lambda path: path.stat().st_mtime)
+        self._disk_bytes = sum(path.stat().st_size for path in files)
+        for path in files:
+            if self._disk_bytes <= 0.9 * self.max_disk_bytes:
+                break
+            size = path.stat().st_size
+            path.unlink(missing_ok=True)
+            self._disk_bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self.cache_dir is not None:
+                shutil.rmtree(self.cache_dir, ignore_errors=True)
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                self._disk_bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'disk_bytes': self._disk_bytes if self.cache_dir is not None else None,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'model_version': self.model_version
+            }
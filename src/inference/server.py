@@ -0,0 +1,436 @@
+import base64
+import json
+import os
+import queue
+import threading
+import time
+import numpy as np
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from .batch import _analyze_file, _init_worker
+from .cache import PredictionCache, content_hash
+from .warmup import synthetic_wav
+from ..models.classifier import InstrumentClassifier
+
+STAGES = ('decode', 'features', 'queue', 'predict', 'total')
+
+MAX_BODY_BYTES = 50 * 1024 * 1024
+
+
+class ServiceBusy(RuntimeError):
+    """Raised when the service already holds its maximum of in-flight requests"""
+
+
+class ServiceMetrics:
+    """
+    Request counters plus recent latencies per stage (in milliseconds)
+
+    Percentiles are taken over the last `window` requests, so they follow
+    the current load rather than the whole uptime.
+    """
+
+    def __init__(self, window: int = 10000):
+        self.started_at = time.time()
+        self.requests = 0
+        self.completed = 0
+        self.errors = 0
+        self.rejected = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.latencies = {stage: deque(maxlen=window) for stage in STAGES}
+        self.completed_at = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def count(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def record_request(self, timings: Dict[str, float]):
+        with self._lock:
+            self.completed += 1
+            self.completed_at.append(time.time())
+            for stage, ms in timings.items():
+                self.latencies[stage].append(ms)
+
+    def record_batch(self, size: int):
+        with self._lock:
+            self.batches += 1
+            self.batched_requests += size
+
+    def snapshot(self, in_flight: int = 0) -> Dict:
+        with self._lock:
+            now = time.time()
+            recent = [t for t in self.completed_at if now - t <= 10.0]
+            latency = {}
+            for stage, values in self.latencies.items():
+                if values:
+                    p50, p95, p99 = np.percentile(np.fromiter(values, float), [50, 95, 99])
+                    latency[stage] = {'p50': round(p50, 2), 'p95': round(p95, 2),
+                                      'p99': round(p99, 2), 'mean': round(float(np.mean(values)), 2)}
+            return {
+                'uptime_seconds': round(now - self.started_at, 1),
+                'requests': self.requests,
+                'completed': self.completed,
+                'errors': self.errors,
+                'rejected': self.rejected,
+                'in_flight': in_flight,
+                'throughput_rps': round(len(recent) / 10.0, 2),
+                'batches': self.batches,
+                'mean_batch_size': round(self.batched_requests / self.batches, 2) if self.batches else 0.0,
+                'latency_ms': latency
+            }
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent predictions into batched classifier calls
+
+    A single thread takes the first waiting request, then keeps collecting
+    until max_batch_size requests are gathered or max_wait_ms has passed,
+    and runs one predict_batch() for all of them. Under load this turns
+    many small calls into few large ones; when idle a request waits at
+    most max_wait_ms.
+    """
+
+    def __init__(self, classifier: InstrumentClassifier, metrics: ServiceMetrics,
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0, queue_size: int = 1024,
+                 model_version: Optional[str] = None):
+        # One attribute, so a swap replaces classifier and version together
+        self.model = (classifier, model_version)
+        self.metrics = metrics
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, daemon=True, name="micro-batcher")
+        self._thread.start()
+
+    def submit(self, features: np.ndarray) -> Future:
+        future: Future = Future()
+        self._queue.put((features, future, time.perf_counter()))
+        return future
+
+    def _collect(self) -> List:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            # Read once per batch, so a model swapped in meanwhile applies to
+            # whole batches and requests already being predicted finish on the old one
+            classifier, model_version = self.model
+            try:
+                predictions = classifier.predict_batch(np.array([features for features, _, _ in batch]))
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            predict_ms = (time.perf_counter() - started) * 1000
+            self.metrics.record_batch(len(batch))
+
+            for (_, future, queued_at), prediction in zip(batch, predictions):
+                prediction['batch_size'] = len(batch)
+                prediction['model_version'] = model_version
+                prediction['queue_ms'] = (started - queued_at) * 1000
+                prediction['predict_ms'] = predict_ms
+                future.set_result(prediction)
+
+
+class InferenceService:
+    """
+    Headless classification: decode and feature extraction on a process
+    pool, predictions through a MicroBatcher
+
+    At most max_pending requests are in flight; further ones are rejected
+    with ServiceBusy straight away instead of queueing without bound, so
+    callers see backpressure (HTTP 503) rather than growing latency.
+    """
+
+    def __init__(self, classifier: InstrumentClassifier, sr: int = 22050,
+                 workers: Optional[int] = None, max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0, max_pending: int = 64,
+                 model_version: Optional[str] = None,
+                 cache: Optional[PredictionCache] = None):
+        """
+        Args:
+            classifier: Trained classifier
+            sr: Sample rate the classifier's features were extracted at
+            workers: Decode/feature worker processes (default: one per CPU)
+            max_batch_size: Most requests combined into one predict call
+            max_wait_ms: Longest a request waits for others to batch with
+            max_pending: Most requests admitted at once
+            model_version: Registry version of the classifier, reported per result
+            cache: Results for clips seen before are returned from here
+        """
+        self.sr = sr
+        self.cache = cache
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.metrics = ServiceMetrics()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                        initargs=(sr,))
+        self.batcher = MicroBatcher(classifier, self.metrics, max_batch_size, max_wait_ms,
+                                    model_version=model_version)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+
+    @property
+    def classifier(self) -> InstrumentClassifier:
+        return self.batcher.model[0]
+
+    @property
+    def model_version(self) -> Optional[str]:
+        return self.batcher.model[1]
+
+    def swap_model(self, classifier: InstrumentClassifier, model_version: Optional[str] = None):
+        """Serve a new model from the next batch on, without dropping requests"""
+        self.batcher.model = (classifier, model_version)
+
+    def _admit(self):
+        self.metrics.count('requests')
+        if not self._slots.acquire(blocking=False):
+            self.metrics.count('rejected')
+            raise ServiceBusy(f"Server busy: {self.max_pending} requests already in flight")
+        with self._in_flight_lock:
+            self._in_flight += 1
+
+    def _release(self):
+        with self._in_flight_lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def classify(self, data, filename: str = "upload") -> Dict:
+        """
+        Classify one clip
+
+        Args:
+            data: Encoded audio bytes, or a path readable by the server
+            filename: Name whose extension hints the codec for in-memory data
+
+        Returns:
+            predict_single()-style result plus 'batch_size', 'model_version',
+            'duration', 'cached' and per-stage 'timings_ms' (decode, features,
+            queue, predict, total; only total for a cache hit)
+        """
+        started = time.perf_counter()
+        self._admit()
+        try:
+            sha256 = None
+            if self.cache is not None:
+                try:
+                    sha256 = content_hash(data)
+                except OSError as e:
+                    raise ValueError(f"Cannot read {data}: {e}")
+                model_version = self.model_version
+                cached = self.cache.get(sha256, model_version)
+                if cached is not None:
+                    timings = {'total': (time.perf_counter() - started) * 1000}
+                    self.metrics.record_request(timings)
+                    cached.update(batch_size=0, model_version=model_version, cached=True,
+                                  timings_ms={'total': round(timings['total'], 2)})
+                    return cached
+
+            analysis = self.pool.submit(_analyze_file, filename, data).result()
+            if 'error' in analysis:
+                raise ValueError(analysis['error'])
+
+            prediction = self.batcher.submit(analysis['features']).result()
+            timings = {
+                'decode': analysis['decode_seconds'] * 1000,
+                'features': analysis['features_seconds'] * 1000,
+                'queue': prediction.pop('queue_ms'),
+                'predict': prediction.pop('predict_ms'),
+                'total': (time.perf_counter() - started) * 1000
+            }
+            self.metrics.record_request(timings)
+            prediction['duration'] = analysis['duration']
+            if self.cache is not None:
+                # Stored under the version that actually predicted it
+                self.cache.put(sha256, prediction['model_version'], {
+                    key: prediction[key] for key in
+                    ('predicted_instrument', 'confidence', 'all_probabilities', 'duration')
+                })
+            prediction['cached'] = False
+            prediction['timings_ms'] = {stage: round(ms, 2) for stage, ms in timings.items()}
+            return prediction
+        except Exception:
+            self.metrics.count('errors')
+            raise
+        finally:
+            self._release()
+
+    def warmup(self) -> Dict[str, float]:
+        """
+        Start and warm every worker process before serving
+
+        The pool starts processes on demand and each one spends seconds
+        in _init_worker compiling numba kernels, so without this the first
+        requests after startup are slow. One synthetic clip per worker is
+        submitted at once (forcing all of them to start), then a prediction
+        warms the batcher. Not counted in the metrics.
+
+        Returns:
+            Seconds for the workers, the prediction and in 'total'
+        """
+        started = time.perf_counter()
+        clip = synthetic_wav(self.sr)
+        futures = [self.pool.submit(_analyze_file, 'warmup.wav', clip) for _ in range(self.workers)]
+        analyses = [future.result() for future in futures]
+        errors = [analysis['error'] for analysis in analyses if 'error' in analysis]
+        if errors:
+            raise RuntimeError(f"Warmup failed: {errors[0]}")
+        workers_seconds = time.perf_counter() - started
+
+        self.batcher.submit(analyses[0]['features']).result()
+        return {
+            'workers': workers_seconds,
+            'predict': time.perf_counter() - started - workers_seconds,
+            'total': time.perf_counter() - started
+        }
+
+    def stats(self) -> Dict:
+        return dict(self.metrics.snapshot(in_flight=self._in_flight),
+                    model_version=self.model_version,
+                    cache=self.cache.stats() if self.cache is not None else None)
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+
+def resolve_data_path(data_root: Path, path: str) -> str:
+    """
+    A client-supplied path, relative to data_root, as an absolute path
+
+    Raises PermissionError for anything resolving outside data_root
+    (absolute paths, '..', symlinks pointing out).
+    """
+    root = data_root.resolve()
+    resolved = (root / path).resolve()
+    if not resolved.is_relative_to(root):
+        raise PermissionError(f"Path is outside the data root: {path}")
+    return str(resolved)
+
+
+def make_handler(service: InferenceService, data_root: Optional[str] = None,
+                 max_body_bytes: int = MAX_BODY_BYTES):
+    """
+    HTTP handler class bound to a service:
+
+    - POST /classify: raw audio bytes as the body (?filename=clip.mp3 hints
+      the codec), or JSON {"audio_base64": ..., "filename": ...}; with a
+      data_root also JSON {"path": ...} for files under that directory
+    - GET /metrics: ServiceMetrics snapshot
+    - GET /health: liveness
+
+    Bodies over max_body_bytes are refused with 413 without being read.
+    """
+    data_root = Path(data_root) if data_root else None
+
+    class InferenceRequestHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status: int, payload: Dict, headers: Optional[Dict] = None):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path == '/metrics':
+                self._send_json(200, service.stats())
+            elif path == '/health':
+                self._send_json(200, {'status': 'ok'})
+            else:
+                self._send_json(404, {'error': f"Unknown endpoint: {path}"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != '/classify':
+                self._send_json(404, {'error': f"Unknown endpoint: {url.path}"})
+                return
+
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+            except ValueError:
+                length = -1
+            # Refused bodies are left unread, so the connection cannot be reused
+            if length < 0:
+                self.close_connection = True
+                self._send_json(400, {'error': "Invalid Content-Length"}, {'Connection': 'close'})
+                return
+            if length > max_body_bytes:
+                self.close_connection = True
+                self._send_json(413, {'error': f"Request body over {max_body_bytes} bytes"},
+                                {'Connection': 'close'})
+                return
+
+            body = self.rfile.read(length)
+            filename = parse_qs(url.query).get('filename', ['upload'])[0]
+            try:
+                if self.headers.get('Content-Type', '').startswith('application/json'):
+                    request = json.loads(body)
+                    if 'path' in request:
+                        if data_root is None:
+                            raise PermissionError("Path requests are disabled on this server")
+                        data = resolve_data_path(data_root, str(request['path']))
+                        filename = Path(data).name
+                    elif 'audio_base64' in request:
+                        data = base64.b64decode(request['audio_base64'])
+                        filename = request.get('filename', filename)
+                    else:
+                        raise ValueError("JSON body needs 'path' or 'audio_base64'")
+                else:
+                    data = body
+                if not data:
+                    raise ValueError("Empty request body")
+
+                self._send_json(200, service.classify(data, filename))
+            except ServiceBusy as e:
+                self._send_json(503, {'error': str(e)}, {'Retry-After': '1'})
+            except PermissionError as e:
+                self._send_json(403, {'error': str(e)})
+            except ValueError as e:
+                self._send_json(400, {'error': str(e)})
+            except Exception as e:
+                self._send_json(500, {'error': str(e)})
+
+        def log_message(self, format, *args):
+            # Per-request lines would dominate the log at tens of requests per second
+            pass
+
+    return InferenceRequestHandler
+
+
+def serve(service: InferenceService, host: str = "127.0.0.1", port: int = 8000,
+          data_root: Optional[str] = None,
+          max_body_bytes: int = MAX_BODY_BYTES) -> ThreadingHTTPServer:
+    """
+    Create a threaded HTTP server for the service (call serve_forever() on it)
+
+    JSON {"path": ...} requests are only accepted when data_root is given,
+    and only for files under it.
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(service, data_root, max_body_bytes))
+    server.daemon_threads = True
+    return server
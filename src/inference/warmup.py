@@ -0,0 +1,75 @@
+import io
+import time
+import numpy as np
+import soundfile as sf
+from typing import Dict, Optional
+
+from ..features.feature_extractor import FeatureExtractor
+from ..models.classifier import InstrumentClassifier
+from ..preprocessing.audio_processor import AudioProcessor
+from ..transcription.music_transcriber import MusicTranscriber
+
+
+def synthetic_clip(sr: int = 22050, duration: float = 1.0) -> np.ndarray:
+    """A short plucked tone with a few harmonics and a second onset"""
+    t = np.arange(int(sr * duration)) / sr
+    clip = sum(np.sin(2 * np.pi * 220.0 * k * t) / k for k in range(1, 5))
+    envelope = np.exp(-4.0 * (t % (duration / 2)))
+    return (0.3 * clip * envelope).astype(np.float32)
+
+
+def synthetic_wav(sr: int = 22050, duration: float = 1.0) -> bytes:
+    """synthetic_clip() encoded as WAV bytes, as an upload would arrive"""
+    buffer = io.BytesIO()
+    sf.write(buffer, synthetic_clip(sr, duration), sr, format='WAV')
+    return buffer.getvalue()
+
+
+def warmup(sr: int = 22050, classifier: Optional[InstrumentClassifier] = None,
+           processor: Optional[AudioProcessor] = None,
+           extractor: Optional[FeatureExtractor] = None,
+           transcribe: bool = True) -> Dict[str, float]:
+    """
+    Run every request stage once on a synthetic clip
+
+    The first decode, feature extraction and transcription in a process
+    pay for librosa's numba JIT compilation and lazily imported modules
+    (several seconds in total); doing it at startup keeps that cost off
+    the first real request.
+
+    Args:
+        sr: Sample rate to warm up at
+        classifier: Also run one prediction if given (must be trained)
+        processor: Decoder to warm (default: a new AudioProcessor)
+        extractor: Extractor to warm (default: a new FeatureExtractor)
+        transcribe: Also warm onset and pitch detection
+
+    Returns:
+        Seconds spent per stage plus 'total'
+    """
+    processor = processor or AudioProcessor(target_sr=sr)
+    extractor = extractor or FeatureExtractor(sr=sr)
+
+    data = synthetic_wav(sr)
+    timings = {}
+    started = time.perf_counter()
+
+    audio, _, _ = processor.preprocess_audio(data, suffix='.wav')
+    timings['decode'] = time.perf_counter() - started
+
+    stage_started = time.perf_counter()
+    features = extractor.extract_all_features(audio)
+    timings['features'] = time.perf_counter() - stage_started
+
+    if transcribe:
+        stage_started = time.perf_counter()
+        MusicTranscriber(sr=sr).transcribe(audio)
+        timings['transcription'] = time.perf_counter() - stage_started
+
+    if classifier is not None and classifier.is_trained:
+        stage_started = time.perf_counter()
+        classifier.predict_single(features)
+        timings['predict'] = time.perf_counter() - stage_started
+
+    timings['total'] = time.perf_counter() - started
+    return timings
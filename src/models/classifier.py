@@ -1,13 +1,17 @@
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 import joblib
 from pathlib import Path
 from typing import Tuple, Dict, Optional
 import json
 
+from .._lazy import lazy_import
+
+# Only train() needs these; inference-only processes never import them
+model_selection = lazy_import('sklearn.model_selection')
+sk_metrics = lazy_import('sklearn.metrics')
+
 
 class InstrumentClassifier:
     def __init__(self, n_estimators: int = 100, random_state: int = 42):
@@ -26,7 +30,7 @@ class InstrumentClassifier:
     def train(self, X: np.ndarray, y: np.ndarray, validation_split: float = 0.2) -> Dict:
         y_encoded = self.label_encoder.fit_transform(y)
         
-        X_train, X_val, y_train, y_val = train_test_split(
+        X_train, X_val, y_train, y_val = model_selection.train_test_split(
             X, y_encoded, test_size=validation_split, random_state=42, stratify=y_encoded
         )
         
@@ -38,18 +42,18 @@ class InstrumentClassifier:
         train_pred = self.model.predict(X_train)
         val_pred = self.model.predict(X_val)
         
-        train_accuracy = accuracy_score(y_train, train_pred)
-        val_accuracy = accuracy_score(y_val, val_pred)
+        train_accuracy = sk_metrics.accuracy_score(y_train, train_pred)
+        val_accuracy = sk_metrics.accuracy_score(y_val, val_pred)
         
-        cv_scores = cross_val_score(self.model, X, y_encoded, cv=5)
+        cv_scores = model_selection.cross_val_score(self.model, X, y_encoded, cv=5)
         
         results = {
             'train_accuracy': float(train_accuracy),
             'validation_accuracy': float(val_accuracy),
             'cv_mean': float(np.mean(cv_scores)),
             'cv_std': float(np.std(cv_scores)),
-            'confusion_matrix': confusion_matrix(y_val, val_pred).tolist(),
-            'classification_report': classification_report(
+            'confusion_matrix': sk_metrics.confusion_matrix(y_val, val_pred).tolist(),
+            'classification_report': sk_metrics.classification_report(
                 y_val, val_pred, target_names=self.label_encoder.classes_, output_dict=True
             )
         }
@@ -71,18 +75,126 @@ class InstrumentClassifier:
         if features.ndim == 1:
             features = features.reshape(1, -1)
         
-        labels, probabilities = self.predict(features)
-        
-        result = {
-            'predicted_instrument': labels[0],
-            'confidence': float(np.max(probabilities[0])),
-            'all_probabilities': {
-                instrument: float(prob) 
-                for instrument, prob in zip(self.label_encoder.classes_, probabilities[0])
+        return self.predict_batch(features[:1])[0]
+    
+    def predict_batch(self, X: np.ndarray) -> list:
+        """predict_single()-style results for every row of X, in one predict call"""
+        labels, probabilities = self.predict(X)
+        
+        return [
+            {
+                'predicted_instrument': label,
+                'confidence': float(np.max(probs)),
+                'all_probabilities': {
+                    instrument: float(prob) 
+                    for instrument, prob in zip(self.label_encoder.classes_, probs)
+                }
             }
+            for label, probs in zip(labels, probabilities)
+        ]
+    
+    @staticmethod
+    def _spread_order(n: int) -> list:
+        """
+        Window indices ordered coarse-to-fine (0, n/2, n/4, 3n/4, ...), so
+        any prefix samples the whole recording rather than its opening
+        """
+        order, seen = [], set()
+        stride = 1
+        while stride * 2 < n:
+            stride *= 2
+        while stride >= 1:
+            for i in range(0, n, stride):
+                if i not in seen:
+                    seen.add(i)
+                    order.append(i)
+            stride //= 2
+        return order
+    
+    def predict_timeline(self, segments: list, extractor, hop_seconds: float,
+                         batch_size: int = 8, early_exit: bool = True,
+                         confidence_threshold: float = 0.9, min_windows: int = 8,
+                         order: str = 'spread') -> Dict:
+        """
+        Classify a recording window by window (segments from
+        AudioProcessor.extract_segments, i.e. what the model was trained on)
+        
+        Windows are featurized and predicted in batches, and the recording's
+        label comes from averaging their class probabilities. With early_exit
+        the run stops once the running average is confident, so a long file
+        can be labelled from a few windows.
+        
+        Args:
+            segments: Equal-length audio windows in time order
+            extractor: FeatureExtractor used at training time
+            hop_seconds: Time between window starts
+            batch_size: Windows featurized per predict() call
+            early_exit: Stop once the averaged posterior reaches confidence_threshold
+            confidence_threshold: Top averaged probability needed to stop early
+            min_windows: Windows to analyze before early exit is considered
+            order: 'spread' analyzes windows coarse-to-fine across the whole
+                recording; 'sequential' from the start
+        
+        Returns:
+            predict_single()-style result for the whole recording plus
+            'windows' (analyzed windows in time order, each with 'start',
+            'end', 'predicted_instrument', 'confidence', 'all_probabilities'),
+            'windows_analyzed', 'windows_total' and 'stopped_early'
+        """
+        if not self.is_trained:
+            raise ValueError("Model has not been trained yet")
+        if len(segments) == 0:
+            raise ValueError("No segments to classify")
+        if order not in ('spread', 'sequential'):
+            raise ValueError(f"Unknown window order: {order}")
+        
+        n_windows = len(segments)
+        indices = self._spread_order(n_windows) if order == 'spread' else list(range(n_windows))
+        classes = self.label_encoder.classes_
+        
+        probability_sum = np.zeros(len(classes))
+        windows = []
+        stopped_early = False
+        
+        for batch_start in range(0, n_windows, batch_size):
+            batch = indices[batch_start:batch_start + batch_size]
+            X = np.array([extractor.extract_all_features(segments[i]) for i in batch])
+            labels, probabilities = self.predict(X)
+            
+            for i, label, probs in zip(batch, labels, probabilities):
+                start = i * hop_seconds
+                windows.append({
+                    'index': i,
+                    'start': start,
+                    'end': start + len(segments[i]) / extractor.sr,
+                    'predicted_instrument': label,
+                    'confidence': float(np.max(probs)),
+                    'all_probabilities': {
+                        instrument: float(prob) for instrument, prob in zip(classes, probs)
+                    }
+                })
+            probability_sum += probabilities.sum(axis=0)
+            
+            mean_probabilities = probability_sum / len(windows)
+            if early_exit and len(windows) >= min_windows and len(windows) < n_windows \
+                    and mean_probabilities.max() >= confidence_threshold:
+                stopped_early = True
+                break
+        
+        windows.sort(key=lambda window: window['index'])
+        mean_probabilities = probability_sum / len(windows)
+        
+        return {
+            'predicted_instrument': classes[int(np.argmax(mean_probabilities))],
+            'confidence': float(np.max(mean_probabilities)),
+            'all_probabilities': {
+                instrument: float(prob) for instrument, prob in zip(classes, mean_probabilities)
+            },
+            'windows': windows,
+            'windows_analyzed': len(windows),
+            'windows_total': n_windows,
+            'stopped_early': stopped_early
         }
-        
-        return result
     
     def save_model(self, model_path: str):
         model_data = {
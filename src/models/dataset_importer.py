@@ -0,0 +1,238 @@
+import csv
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .dataset_manager import DatasetManager
+from ..preprocessing.audio_probe import probe_audio_file
+from ..preprocessing.deduplication import Deduplicator
+
+AUDIO_EXTENSIONS = ('.wav', '.flac', '.mp3', '.ogg', '.m4a')
+
+REQUIRED_FIELDS = ('file_path', 'instrument', 'technique', 'performer_name',
+                   'consent_status', 'cultural_attribution')
+
+
+def _parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y')
+
+
+class DatasetImporter:
+    """
+    Bulk import of field recordings into a DatasetManager
+    Every import is a single storage commit, whatever its size
+
+    Files can be probed in parallel for duration, sample rate, channels
+    and checksum; the result is stored as each recording's 'audio_info'.
+    With checksums, files whose bytes are already in the dataset (or
+    earlier in the same batch) are skipped as exact duplicates. A
+    Deduplicator additionally flags near duplicates in 'audio_info'.
+    """
+
+    def __init__(self, dataset_manager: DatasetManager, probe: bool = True,
+                 checksum: bool = True, workers: int = 8, skip_existing: bool = True,
+                 deduplicator: Optional[Deduplicator] = None):
+        self.dataset_manager = dataset_manager
+        self.probe = probe
+        self.checksum = checksum
+        self.workers = workers
+        self.skip_existing = skip_existing
+        self.deduplicator = deduplicator
+
+    def _probe(self, file_path: str) -> Dict:
+        try:
+            return probe_audio_file(file_path, checksum=self.checksum)
+        except Exception as e:
+            return {'error': str(e)}
+
+    def import_records(self, records: Iterable[Dict]) -> Dict:
+        """
+        Validate, probe and add records in one batch
+
+        Returns:
+            Summary with the new recording_ids, skipped files, exact
+            duplicates, flagged near duplicates and errors
+        """
+        to_add, skipped, errors = [], [], []
+        duplicates, near_duplicates = [], []
+
+        for record in records:
+            missing = [field for field in REQUIRED_FIELDS if record.get(field) in (None, '')]
+            if missing:
+                errors.append({'record': record, 'error': f"Missing fields: {', '.join(missing)}"})
+                continue
+            if self.skip_existing and self.dataset_manager.has_file(record['file_path']):
+                skipped.append(record['file_path'])
+                continue
+
+            to_add.append({
+                'file_path': str(record['file_path']),
+                'instrument': record['instrument'],
+                'technique': record['technique'],
+                'performer_name': record['performer_name'],
+                'consent_status': _parse_bool(record['consent_status']),
+                'cultural_attribution': record['cultural_attribution'],
+                'notes': record.get('notes') or None
+            })
+
+        if self.probe and to_add:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                probes = list(executor.map(self._probe, [rec['file_path'] for rec in to_add]))
+
+            probed = []
+            for rec, info in zip(to_add, probes):
+                if 'error' in info:
+                    errors.append({'record': rec, 'error': info['error']})
+                else:
+                    rec['audio_info'] = info
+                    probed.append(rec)
+            to_add = probed
+
+        if self.probe and self.checksum:
+            to_add = self._drop_exact_duplicates(to_add, duplicates)
+
+        if self.deduplicator is not None and to_add:
+            to_add = self._flag_near_duplicates(to_add, duplicates, near_duplicates, errors)
+
+        def still_new(rec: Dict) -> bool:
+            # The checks above ran on a snapshot; repeat them under the
+            # dataset lock in case another importer added the same file
+            # or content since
+            if self.skip_existing and self.dataset_manager.has_file(rec['file_path']):
+                skipped.append(rec['file_path'])
+                return False
+            if self.probe and self.checksum:
+                existing = self._existing_copy(rec)
+                if existing is not None:
+                    duplicates.append({'file_path': rec['file_path'],
+                                       'duplicate_of': existing['recording_id']})
+                    return False
+            return True
+
+        recording_ids = self.dataset_manager.add_recordings(to_add, keep=still_new)
+
+        return {
+            'recording_ids': recording_ids,
+            'added': len(recording_ids),
+            'skipped': skipped,
+            'duplicates': duplicates,
+            'near_duplicates': near_duplicates,
+            'errors': errors
+        }
+
+    def _drop_exact_duplicates(self, records: List[Dict], duplicates: List[Dict]) -> List[Dict]:
+        seen: Dict[str, str] = {}
+        unique = []
+        for rec in records:
+            checksum = rec['audio_info']['sha256']
+            existing = self._existing_copy(rec)
+            if existing is not None:
+                duplicates.append({'file_path': rec['file_path'],
+                                   'duplicate_of': existing['recording_id']})
+            elif checksum in seen:
+                duplicates.append({'file_path': rec['file_path'],
+                                   'duplicate_of': seen[checksum]})
+            else:
+                seen[checksum] = rec['file_path']
+                unique.append(rec)
+        return unique
+
+    def _existing_copy(self, rec: Dict) -> Optional[Dict]:
+        """A recording of another file with the same bytes, if any"""
+        for other in self.dataset_manager.find_by_checksum(rec['audio_info']['sha256']):
+            if other['file_path'] != rec['file_path']:
+                return other
+        return None
+
+    def _flag_near_duplicates(self, records: List[Dict], duplicates: List[Dict],
+                              near_duplicates: List[Dict], errors: List[Dict]) -> List[Dict]:
+        # Fingerprinting decodes audio, so it runs in parallel; index
+        # lookups and registration stay on this thread
+        def fingerprint(rec):
+            try:
+                return self.deduplicator.fingerprint(rec['file_path'])
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            fingerprints = list(executor.map(fingerprint, records))
+
+        checked = []
+        for rec, landmarks in zip(records, fingerprints):
+            if isinstance(landmarks, Exception):
+                errors.append({'record': rec, 'error': str(landmarks)})
+                continue
+
+            audio_info = rec.setdefault('audio_info', {})
+            result = self.deduplicator.check(rec['file_path'], sha256=audio_info.get('sha256'),
+                                             landmarks=landmarks)
+            if result['duplicate_of'] is not None:
+                duplicates.append({'file_path': rec['file_path'],
+                                   'duplicate_of': result['duplicate_of']})
+                continue
+
+            audio_info['sha256'] = result['sha256']
+            if result['near_duplicates']:
+                audio_info['near_duplicates'] = result['near_duplicates']
+                near_duplicates.append({'file_path': rec['file_path'],
+                                        'matches': result['near_duplicates']})
+            checked.append(rec)
+        return checked
+
+    def import_directory(self, directory: str, instrument: str, technique: str,
+                         performer_name: str, consent_status: bool,
+                         cultural_attribution: str, notes: Optional[str] = None,
+                         extensions: tuple = AUDIO_EXTENSIONS) -> Dict:
+        """Import every audio file under a directory with shared metadata"""
+        files = sorted(
+            path for path in Path(directory).rglob('*')
+            if path.is_file() and path.suffix.lower() in extensions
+        )
+
+        return self.import_records(
+            {
+                'file_path': str(path),
+                'instrument': instrument,
+                'technique': technique,
+                'performer_name': performer_name,
+                'consent_status': consent_status,
+                'cultural_attribution': cultural_attribution,
+                'notes': notes
+            }
+            for path in files
+        )
+
+    def import_csv(self, csv_path: str) -> Dict:
+        """
+        Import rows of a CSV with a header of file_path, instrument, technique,
+        performer_name, consent_status, cultural_attribution and optional notes
+
+        Relative file paths are resolved against the CSV's directory.
+        """
+        base_dir = Path(csv_path).parent
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+
+        return self.import_records(self._resolve_paths(rows, base_dir))
+
+    def import_manifest(self, manifest_path: str) -> Dict:
+        """Import a JSON manifest: a list of records, or {'recordings': [...]}"""
+        base_dir = Path(manifest_path).parent
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        records = data['recordings'] if isinstance(data, dict) else data
+        return self.import_records(self._resolve_paths(records, base_dir))
+
+    @staticmethod
+    def _resolve_paths(records: List[Dict], base_dir: Path) -> List[Dict]:
+        resolved = []
+        for record in records:
+            record = dict(record)
+            if record.get('file_path') and not Path(record['file_path']).is_absolute():
+                record['file_path'] = str(base_dir / record['file_path'])
+            resolved.append(record)
+        return resolved
@@ -1,39 +1,186 @@
 import json
-import pandas as pd
+from collections import Counter
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional
 from datetime import datetime
 
+from .storage import open_storage
+from .._lazy import lazy_import
+
+# Only the DataFrame exports need pandas
+pd = lazy_import('pandas')
+
 
 class DatasetManager:
-    def __init__(self, metadata_path: str = "data/metadata/dataset_metadata.json"):
+    def __init__(self, metadata_path: str = "data/metadata/dataset_metadata.json",
+                 backend: Optional[str] = None):
         self.metadata_path = Path(metadata_path)
         self.metadata_path.parent.mkdir(parents=True, exist_ok=True)
-        self.metadata = self._load_metadata()
+        self.storage = open_storage(str(self.metadata_path), backend)
+        with self.storage.lock:
+            self.metadata = self._load_metadata()
+            self._version = self.storage.version()
+        self._revision = 0
+        self._dataframe_cache = None
+        self._build_indexes()
     
     def _load_metadata(self) -> Dict:
-        if self.metadata_path.exists():
-            with open(self.metadata_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
-            return {
-                'dataset_info': {
-                    'created_at': datetime.now().isoformat(),
-                    'version': '1.0.0',
-                    'description': 'Traditional Isan Musical Instruments Dataset - Phin and Khaen'
-                },
-                'recordings': []
-            }
-    
-    def _save_metadata(self):
-        with open(self.metadata_path, 'w', encoding='utf-8') as f:
+        return self.storage.load()
+    
+    def refresh(self) -> bool:
+        """
+        Reload if another process or session changed the stored dataset
+        
+        Returns:
+            True if the metadata was reloaded
+        """
+        if self.storage.version() == self._version:
+            return False
+        
+        with self.storage.lock:
+            self.metadata = self._load_metadata()
+            self._version = self.storage.version()
+            self._build_indexes()
+        return True
+    
+    @contextmanager
+    def _transaction(self):
+        """
+        Hold the storage lock across reload, change and commit
+        
+        Changes made by other writers are picked up first, so concurrent
+        sessions never overwrite each other's recordings or reuse IDs.
+        If the change fails, the in-memory state is reloaded from storage
+        so no partial change (records, indexes, ID counter) lingers.
+        """
+        with self.storage.lock:
+            self.refresh()
+            try:
+                yield
+            except BaseException:
+                self._version = None
+                self.refresh()
+                raise
+            self._version = self.storage.version()
+    
+    def _build_indexes(self):
+        self._revision += 1
+        self._by_id: Dict[str, Dict] = {}
+        self._by_instrument: Dict[str, Dict[str, Dict]] = {}
+        self._by_technique: Dict[str, Dict[str, Dict]] = {}
+        self._by_attribution: Dict[str, Dict[str, Dict]] = {}
+        self._by_file_path: Dict[str, Dict[str, Dict]] = {}
+        self._by_checksum: Dict[str, Dict[str, Dict]] = {}
+        self._instrument_counts: Counter = Counter()
+        self._technique_counts: Counter = Counter()
+        self._attribution_counts: Counter = Counter()
+        self._consent_count = 0
+        self._highest_number = 0
+        
+        for rec in self.metadata['recordings']:
+            self._index_recording(rec)
+    
+    def _index_recording(self, rec: Dict):
+        rec_id = rec['recording_id']
+        self._by_id[rec_id] = rec
+        self._by_instrument.setdefault(rec['instrument_type'].casefold(), {})[rec_id] = rec
+        self._by_technique.setdefault(rec['playing_technique'].casefold(), {})[rec_id] = rec
+        self._by_attribution.setdefault(rec['cultural_attribution'], {})[rec_id] = rec
+        self._by_file_path.setdefault(rec['file_path'], {})[rec_id] = rec
+        checksum = rec.get('audio_info', {}).get('sha256')
+        if checksum:
+            self._by_checksum.setdefault(checksum, {})[rec_id] = rec
+        self._instrument_counts[rec['instrument_type']] += 1
+        self._technique_counts[rec['playing_technique']] += 1
+        self._attribution_counts[rec['cultural_attribution']] += 1
+        if rec['performer']['consent_obtained']:
+            self._consent_count += 1
+        
+        suffix = rec_id.rsplit('_', 1)[-1]
+        if suffix.isdigit():
+            self._highest_number = max(self._highest_number, int(suffix))
+    
+    def _unindex_recording(self, rec: Dict):
+        rec_id = rec['recording_id']
+        self._by_id.pop(rec_id, None)
+        
+        for index, key in ((self._by_instrument, rec['instrument_type'].casefold()),
+                           (self._by_technique, rec['playing_technique'].casefold()),
+                           (self._by_attribution, rec['cultural_attribution']),
+                           (self._by_file_path, rec['file_path']),
+                           (self._by_checksum, rec.get('audio_info', {}).get('sha256'))):
+            group = index.get(key)
+            if group is not None:
+                group.pop(rec_id, None)
+                if not group:
+                    del index[key]
+        
+        for counts, key in ((self._instrument_counts, rec['instrument_type']),
+                            (self._technique_counts, rec['playing_technique']),
+                            (self._attribution_counts, rec['cultural_attribution'])):
+            counts[key] -= 1
+            if counts[key] <= 0:
+                del counts[key]
+        
+        if rec['performer']['consent_obtained']:
+            self._consent_count -= 1
+    
+    def _save_metadata(self, upserts: List[Dict] = (), deletes: List[str] = ()):
+        self._revision += 1
+        self.storage.commit(self.metadata, upserts=upserts, deletes=deletes)
+    
+    def import_json(self, json_path: str) -> int:
+        """Import recordings from a file in the original JSON format, replacing same IDs"""
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        imported = data.get('recordings', [])
+        imported_ids = {rec['recording_id'] for rec in imported}
+        
+        with self._transaction():
+            self.metadata['recordings'] = [
+                rec for rec in self.metadata['recordings']
+                if rec['recording_id'] not in imported_ids
+            ] + imported
+            if 'dataset_info' in data:
+                last_number = self.metadata['dataset_info'].get('last_recording_number', 0)
+                self.metadata['dataset_info'] = dict(data['dataset_info'])
+                self.metadata['dataset_info']['last_recording_number'] = max(
+                    last_number, data['dataset_info'].get('last_recording_number', 0)
+                )
+            
+            self._build_indexes()
+            self._save_metadata(upserts=imported)
+        return len(imported)
+    
+    def export_json(self, json_path: str):
+        """Write the dataset in the original single-document JSON format"""
+        self.refresh()
+        Path(json_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(json_path, 'w', encoding='utf-8') as f:
             json.dump(self.metadata, f, indent=2, ensure_ascii=False)
     
-    def add_recording(self, file_path: str, instrument: str, technique: str,
-                     performer_name: str, consent_status: bool,
-                     cultural_attribution: str, notes: Optional[str] = None) -> str:
-        recording_id = f"rec_{len(self.metadata['recordings']) + 1:04d}"
+    def close(self):
+        self.storage.close()
+    
+    def _allocate_ids(self, count: int) -> List[str]:
+        """
+        Reserve `count` new recording IDs
+        
+        IDs continue from the highest number ever issued (kept in
+        dataset_info), so they are never reused after deletions.
+        """
+        highest = max(self.metadata['dataset_info'].get('last_recording_number', 0),
+                      self._highest_number)
         
+        self.metadata['dataset_info']['last_recording_number'] = highest + count
+        return [f"rec_{number:04d}" for number in range(highest + 1, highest + count + 1)]
+    
+    def _make_entry(self, recording_id: str, file_path: str, instrument: str, technique: str,
+                    performer_name: str, consent_status: bool,
+                    cultural_attribution: str, notes: Optional[str] = None,
+                    audio_info: Optional[Dict] = None) -> Dict:
         recording_entry = {
             'recording_id': recording_id,
             'file_path': file_path,
@@ -47,63 +194,207 @@ class DatasetManager:
             'added_at': datetime.now().isoformat(),
             'notes': notes or ''
         }
+        if audio_info is not None:
+            recording_entry['audio_info'] = audio_info
+        
+        return recording_entry
+    
+    def add_recording(self, file_path: str, instrument: str, technique: str,
+                     performer_name: str, consent_status: bool,
+                     cultural_attribution: str, notes: Optional[str] = None) -> str:
+        return self.add_recordings([{
+            'file_path': file_path,
+            'instrument': instrument,
+            'technique': technique,
+            'performer_name': performer_name,
+            'consent_status': consent_status,
+            'cultural_attribution': cultural_attribution,
+            'notes': notes
+        }])[0]
+    
+    def add_recordings(self, recordings: Iterable[Dict],
+                       keep: Optional[Callable[[Dict], bool]] = None) -> List[str]:
+        """
+        Add many recordings with a single storage commit
+        
+        Args:
+            recordings: Dicts with the add_recording() arguments as keys
+                (file_path, instrument, technique, performer_name,
+                consent_status, cultural_attribution, optional notes and
+                audio_info)
+            keep: Called with each recording while the storage lock is
+                held and the dataset is up to date; recordings it returns
+                False for are left out (e.g. files another importer added
+                in the meantime)
+        
+        Returns:
+            The new recording IDs, in input order
+        """
+        recordings = list(recordings)
+        if not recordings:
+            return []
         
-        self.metadata['recordings'].append(recording_entry)
-        self._save_metadata()
+        with self._transaction():
+            if keep is not None:
+                recordings = [rec for rec in recordings if keep(rec)]
+                if not recordings:
+                    return []
+            recording_ids = self._allocate_ids(len(recordings))
+            entries = [
+                self._make_entry(recording_id, **rec)
+                for recording_id, rec in zip(recording_ids, recordings)
+            ]
+            
+            self.metadata['recordings'].extend(entries)
+            for entry in entries:
+                self._index_recording(entry)
+            self._save_metadata(upserts=entries)
+        
+        return recording_ids
+    
+    def has_file(self, file_path: str) -> bool:
+        self.refresh()
+        return file_path in self._by_file_path
+    
+    def get_recordings_by_file(self, file_path: str) -> List[Dict]:
+        self.refresh()
+        return list(self._by_file_path.get(file_path, {}).values())
+    
+    def find_by_checksum(self, sha256: str) -> List[Dict]:
+        """Recordings whose audio_info carries this content hash (exact duplicates)"""
+        self.refresh()
+        return list(self._by_checksum.get(sha256, {}).values())
+    
+    def update_recording(self, recording_id: str, file_path: Optional[str] = None,
+                         instrument: Optional[str] = None, technique: Optional[str] = None,
+                         performer_name: Optional[str] = None,
+                         consent_status: Optional[bool] = None,
+                         cultural_attribution: Optional[str] = None,
+                         notes: Optional[str] = None) -> Dict:
+        with self._transaction():
+            rec = self._by_id.get(recording_id)
+            if rec is None:
+                raise ValueError(f"Recording not found: {recording_id}")
+            
+            self._unindex_recording(rec)
+            
+            if file_path is not None:
+                rec['file_path'] = file_path
+            if instrument is not None:
+                rec['instrument_type'] = instrument
+            if technique is not None:
+                rec['playing_technique'] = technique
+            if performer_name is not None:
+                rec['performer']['name'] = performer_name
+            if consent_status is not None:
+                rec['performer']['consent_obtained'] = consent_status
+            if cultural_attribution is not None:
+                rec['cultural_attribution'] = cultural_attribution
+            if notes is not None:
+                rec['notes'] = notes
+            rec['updated_at'] = datetime.now().isoformat()
+            
+            self._index_recording(rec)
+            self._save_metadata(upserts=[rec])
+        
+        return rec
+    
+    def remove_recording(self, recording_id: str) -> bool:
+        with self._transaction():
+            rec = self._by_id.get(recording_id)
+            if rec is None:
+                return False
+            
+            self._unindex_recording(rec)
+            self.metadata['recordings'] = [
+                r for r in self.metadata['recordings'] if r['recording_id'] != recording_id
+            ]
+            self._save_metadata(deletes=[recording_id])
         
-        return recording_id
+        return True
     
     def get_recording(self, recording_id: str) -> Optional[Dict]:
-        for recording in self.metadata['recordings']:
-            if recording['recording_id'] == recording_id:
-                return recording
-        return None
+        self.refresh()
+        return self._by_id.get(recording_id)
     
     def get_recordings_by_instrument(self, instrument: str) -> List[Dict]:
-        return [
-            rec for rec in self.metadata['recordings'] 
-            if rec['instrument_type'].lower() == instrument.lower()
-        ]
+        self.refresh()
+        return list(self._by_instrument.get(instrument.casefold(), {}).values())
     
     def get_recordings_by_technique(self, technique: str) -> List[Dict]:
-        return [
-            rec for rec in self.metadata['recordings'] 
-            if rec['playing_technique'].lower() == technique.lower()
-        ]
+        self.refresh()
+        return list(self._by_technique.get(technique.casefold(), {}).values())
+    
+    def get_recordings_by_attribution(self, cultural_attribution: str) -> List[Dict]:
+        self.refresh()
+        return list(self._by_attribution.get(cultural_attribution, {}).values())
     
     def get_all_instruments(self) -> List[str]:
-        instruments = set(rec['instrument_type'] for rec in self.metadata['recordings'])
-        return sorted(list(instruments))
+        self.refresh()
+        return sorted(self._instrument_counts)
     
     def get_all_techniques(self) -> List[str]:
-        techniques = set(rec['playing_technique'] for rec in self.metadata['recordings'])
-        return sorted(list(techniques))
+        self.refresh()
+        return sorted(self._technique_counts)
+    
+    def get_instrument_counts(self) -> Dict[str, int]:
+        return {
+            instrument: self._instrument_counts[instrument]
+            for instrument in self.get_all_instruments()
+        }
     
-    def export_to_dataframe(self) -> pd.DataFrame:
+    def export_to_dataframe(self) -> 'pd.DataFrame':
+        self.refresh()
         if not self.metadata['recordings']:
             return pd.DataFrame()
         
-        df_data = []
-        for rec in self.metadata['recordings']:
-            df_data.append({
-                'recording_id': rec['recording_id'],
-                'file_path': rec['file_path'],
-                'instrument': rec['instrument_type'],
-                'technique': rec['playing_technique'],
-                'performer': rec['performer']['name'],
-                'consent': rec['performer']['consent_obtained'],
-                'cultural_attribution': rec['cultural_attribution'],
-                'added_at': rec['added_at']
-            })
-        
-        return pd.DataFrame(df_data)
+        if self._dataframe_cache is None or self._dataframe_cache[0] != self._revision:
+            self._dataframe_cache = (self._revision, self._build_dataframe())
+        
+        return self._dataframe_cache[1].copy()
+    
+    def _build_dataframe(self) -> 'pd.DataFrame':
+        # Build column by column; much cheaper than a list of per-row dicts
+        recordings = self.metadata['recordings']
+        
+        return pd.DataFrame({
+            'recording_id': [rec['recording_id'] for rec in recordings],
+            'file_path': [rec['file_path'] for rec in recordings],
+            'instrument': [rec['instrument_type'] for rec in recordings],
+            'technique': [rec['playing_technique'] for rec in recordings],
+            'performer': [rec['performer']['name'] for rec in recordings],
+            'consent': [rec['performer']['consent_obtained'] for rec in recordings],
+            'cultural_attribution': [rec['cultural_attribution'] for rec in recordings],
+            'added_at': [rec['added_at'] for rec in recordings]
+        })
+    
+    def export_parquet(self, parquet_path: Optional[str] = None) -> str:
+        """
+        Write export_to_dataframe() as a Parquet snapshot (requires pyarrow)
+        
+        Defaults to the metadata path with a .parquet suffix. Training and
+        analytics can then load the catalogue with load_parquet_snapshot()
+        without touching the metadata store.
+        """
+        parquet_path = Path(parquet_path or self.metadata_path.with_suffix('.parquet'))
+        parquet_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        df = self.export_to_dataframe()
+        tmp_path = parquet_path.with_name(parquet_path.name + '.tmp')
+        df.to_parquet(tmp_path, index=False)
+        tmp_path.replace(parquet_path)
+        
+        return str(parquet_path)
+    
+    @staticmethod
+    def load_parquet_snapshot(parquet_path: str) -> 'pd.DataFrame':
+        """Memory-map a snapshot written by export_parquet()"""
+        return pd.read_parquet(parquet_path, memory_map=True)
     
     def validate_consent(self) -> Dict:
-        total = len(self.metadata['recordings'])
-        with_consent = sum(
-            1 for rec in self.metadata['recordings'] 
-            if rec['performer']['consent_obtained']
-        )
+        self.refresh()
+        total = len(self._by_id)
+        with_consent = self._consent_count
         
         return {
             'total_recordings': total,
@@ -113,13 +404,8 @@ class DatasetManager:
         }
     
     def get_cultural_summary(self) -> Dict:
-        attributions = {}
-        for rec in self.metadata['recordings']:
-            attr = rec['cultural_attribution']
-            if attr in attributions:
-                attributions[attr] += 1
-            else:
-                attributions[attr] = 1
+        self.refresh()
+        attributions = dict(self._attribution_counts)
         
         return {
             'cultural_attributions': attributions,
@@ -0,0 +1,244 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+
+from .classifier import InstrumentClassifier
+from .storage import atomic_write_text
+
+LEGACY_MODEL_PATH = Path("models/instrument_classifier.pkl")
+
+
+def training_data_hash(items: Iterable[Tuple[str, str]]) -> str:
+    """
+    Order-independent sha256 over (audio sha256, label) pairs, identifying
+    exactly which recordings a model was trained on
+    """
+    digest = hashlib.sha256()
+    for sha256, label in sorted(set(items)):
+        digest.update(f"{sha256}\t{label}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Versioned model artifacts with an atomic "current" pointer
+
+    Layout:
+        <root>/versions/<version>/model.pkl
+        <root>/versions/<version>/metadata.json
+        <root>/CURRENT                (name of the active version)
+
+    A version is written into a temporary directory and renamed into
+    place when complete, and CURRENT is replaced atomically, so a reader
+    never sees a half-written model. Activating an older version is a
+    rollback; serving processes pick the change up through ModelWatcher.
+    """
+
+    def __init__(self, root: str = "models/registry"):
+        self.root = Path(root)
+        self.versions_dir = self.root / "versions"
+        self.versions_dir.mkdir(parents=True, exist_ok=True)
+        self.current_path = self.root / "CURRENT"
+
+    def publish(self, classifier: InstrumentClassifier, metadata: Dict,
+                activate: bool = True) -> str:
+        """
+        Store a trained classifier as a new version
+
+        Args:
+            classifier: Trained classifier
+            metadata: Anything describing the model; 'feature_names',
+                'sample_rate', 'segment_duration', 'metrics' and
+                'training_data_hash' are expected by consumers
+            activate: Point CURRENT at the new version
+
+        Returns:
+            The new version's name
+        """
+        if not classifier.is_trained:
+            raise ValueError("Cannot publish an untrained model")
+
+        version = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        tmp_dir = self.versions_dir / f".tmp-{version}-{os.getpid()}"
+        tmp_dir.mkdir(parents=True)
+        try:
+            classifier.save_model(str(tmp_dir / "model.pkl"))
+            metadata = dict(metadata, version=version,
+                            created_at=datetime.now().isoformat(),
+                            classes=[str(c) for c in classifier.label_encoder.classes_])
+            atomic_write_text(tmp_dir / "metadata.json",
+                              json.dumps(metadata, indent=2, ensure_ascii=False))
+            os.rename(tmp_dir, self.versions_dir / version)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version: str):
+        """Make a published version current (also used to roll back)"""
+        if not (self.versions_dir / version / "model.pkl").exists():
+            raise ValueError(f"Unknown model version: {version}")
+        atomic_write_text(self.current_path, version + "\n")
+
+    def current_version(self) -> Optional[str]:
+        try:
+            return self.current_path.read_text(encoding='utf-8').strip() or None
+        except FileNotFoundError:
+            return None
+
+    def list_versions(self) -> List[str]:
+        return sorted(
+            path.name for path in self.versions_dir.iterdir()
+            if path.is_dir() and not path.name.startswith('.')
+        )
+
+    def get_metadata(self, version: str) -> Dict:
+        with open(self.versions_dir / version / "metadata.json", 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load(self, version: Optional[str] = None) -> Tuple[InstrumentClassifier, Dict]:
+        """
+        Load a version (default: the current one)
+
+        Returns:
+            (classifier, metadata)
+        """
+        version = version or self.current_version()
+        if version is None:
+            raise ValueError(f"No current model in {self.root}")
+
+        classifier = InstrumentClassifier()
+        classifier.load_model(str(self.versions_dir / version / "model.pkl"))
+        return classifier, self.get_metadata(version)
+
+    def load_current_or_legacy(self,
+                               legacy_path: Path = LEGACY_MODEL_PATH
+                               ) -> Optional[Tuple[InstrumentClassifier, Dict]]:
+        """
+        The current model, or one saved by train_model.py before the
+        registry existed; None if neither is present
+        """
+        if self.current_version() is not None:
+            return self.load()
+        if Path(legacy_path).exists():
+            classifier = InstrumentClassifier()
+            classifier.load_model(str(legacy_path))
+            return classifier, {'version': 'legacy', 'model_path': str(legacy_path)}
+        return None
+
+
+class ModelWatcher:
+    """
+    Hot reload for serving processes
+
+    Holds the current (classifier, metadata) and swaps in a new pair when
+    the registry's CURRENT pointer changes. Requests that already took a
+    reference keep using the model they started with, so nothing in
+    flight is dropped. Checks are a single small file read, rate-limited
+    to one per poll_interval; call get() per request, or start() a
+    background thread that polls and fires on_change callbacks.
+    """
+
+    def __init__(self, registry: ModelRegistry, poll_interval: float = 5.0,
+                 validate: Optional[Callable[[Dict], None]] = None):
+        """
+        Args:
+            registry: Registry to follow
+            poll_interval: Minimum seconds between checks of CURRENT
+            validate: Called with a version's metadata before it is
+                served, including the one loaded at startup; raising
+                keeps the old model (e.g. on a sample rate or feature
+                schema mismatch), or no model at startup
+        """
+        self.registry = registry
+        self.poll_interval = poll_interval
+        self.validate = validate
+        self.callbacks: List[Callable[[InstrumentClassifier, Dict], None]] = []
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Read CURRENT once and load exactly that version, so a publish in
+        # between cannot pair the old model with the new version's name
+        version = registry.current_version()
+        self._model: Optional[Tuple[InstrumentClassifier, Dict]] = None
+        self._version = version
+        try:
+            self._model = self._load(version)
+        except Exception as e:
+            # Nothing to fall back to: serve no model until CURRENT moves
+            self.last_error = f"Could not load model {version or 'legacy'}: {e}"
+
+    def _load(self, version: Optional[str]) -> Optional[Tuple[InstrumentClassifier, Dict]]:
+        """Load and validate a version (None: the legacy model, if any)"""
+        if version is None:
+            loaded = self.registry.load_current_or_legacy()
+        else:
+            loaded = self.registry.load(version)
+        if loaded is not None and self.validate is not None:
+            self.validate(loaded[1])
+        return loaded
+
+    @property
+    def version(self) -> Optional[str]:
+        model = self._model
+        return model[1].get('version') if model else None
+
+    def get(self) -> Optional[Tuple[InstrumentClassifier, Dict]]:
+        """Current (classifier, metadata), reloading first if CURRENT moved"""
+        if time.monotonic() - self._checked_at >= self.poll_interval:
+            self.check()
+        return self._model
+
+    def check(self) -> bool:
+        """Reload now if CURRENT changed; True if a new model was swapped in"""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            version = self.registry.current_version()
+            if version is None or version == self._version:
+                return False
+            try:
+                classifier, metadata = self._load(version)
+            except Exception as e:
+                # A truncated or incompatible pickle fails in many ways
+                # (EOFError, UnpicklingError, AttributeError, ...); keep
+                # serving the old model and retry only when CURRENT moves again
+                self.last_error = f"Could not load model {version}: {e}"
+                self._version = version
+                return False
+
+            self._model = (classifier, metadata)
+            self._version = version
+            self.last_error = None
+
+        for callback in self.callbacks:
+            callback(classifier, metadata)
+        return True
+
+    def on_change(self, callback: Callable[[InstrumentClassifier, Dict], None]):
+        self.callbacks.append(callback)
+
+    def start(self) -> 'ModelWatcher':
+        """Poll in a background thread (for servers that do not call get() per request)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="model-watcher")
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            self.check()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,382 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+def default_dataset_info() -> Dict:
+    return {
+        'created_at': datetime.now().isoformat(),
+        'version': '1.0.0',
+        'description': 'Traditional Isan Musical Instruments Dataset - Phin and Khaen'
+    }
+
+
+class FileLock:
+    """
+    Advisory inter-process lock on a sidecar '<path>.lock' file
+
+    Re-entrant within one process and safe to share between threads;
+    other processes (app sessions, batch importers) block until released.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = Path(path)
+        self.timeout = timeout
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._handle = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._acquire_file_lock()
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            self._release_file_lock()
+        self._thread_lock.release()
+
+    def _acquire_file_lock(self):
+        handle = open(self.path, 'a+')
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+                self._handle = handle
+                return
+            except OSError:
+                if time.monotonic() >= deadline:
+                    handle.close()
+                    raise TimeoutError(f"Timed out waiting for lock on {self.path}")
+                time.sleep(0.05)
+
+    def _release_file_lock(self):
+        if fcntl is not None:
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+        else:
+            self._handle.seek(0)
+            msvcrt.locking(self._handle.fileno(), msvcrt.LK_UNLCK, 1)
+        self._handle.close()
+        self._handle = None
+
+
+def _file_version(path: Path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def atomic_write_text(path: Path, text: str):
+    """Write via a temp file and rename, so readers never see a partial file"""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class JSONStorage:
+    """
+    Original single-document format: {'dataset_info': ..., 'recordings': [...]}
+    Human-readable, but every commit rewrites the whole file
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.lock = FileLock(f"{path}.lock")
+
+    def version(self):
+        return _file_version(self.path)
+
+    def load(self) -> Dict:
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {'dataset_info': default_dataset_info(), 'recordings': []}
+
+    def commit(self, metadata: Dict, upserts: Iterable[Dict] = (),
+               deletes: Iterable[str] = ()):
+        atomic_write_text(self.path, json.dumps(metadata, indent=2, ensure_ascii=False))
+
+    def close(self):
+        pass
+
+
+class JSONLJournalStorage:
+    """
+    Append-only journal: one JSON operation per line
+
+    Commits append only the changed recordings, so bulk imports write
+    O(n) bytes instead of O(n^2). A torn final line from a crash is ignored
+    on load. The journal is compacted (rewritten as one 'put' per live
+    recording) once superseded operations outnumber live recordings.
+    """
+
+    def __init__(self, path: str, compact_min_ops: int = 1000):
+        self.path = Path(path)
+        self.compact_min_ops = compact_min_ops
+        self._ops = 0
+        # Last 'info' line journaled, to tell when dataset_info has changed
+        self._info_line: Optional[str] = None
+        self.lock = FileLock(f"{path}.lock")
+
+    def version(self):
+        return _file_version(self.path)
+
+    def load(self) -> Dict:
+        info = None
+        recordings: Dict[str, Dict] = {}
+        self._ops = 0
+        self._info_line = None
+
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+
+            for line_no, line in enumerate(lines):
+                if not line.strip():
+                    continue
+                try:
+                    op = json.loads(line)
+                except json.JSONDecodeError:
+                    if line_no == len(lines) - 1:
+                        # Torn write; the next commit rewrites the journal
+                        self._ops = 0
+                        break
+                    raise ValueError(f"Corrupt journal entry at {self.path}:{line_no + 1}")
+
+                self._ops += 1
+                if op['op'] == 'info':
+                    info = op['dataset_info']
+                    self._info_line = self._info_op(info)
+                elif op['op'] == 'put':
+                    recordings[op['recording']['recording_id']] = op['recording']
+                elif op['op'] == 'delete':
+                    recordings.pop(op['recording_id'], None)
+
+        return {
+            'dataset_info': info or default_dataset_info(),
+            'recordings': list(recordings.values())
+        }
+
+    def commit(self, metadata: Dict, upserts: Iterable[Dict] = (),
+               deletes: Iterable[str] = ()):
+        if not self.path.exists() or self._ops == 0:
+            self._rewrite(metadata)
+            return
+
+        lines = [json.dumps({'op': 'put', 'recording': rec}, ensure_ascii=False)
+                 for rec in upserts]
+        lines += [json.dumps({'op': 'delete', 'recording_id': rec_id})
+                  for rec_id in deletes]
+        # dataset_info holds the recording ID counter, so it is journaled
+        # whenever it changes, not only on commits without recordings
+        info_line = self._info_op(metadata['dataset_info'])
+        if info_line != self._info_line or not lines:
+            lines.insert(0, info_line)
+            self._info_line = info_line
+
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self._ops += len(lines)
+
+        live = len(metadata['recordings'])
+        if self._ops > self.compact_min_ops and self._ops > 2 * (live + 1):
+            self.compact(metadata)
+
+    def compact(self, metadata: Dict):
+        self._rewrite(metadata)
+
+    @staticmethod
+    def _info_op(dataset_info: Dict) -> str:
+        return json.dumps({'op': 'info', 'dataset_info': dataset_info}, ensure_ascii=False)
+
+    def _rewrite(self, metadata: Dict):
+        self._info_line = self._info_op(metadata['dataset_info'])
+        lines = [self._info_line]
+        lines += [json.dumps({'op': 'put', 'recording': rec}, ensure_ascii=False)
+                  for rec in metadata['recordings']]
+        atomic_write_text(self.path, '\n'.join(lines) + '\n')
+        self._ops = len(metadata['recordings']) + 1
+
+    def close(self):
+        pass
+
+
+class SQLiteStorage:
+    """
+    SQLite database in WAL mode; each commit is one transaction
+    The connection may be shared between threads; writers serialize on
+    the storage lock.
+
+    Indexed on instrument, technique, consent and attribution, so
+    query() can filter large catalogues without loading them.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.lock = FileLock(f"{path}.lock")
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS dataset_info (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS recordings (
+                    recording_id TEXT NOT NULL UNIQUE,
+                    instrument_type TEXT,
+                    playing_technique TEXT,
+                    consent_obtained INTEGER,
+                    cultural_attribution TEXT,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_recordings_instrument
+                    ON recordings (instrument_type COLLATE NOCASE);
+                CREATE INDEX IF NOT EXISTS idx_recordings_technique
+                    ON recordings (playing_technique COLLATE NOCASE);
+                CREATE INDEX IF NOT EXISTS idx_recordings_consent
+                    ON recordings (consent_obtained);
+                CREATE INDEX IF NOT EXISTS idx_recordings_attribution
+                    ON recordings (cultural_attribution);
+            """)
+
+    def version(self):
+        # data_version changes whenever another connection commits
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def load(self) -> Dict:
+        info = {
+            key: json.loads(value)
+            for key, value in self.conn.execute("SELECT key, value FROM dataset_info")
+        }
+        recordings = [
+            json.loads(data)
+            for (data,) in self.conn.execute("SELECT data FROM recordings ORDER BY rowid")
+        ]
+        return {'dataset_info': info or default_dataset_info(), 'recordings': recordings}
+
+    @staticmethod
+    def _row(rec: Dict) -> tuple:
+        return (
+            rec['recording_id'],
+            rec['instrument_type'],
+            rec['playing_technique'],
+            int(bool(rec['performer']['consent_obtained'])),
+            rec['cultural_attribution'],
+            json.dumps(rec, ensure_ascii=False)
+        )
+
+    def commit(self, metadata: Dict, upserts: Iterable[Dict] = (),
+               deletes: Iterable[str] = ()):
+        with self.conn:
+            # dataset_info is replaced as a whole, as in the other backends
+            self.conn.execute("DELETE FROM dataset_info")
+            self.conn.executemany(
+                "INSERT INTO dataset_info (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value, ensure_ascii=False))
+                 for key, value in metadata['dataset_info'].items()]
+            )
+            self.conn.executemany(
+                """INSERT INTO recordings VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (recording_id) DO UPDATE SET
+                       instrument_type = excluded.instrument_type,
+                       playing_technique = excluded.playing_technique,
+                       consent_obtained = excluded.consent_obtained,
+                       cultural_attribution = excluded.cultural_attribution,
+                       data = excluded.data""",
+                [self._row(rec) for rec in upserts]
+            )
+            self.conn.executemany(
+                "DELETE FROM recordings WHERE recording_id = ?",
+                [(rec_id,) for rec_id in deletes]
+            )
+
+    def query(self, instrument: Optional[str] = None, technique: Optional[str] = None,
+              consent: Optional[bool] = None,
+              attribution: Optional[str] = None) -> List[Dict]:
+        """Filter recordings in SQL using the secondary indexes"""
+        clauses, params = [], []
+        if instrument is not None:
+            clauses.append("instrument_type = ? COLLATE NOCASE")
+            params.append(instrument)
+        if technique is not None:
+            clauses.append("playing_technique = ? COLLATE NOCASE")
+            params.append(technique)
+        if consent is not None:
+            clauses.append("consent_obtained = ?")
+            params.append(int(consent))
+        if attribution is not None:
+            clauses.append("cultural_attribution = ?")
+            params.append(attribution)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return [
+            json.loads(data)
+            for (data,) in self.conn.execute(
+                f"SELECT data FROM recordings {where} ORDER BY rowid", params
+            )
+        ]
+
+    def close(self):
+        self.conn.close()
+
+
+BACKENDS = {
+    'json': JSONStorage,
+    'jsonl': JSONLJournalStorage,
+    'sqlite': SQLiteStorage,
+}
+
+SUFFIX_BACKENDS = {
+    '.json': 'json',
+    '.jsonl': 'jsonl',
+    '.db': 'sqlite',
+    '.sqlite': 'sqlite',
+    '.sqlite3': 'sqlite',
+}
+
+
+def open_storage(path: str, backend: Optional[str] = None):
+    """
+    Open a metadata storage backend
+
+    Args:
+        path: Storage file path
+        backend: 'json', 'jsonl' or 'sqlite'; inferred from the file
+            suffix when omitted
+    """
+    if backend is None:
+        backend = SUFFIX_BACKENDS.get(Path(path).suffix.lower(), 'json')
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown storage backend: {backend}. Use one of {list(BACKENDS)}")
+    return BACKENDS[backend](path)
@@ -0,0 +1,248 @@
+import json
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from datetime import datetime
+
+from .streaming import Stage, StreamingPipeline
+from ..data_collection.download_index import extract_video_id
+from ..data_collection.youtube_downloader import HostRateLimiter, YouTubeAudioDownloader
+from ..features.feature_cache import feature_cache_path, save_cached_features
+from ..features.feature_extractor import FeatureExtractor
+from ..models.dataset_manager import DatasetManager
+from ..models.storage import atomic_write_text
+from ..preprocessing.audio_probe import probe_audio_file
+from ..preprocessing.audio_processor import AudioProcessor
+
+DEFAULT_WORKERS = {
+    'download': 4,
+    'register': 1,
+    'decode': 2,
+    'features': 4,
+}
+
+
+def _extract_segment_features(segments: List[np.ndarray], sr: int) -> np.ndarray:
+    """Feature matrix for a recording's segments (runs in a worker process)"""
+    extractor = FeatureExtractor(sr=sr)
+    return np.array([extractor.extract_all_features(segment) for segment in segments])
+
+
+class IngestCheckpoint:
+    """
+    Crash-safe record of which videos an ingest run has finished
+
+    Rewritten atomically after every finished video, so a killed run
+    resumes with everything it completed; failed videos are retried.
+    """
+
+    def __init__(self, checkpoint_path: str = "data/pipeline/ingest_checkpoint.json"):
+        self.checkpoint_path = Path(checkpoint_path)
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        self.completed: Dict[str, Dict] = {}
+        self.failed: Dict[str, Dict] = {}
+        if self.checkpoint_path.exists():
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.completed = data.get('completed', {})
+            self.failed = data.get('failed', {})
+
+    def is_completed(self, key: str) -> bool:
+        return key in self.completed
+
+    def record(self, key: str, job: Dict):
+        entry = {
+            'url': job['video_info']['url'],
+            'finished_at': datetime.now().isoformat()
+        }
+        if 'error' in job:
+            entry.update(stage=job['failed_stage'], error=job['error'])
+            self.failed[key] = entry
+        else:
+            entry.update(status=job.get('status', 'ingested'),
+                         recording_id=job.get('recording_id'),
+                         features_path=job.get('features_path'))
+            self.completed[key] = entry
+            self.failed.pop(key, None)
+        self.save()
+
+    def save(self):
+        atomic_write_text(self.checkpoint_path, json.dumps({
+            'updated_at': datetime.now().isoformat(),
+            'completed': self.completed,
+            'failed': self.failed
+        }, indent=2, ensure_ascii=False))
+
+
+class IngestPipeline:
+    """
+    Streaming ingest of a video collection: download → register → decode
+    and segment → features, with every stage running concurrently
+
+    Network-bound downloads overlap CPU-bound feature extraction (which
+    runs on a process pool), so a new collection takes roughly as long
+    as its slowest stage. Bounded queues between stages provide
+    backpressure; per-stage metrics show where the bottleneck is.
+
+    Output lands where the batch tools look for it: recordings in the
+    DatasetManager (linked in the download index) and per-recording
+    feature matrices in the shared feature cache used by train_model.py.
+    """
+
+    def __init__(self, downloader: YouTubeAudioDownloader,
+                 dataset_manager: DatasetManager,
+                 processor: Optional[AudioProcessor] = None,
+                 segment_duration: float = 3.0,
+                 workers: Optional[Dict[str, int]] = None,
+                 queue_size: int = 8,
+                 checkpoint_path: str = "data/pipeline/ingest_checkpoint.json",
+                 requests_per_second: float = 1.0,
+                 max_retries: int = 3):
+        """
+        Args:
+            downloader: Downloader (and its download index) to fetch audio with
+            dataset_manager: Metadata store new recordings are added to
+            processor: Audio loader/segmenter (default: 22050 Hz AudioProcessor)
+            segment_duration: Segment length in seconds, as in train_model.py
+            workers: Worker count per stage, overriding DEFAULT_WORKERS
+            queue_size: Capacity of each queue between stages
+            checkpoint_path: Where finished videos are recorded
+            requests_per_second: Per-host download rate limit
+            max_retries: Download retries after transient failures
+        """
+        self.downloader = downloader
+        self.dataset_manager = dataset_manager
+        self.processor = processor or AudioProcessor(target_sr=22050)
+        self.segment_duration = segment_duration
+        self.workers = dict(DEFAULT_WORKERS, **(workers or {}))
+        self.queue_size = queue_size
+        self.checkpoint = IngestCheckpoint(checkpoint_path)
+        self.rate_limiter = HostRateLimiter(requests_per_second)
+        self.max_retries = max_retries
+        self._feature_pool: Optional[ProcessPoolExecutor] = None
+        self.pipeline = StreamingPipeline([
+            Stage('download', self._download, self.workers['download']),
+            Stage('register', self._register, self.workers['register']),
+            Stage('decode', self._decode, self.workers['decode']),
+            Stage('features', self._features, self.workers['features']),
+        ], queue_size=queue_size)
+
+    @staticmethod
+    def job_key(video_info: Dict) -> str:
+        return extract_video_id(video_info['url']) or video_info['url']
+
+    def _download(self, job: Dict) -> Dict:
+        result = self.downloader.download_video(
+            job['video_info'], self.rate_limiter, max_retries=self.max_retries
+        )
+        if not result['success']:
+            raise RuntimeError(result['error'])
+
+        metadata = result['metadata']
+        if 'audio_info' not in metadata:
+            # Downloads catalogued before header probing was added
+            metadata['audio_info'] = probe_audio_file(metadata['file_path'], checksum=True)
+            metadata['sha256'] = metadata['audio_info']['sha256']
+        job['metadata'] = metadata
+        return job
+
+    def _register(self, job: Dict) -> Dict:
+        metadata = job['metadata']
+
+        existing = self.dataset_manager.get_recordings_by_file(metadata['file_path'])
+        if metadata.get('duplicate_of') or (
+                not existing and self.dataset_manager.find_by_checksum(metadata['sha256'])):
+            job['status'] = 'duplicate'
+            job['done'] = True
+            return job
+
+        if existing:
+            job['recording_id'] = existing[0]['recording_id']
+        else:
+            video_info = job['video_info']
+            job['recording_id'] = self.dataset_manager.add_recordings([{
+                'file_path': metadata['file_path'],
+                'instrument': metadata['instrument'],
+                'technique': metadata['technique'] or 'Unknown',
+                'performer_name': video_info.get('performer') or metadata['uploader'],
+                'consent_status': True,
+                'cultural_attribution': f"YouTube: {metadata['title']} by {metadata['uploader']}",
+                'notes': f"YouTube video ID: {metadata['video_id']}. {metadata.get('attribution_notes') or ''}",
+                'audio_info': dict(metadata['audio_info'],
+                                   near_duplicates=metadata.get('near_duplicates', []))
+            }])[0]
+        self.downloader.index.link_recording(metadata['video_id'], job['recording_id'])
+        return job
+
+    def _decode(self, job: Dict) -> Dict:
+        cache_path = feature_cache_path(job['metadata']['sha256'], self.processor.target_sr,
+                                        self.segment_duration)
+        job['features_path'] = str(cache_path)
+        if cache_path.exists():
+            job['status'] = 'cached'
+            job['done'] = True
+            return job
+
+        audio, sr, quality = self.processor.preprocess_audio(job['metadata']['file_path'])
+        if not quality['is_valid']:
+            raise ValueError(f"Quality check failed: {quality.get('reason', 'Unknown')}")
+
+        job['segments'] = self.processor.extract_segments(audio, sr, self.segment_duration)
+        job['sr'] = sr
+        return job
+
+    def _features(self, job: Dict) -> Dict:
+        segments = job.pop('segments')
+        features = self._feature_pool.submit(
+            _extract_segment_features, segments, job['sr']
+        ).result()
+        save_cached_features(Path(job['features_path']), features)
+        job['n_segments'] = len(features)
+        job['status'] = 'ingested'
+        return job
+
+    def run(self, video_list: Iterable[Dict], resume: bool = True) -> Dict:
+        """
+        Ingest every video in the list
+
+        Args:
+            video_list: Dicts with 'url', 'instrument', 'technique', 'notes'
+                (as for YouTubeAudioDownloader.download_batch)
+            resume: Skip videos the checkpoint records as finished
+
+        Returns:
+            Summary with per-status counts, failures and stage metrics
+        """
+        jobs = (
+            {'key': self.job_key(video_info), 'video_info': video_info}
+            for video_info in video_list
+            if not (resume and self.checkpoint.is_completed(self.job_key(video_info)))
+        )
+
+        def on_result(job: Dict):
+            job.pop('segments', None)
+            self.checkpoint.record(job['key'], job)
+
+        with ProcessPoolExecutor(max_workers=self.workers['features']) as pool:
+            self._feature_pool = pool
+            try:
+                results = self.pipeline.run(jobs, on_result=on_result)
+            finally:
+                self._feature_pool = None
+
+        statuses: Dict[str, int] = {}
+        for job in results:
+            status = 'failed' if 'error' in job else job.get('status', 'ingested')
+            statuses[status] = statuses.get(status, 0) + 1
+
+        return {
+            'processed': len(results),
+            'statuses': statuses,
+            'failures': [
+                {'url': job['video_info']['url'], 'stage': job['failed_stage'],
+                 'error': job['error']}
+                for job in results if 'error' in job
+            ],
+            'metrics': self.pipeline.metrics()
+        }
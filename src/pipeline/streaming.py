@@ -0,0 +1,193 @@
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+_STOP = object()
+
+
+class Stage:
+    """
+    One step of a StreamingPipeline: a function applied to each job by its
+    own pool of worker threads
+
+    The function receives a job dict and returns it (updated). Setting
+    job['done'] = True sends the job straight to the output, skipping the
+    remaining stages; an exception marks the job failed at this stage.
+    """
+
+    def __init__(self, name: str, func: Callable[[Dict], Dict], workers: int = 1):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.idle_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.max_queue_depth = 0
+
+    def _record(self, busy: float, idle: float, blocked: float, failed: bool, depth: int):
+        with self._lock:
+            self.processed += 1
+            self.failed += int(failed)
+            self.busy_seconds += busy
+            self.idle_seconds += idle
+            self.blocked_seconds += blocked
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def metrics(self) -> Dict:
+        """
+        Counters for this stage
+
+        busy_seconds is time spent in the stage function, idle_seconds
+        waiting for input (upstream is the bottleneck) and blocked_seconds
+        waiting for room downstream (backpressure; downstream is the
+        bottleneck). All are summed over the stage's workers.
+        """
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'processed': self.processed,
+                'failed': self.failed,
+                'busy_seconds': round(self.busy_seconds, 3),
+                'idle_seconds': round(self.idle_seconds, 3),
+                'blocked_seconds': round(self.blocked_seconds, 3),
+                'max_queue_depth': self.max_queue_depth,
+                'utilization': round(
+                    self.busy_seconds / max(1e-9, self.busy_seconds + self.idle_seconds
+                                            + self.blocked_seconds), 3
+                )
+            }
+
+
+class StreamingPipeline:
+    """
+    Stages connected by bounded queues, each with its own worker threads
+
+    Jobs stream through as soon as the previous stage finishes them, so
+    stages overlap and total time approaches that of the slowest stage
+    rather than the sum of all. A full queue blocks the stage feeding it,
+    which bounds memory however fast the early stages are.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 8):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = stages
+        self.queue_size = queue_size
+        self.wall_seconds = 0.0
+
+    def run(self, jobs: Iterable[Dict],
+            on_result: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """
+        Push jobs through every stage
+
+        Args:
+            jobs: Job dicts; consumed lazily, so a generator is never
+                read further ahead than the first queue allows
+            on_result: Called on this thread for each finished job (e.g. to
+                write a checkpoint)
+
+        Returns:
+            Finished jobs in completion order; failed jobs carry 'error'
+            and 'failed_stage'
+        """
+        for stage in self.stages:
+            stage.reset_metrics()
+
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        output = queue.Queue()
+        remaining = [stage.workers for stage in self.stages]
+        remaining_lock = threading.Lock()
+        feed_error = []
+
+        def feed():
+            try:
+                for job in jobs:
+                    queues[0].put(job)
+            except Exception as e:
+                feed_error.append(e)
+            finally:
+                for _ in range(self.stages[0].workers):
+                    queues[0].put(_STOP)
+
+        def work(index: int):
+            stage = self.stages[index]
+            inbox = queues[index]
+            is_last = index == len(self.stages) - 1
+            try:
+                while True:
+                    started = time.perf_counter()
+                    job = inbox.get()
+                    idle = time.perf_counter() - started
+                    if job is _STOP:
+                        break
+
+                    depth = inbox.qsize()
+                    started = time.perf_counter()
+                    try:
+                        job = stage.func(job)
+                        failed = False
+                    except Exception as e:
+                        job['error'] = str(e)
+                        job['failed_stage'] = stage.name
+                        failed = True
+                    busy = time.perf_counter() - started
+
+                    started = time.perf_counter()
+                    if failed or job.get('done') or is_last:
+                        output.put(job)
+                    else:
+                        queues[index + 1].put(job)
+                    blocked = time.perf_counter() - started
+
+                    stage._record(busy, idle, blocked, failed, depth)
+            finally:
+                with remaining_lock:
+                    remaining[index] -= 1
+                    last_worker = remaining[index] == 0
+                if last_worker:
+                    if is_last:
+                        output.put(_STOP)
+                    else:
+                        for _ in range(self.stages[index + 1].workers):
+                            queues[index + 1].put(_STOP)
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=feed, daemon=True)]
+        for index, stage in enumerate(self.stages):
+            threads += [
+                threading.Thread(target=work, args=(index,), daemon=True,
+                                 name=f"{stage.name}-{n}")
+                for n in range(stage.workers)
+            ]
+        for thread in threads:
+            thread.start()
+
+        results = []
+        while True:
+            job = output.get()
+            if job is _STOP:
+                break
+            results.append(job)
+            if on_result is not None:
+                on_result(job)
+
+        for thread in threads:
+            thread.join()
+        self.wall_seconds = time.perf_counter() - started
+
+        if feed_error:
+            raise feed_error[0]
+        return results
+
+    def metrics(self) -> Dict:
+        return {
+            'wall_seconds': round(self.wall_seconds, 3),
+            'stages': {stage.name: stage.metrics() for stage in self.stages}
+        }
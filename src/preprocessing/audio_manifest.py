@@ -0,0 +1,153 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from datetime import datetime
+
+from .audio_probe import probe_audio_file
+from ..models.storage import atomic_write_text
+
+
+class AudioManifest:
+    """
+    Header-level facts about every audio file in the dataset
+    Size, mtime, duration, sample rate, channels and content hash, probed
+    without decoding and only re-probed when a file's size or mtime changes
+
+    Lets training run pre-flight checks, plan segment counts, reuse work
+    for unchanged files and spot moved or duplicate files up front.
+    """
+
+    def __init__(self, manifest_path: str = "data/metadata/audio_manifest.json"):
+        self.manifest_path = Path(manifest_path)
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        self.entries: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        if self.manifest_path.exists():
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)['entries']
+        return {}
+
+    def save(self):
+        atomic_write_text(self.manifest_path, json.dumps({
+            'updated_at': datetime.now().isoformat(),
+            'entries': self.entries
+        }, indent=2, ensure_ascii=False))
+
+    def get(self, file_path: str) -> Optional[Dict]:
+        return self.entries.get(str(file_path))
+
+    def is_unchanged(self, file_path: str) -> bool:
+        """True if the file's size and mtime still match its manifest entry"""
+        entry = self.entries.get(str(file_path))
+        if entry is None or not entry.get('exists', False):
+            return False
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return False
+        return stat.st_size == entry['size_bytes'] and stat.st_mtime == entry['mtime']
+
+    def _probe(self, file_path: str) -> Dict:
+        if not Path(file_path).exists():
+            return {'exists': False}
+        try:
+            entry = probe_audio_file(file_path, checksum=True)
+            entry['exists'] = True
+        except Exception as e:
+            entry = {'exists': True, 'error': str(e)}
+        return entry
+
+    def build(self, file_paths: Iterable[str], workers: int = 8, save: bool = True) -> Dict:
+        """
+        Probe new or changed files in parallel; unchanged files are skipped
+
+        Returns:
+            Counts of probed, unchanged, missing and unreadable files
+        """
+        file_paths = [str(path) for path in file_paths]
+        to_probe = [path for path in file_paths if not self.is_unchanged(path)]
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            probes = list(executor.map(self._probe, to_probe))
+
+        now = datetime.now().isoformat()
+        for path, entry in zip(to_probe, probes):
+            previous = self.entries.get(path, {})
+            if not entry['exists'] and 'sha256' in previous:
+                # Keep the last known hash so a moved file can be matched
+                entry = dict(previous, exists=False)
+            entry['probed_at'] = now
+            self.entries[path] = entry
+
+        if save:
+            self.save()
+
+        return {
+            'total': len(file_paths),
+            'probed': len(to_probe),
+            'unchanged': len(file_paths) - len(to_probe),
+            'missing': sum(1 for path in file_paths if not self.entries[path].get('exists')),
+            'unreadable': sum(1 for path in file_paths if 'error' in self.entries[path])
+        }
+
+    def preflight(self, file_path: str, min_duration: float = 0.5) -> Dict:
+        """
+        Quality checks that need only the header (see AudioProcessor.validate_audio_quality)
+
+        Returns:
+            {'is_valid': bool, 'reason': str (when invalid)}
+        """
+        entry = self.entries.get(str(file_path))
+        if entry is None:
+            return {'is_valid': False, 'reason': 'Not in manifest'}
+        if not entry.get('exists'):
+            return {'is_valid': False, 'reason': 'File not found'}
+        if 'error' in entry:
+            return {'is_valid': False, 'reason': f"Unreadable: {entry['error']}"}
+        if entry['duration'] < min_duration:
+            return {'is_valid': False, 'reason': 'Audio too short'}
+        return {'is_valid': True}
+
+    def planned_segments(self, file_path: str, segment_duration: float = 3.0,
+                         overlap: float = 0.5) -> int:
+        """Number of segments AudioProcessor.extract_segments will produce for a file"""
+        entry = self.entries.get(str(file_path))
+        if entry is None or 'duration' not in entry:
+            return 0
+
+        duration = entry['duration']
+        if duration <= 0:
+            return 0
+        if duration < segment_duration:
+            return 1
+
+        hop = segment_duration * (1 - overlap)
+        return int((duration - segment_duration) // hop) + 1
+
+    def find_duplicates(self) -> Dict[str, List[str]]:
+        """Existing files with identical content, grouped by sha256"""
+        groups: Dict[str, List[str]] = {}
+        for path, entry in self.entries.items():
+            if entry.get('exists') and 'sha256' in entry:
+                groups.setdefault(entry['sha256'], []).append(path)
+        return {digest: paths for digest, paths in groups.items() if len(paths) > 1}
+
+    def find_moved(self) -> List[Dict]:
+        """Missing files whose content now exists at another path"""
+        by_hash: Dict[str, str] = {}
+        for path, entry in self.entries.items():
+            if entry.get('exists') and 'sha256' in entry:
+                by_hash.setdefault(entry['sha256'], path)
+
+        moved = []
+        for path, entry in self.entries.items():
+            if not entry.get('exists') and entry.get('sha256') in by_hash:
+                moved.append({
+                    'old_path': path,
+                    'new_path': by_hash[entry['sha256']],
+                    'sha256': entry['sha256']
+                })
+        return moved
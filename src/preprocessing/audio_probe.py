@@ -0,0 +1,59 @@
+import hashlib
+import os
+import soundfile as sf
+import librosa
+from pathlib import Path
+from typing import Dict
+
+
+def file_checksum(file_path: str, algorithm: str = 'sha256',
+                  chunk_size: int = 1 << 20) -> str:
+    """Hash a file's bytes in chunks, without loading it into memory"""
+    digest = hashlib.new(algorithm)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def probe_audio_file(file_path: str, checksum: bool = True) -> Dict:
+    """
+    Read an audio file's size, duration, sample rate and channels from its header
+
+    Uses soundfile.info, which reads only the header; formats libsndfile
+    cannot open fall back to librosa, which may have to decode.
+
+    Returns:
+        Dictionary with size_bytes, mtime, duration, sample_rate, channels,
+        format and (if requested) a sha256 checksum
+    """
+    path = Path(file_path)
+    stat = os.stat(path)
+
+    info = {
+        'size_bytes': stat.st_size,
+        'mtime': stat.st_mtime,
+    }
+
+    try:
+        header = sf.info(str(path))
+        info.update({
+            'duration': float(header.duration),
+            'sample_rate': int(header.samplerate),
+            'channels': int(header.channels),
+            'format': header.format,
+            'subtype': header.subtype,
+        })
+    except Exception:
+        info.update({
+            'duration': float(librosa.get_duration(path=str(path))),
+            'sample_rate': int(librosa.get_samplerate(str(path))),
+            'channels': None,
+            'format': path.suffix.lstrip('.').upper(),
+            'subtype': None,
+        })
+
+    if checksum:
+        info['sha256'] = file_checksum(str(path))
+
+    return info
@@ -1,34 +1,127 @@
+import io
+import os
+import tempfile
 import numpy as np
 import librosa
 import soundfile as sf
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import BinaryIO, Tuple, Optional, Union
 import warnings
 
 warnings.filterwarnings('ignore')
 
+# A path, raw encoded bytes, or a binary file-like object such as an upload
+AudioSource = Union[str, Path, bytes, BinaryIO]
+
 
 class AudioProcessor:
     def __init__(self, target_sr: int = 22050, duration: Optional[float] = None):
         self.target_sr = target_sr
         self.duration = duration
     
-    def load_audio(self, file_path: str) -> Tuple[np.ndarray, int]:
+    def load_audio(self, source: AudioSource, suffix: Optional[str] = None) -> Tuple[np.ndarray, int]:
+        """
+        Load audio as mono float32 at target_sr
+        
+        Args:
+            source: File path, raw bytes or a binary file-like object (e.g.
+                a Streamlit upload); in-memory sources are decoded without
+                touching disk whenever libsndfile supports the codec
+            suffix: Container extension (e.g. '.mp3') for in-memory sources
+                that must fall back to a temporary file; taken from the
+                object's name when omitted
+        """
+        if isinstance(source, (str, Path)):
+            return self._load_path(source)
+        
+        name = getattr(source, 'name', None)
+        data = bytes(source) if isinstance(source, (bytes, bytearray, memoryview)) else source.read()
         try:
+            loaded = self._load_memory(data)
+            if loaded is not None:
+                return loaded
+            return self._load_via_temp_file(data, suffix or (Path(name).suffix if name else ''))
+        except Exception as e:
+            raise ValueError(f"Error loading audio {name or '(in-memory data)'}: {str(e)}")
+    
+    def _load_path(self, file_path) -> Tuple[np.ndarray, int]:
+        try:
+            loaded = self._load_native_rate(file_path)
+            if loaded is not None:
+                return loaded
+            
             audio, sr = librosa.load(file_path, sr=self.target_sr, duration=self.duration)
             return audio, int(sr)
         except Exception as e:
             raise ValueError(f"Error loading audio file {file_path}: {str(e)}")
     
+    def _read_soundfile(self, source) -> Tuple[np.ndarray, int]:
+        """Decode with soundfile at the file's own rate, downmixed to mono"""
+        with sf.SoundFile(source) as f:
+            frames = -1 if self.duration is None else int(self.duration * f.samplerate)
+            audio = f.read(frames=frames, dtype='float32', always_2d=True)
+            sr = f.samplerate
+        audio = audio.mean(axis=1) if audio.shape[1] > 1 else audio[:, 0]
+        return audio, int(sr)
+    
+    def _load_native_rate(self, file_path: str) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        Decode directly with soundfile when the file is already at target_sr
+        
+        Files stored analysis-ready (e.g. mono 22050 Hz FLAC downloads) skip
+        librosa's resampler entirely. Returns None when a resample is needed
+        or libsndfile cannot read the format.
+        """
+        try:
+            info = sf.info(str(file_path))
+        except Exception:
+            return None
+        if self.target_sr is not None and info.samplerate != self.target_sr:
+            return None
+        
+        return self._read_soundfile(str(file_path))
+    
+    def _load_memory(self, data: bytes) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        Decode bytes from a BytesIO with soundfile, which sniffs the format
+        from the content (WAV, FLAC, OGG, MP3 with libsndfile >= 1.1), then
+        resample to target_sr. Returns None when libsndfile cannot decode it.
+        """
+        try:
+            audio, sr = self._read_soundfile(io.BytesIO(data))
+        except Exception:
+            return None
+        if self.target_sr is not None and sr != self.target_sr:
+            audio = librosa.resample(audio, orig_sr=sr, target_sr=self.target_sr)
+            sr = self.target_sr
+        return audio, int(sr)
+    
+    def _load_via_temp_file(self, data: bytes, suffix: str) -> Tuple[np.ndarray, int]:
+        # Codecs libsndfile lacks (e.g. AAC/M4A) go through librosa's
+        # audioread fallback, which needs a path with the right extension
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+            tmp_file.write(data)
+            tmp_path = tmp_file.name
+        try:
+            audio, sr = librosa.load(tmp_path, sr=self.target_sr, duration=self.duration)
+            return audio, int(sr)
+        finally:
+            os.unlink(tmp_path)
+    
     def normalize_audio(self, audio: np.ndarray) -> np.ndarray:
         if np.max(np.abs(audio)) > 0:
             return audio / np.max(np.abs(audio))
         return audio
     
+    @staticmethod
+    def segment_hop(sr: int, segment_duration: float = 3.0, overlap: float = 0.5) -> int:
+        """Samples between the starts of consecutive extract_segments() windows"""
+        return int(int(segment_duration * sr) * (1 - overlap))
+    
     def extract_segments(self, audio: np.ndarray, sr: int, segment_duration: float = 3.0, 
                         overlap: float = 0.5) -> list:
         segment_samples = int(segment_duration * sr)
-        hop_samples = int(segment_samples * (1 - overlap))
+        hop_samples = self.segment_hop(sr, segment_duration, overlap)
         
         segments = []
         start = 0
@@ -61,8 +154,9 @@ class AudioProcessor:
         
         return quality_metrics
     
-    def preprocess_audio(self, file_path: str) -> Tuple[np.ndarray, int, dict]:
-        audio, sr = self.load_audio(file_path)
+    def preprocess_audio(self, source: AudioSource,
+                         suffix: Optional[str] = None) -> Tuple[np.ndarray, int, dict]:
+        audio, sr = self.load_audio(source, suffix)
         audio = self.normalize_audio(audio)
         quality = self.validate_audio_quality(audio, sr)
         
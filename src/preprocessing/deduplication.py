@@ -0,0 +1,141 @@
+import threading
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional
+from datetime import datetime
+
+from .audio_probe import file_checksum
+from ..search.audio_fingerprint import AudioFingerprintIndex, fingerprint_file
+
+
+class Deduplicator:
+    """
+    Flags duplicate audio before any feature extraction
+    The same performance often arrives several times (re-uploads under
+    other titles, archive copies), wasting storage and leaking segments
+    between training and validation
+
+    Two layers, kept in one SQLite file:
+    - exact duplicates: a content-addressed table mapping each sha256 to
+      the canonical file holding those bytes
+    - near duplicates: landmark fingerprints in an AudioFingerprintIndex,
+      which also catch re-encoded, re-leveled or trimmed copies
+
+    Safe to share between threads (e.g. concurrent downloads); only the
+    index lookups are serialized, not fingerprinting.
+    """
+
+    def __init__(self, index_path: str = "data/index/dedup.db",
+                 max_duration: Optional[float] = 600.0):
+        """
+        Args:
+            index_path: SQLite file for the content table and fingerprints
+            max_duration: Fingerprint at most this many seconds of each file
+        """
+        self.fingerprints = AudioFingerprintIndex(index_path)
+        self.conn = self.fingerprints.conn
+        self.max_duration = max_duration
+        self._lock = threading.RLock()
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS contents (
+                    sha256 TEXT PRIMARY KEY,
+                    file_path TEXT NOT NULL,
+                    added_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_contents_path ON contents (file_path);
+            """)
+
+    def canonical_path(self, sha256: str) -> Optional[str]:
+        """The file registered for this content hash, if any"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT file_path FROM contents WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _existing_copy(self, file_path: str, sha256: str) -> Optional[str]:
+        canonical = self.canonical_path(sha256)
+        if canonical is not None and canonical != file_path and Path(canonical).exists():
+            return canonical
+        return None
+
+    def fingerprint(self, file_path: str) -> np.ndarray:
+        """Landmark fingerprint of a file; safe to call from worker threads"""
+        return fingerprint_file(str(file_path), max_duration=self.max_duration)
+
+    def check(self, file_path: str, sha256: Optional[str] = None,
+              landmarks: Optional[np.ndarray] = None, register: bool = True) -> Dict:
+        """
+        Look a file up against everything registered so far
+
+        Args:
+            file_path: Audio file to check
+            sha256: Precomputed content hash (e.g. from probe_audio_file)
+            landmarks: Precomputed fingerprint from fingerprint()
+            register: Add the file to the index unless it is an exact duplicate
+
+        Returns:
+            {'file_path', 'sha256', 'duplicate_of': canonical path or None,
+             'near_duplicates': [{'file_path', 'score', 'offset_seconds'}]}
+        """
+        file_path = str(file_path)
+        sha256 = sha256 or file_checksum(file_path)
+        result = {
+            'file_path': file_path,
+            'sha256': sha256,
+            'duplicate_of': None,
+            'near_duplicates': []
+        }
+
+        result['duplicate_of'] = self._existing_copy(file_path, sha256)
+        if result['duplicate_of'] is not None:
+            return result
+
+        if landmarks is None:
+            landmarks = self.fingerprint(file_path)
+
+        with self._lock:
+            # Another thread may have registered the same bytes meanwhile
+            result['duplicate_of'] = self._existing_copy(file_path, sha256)
+            if result['duplicate_of'] is not None:
+                return result
+
+            result['near_duplicates'] = [
+                {
+                    'file_path': match['item_id'],
+                    'score': match['score'],
+                    'offset_seconds': match['offset_seconds']
+                }
+                for match in self.fingerprints.query(landmarks, exclude=file_path)
+            ]
+
+            if register:
+                self.register(file_path, sha256, landmarks)
+
+        return result
+
+    def register(self, file_path: str, sha256: str, landmarks: np.ndarray):
+        """Record a file as the canonical copy of its content and index its fingerprint"""
+        with self._lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO contents VALUES (?, ?, ?)",
+                    (sha256, str(file_path), datetime.now().isoformat())
+                )
+            self.fingerprints.add(str(file_path), landmarks)
+
+    def remove(self, file_path: str):
+        with self._lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM contents WHERE file_path = ?", (str(file_path),))
+            self.fingerprints.remove(str(file_path))
+
+    def registered_files(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self.conn.execute(
+                "SELECT file_path FROM contents ORDER BY file_path"
+            )]
+
+    def close(self):
+        self.fingerprints.close()
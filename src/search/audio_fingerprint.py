@@ -0,0 +1,277 @@
+import sqlite3
+import numpy as np
+import librosa
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .._lazy import lazy_import
+
+ndimage = lazy_import('scipy.ndimage')
+
+FINGERPRINT_SR = 11025
+N_FFT = 1024
+HOP_LENGTH = 256
+
+
+def landmark_hashes(audio: np.ndarray, sr: int, peaks_per_second: int = 30,
+                    fan_out: int = 5, max_dt: int = 63, max_df: int = 63) -> np.ndarray:
+    """
+    Spectral landmark fingerprint of an audio signal
+
+    Local maxima of the log spectrogram are paired with up to `fan_out`
+    later peaks in a target zone; each pair is packed into a 22-bit hash
+    of (anchor frequency, frequency delta, time delta). The hashes survive
+    re-encoding, gain changes and trimming, so re-uploads of the same
+    performance share many (hash, time offset) pairs.
+
+    Returns:
+        Array of shape (n, 2): hash and anchor frame for every landmark
+    """
+    if audio.ndim > 1:
+        audio = librosa.to_mono(audio)
+    if sr != FINGERPRINT_SR:
+        audio = librosa.resample(audio, orig_sr=sr, target_sr=FINGERPRINT_SR)
+
+    spec = np.abs(librosa.stft(audio, n_fft=N_FFT, hop_length=HOP_LENGTH))[:512]
+    log_spec = np.log(spec + 1e-6)
+    if log_spec.shape[1] == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+
+    is_peak = (log_spec == ndimage.maximum_filter(log_spec, size=(15, 11))) & \
+              (log_spec > log_spec.max() - 7.0)
+    freqs, frames = np.nonzero(is_peak)
+
+    # Keep the strongest peaks, at most `peaks_per_second` on average
+    duration = len(audio) / FINGERPRINT_SR
+    max_peaks = max(1, int(peaks_per_second * duration))
+    if len(freqs) > max_peaks:
+        strongest = np.argsort(log_spec[freqs, frames])[-max_peaks:]
+        freqs, frames = freqs[strongest], frames[strongest]
+
+    order = np.lexsort((freqs, frames))
+    freqs, frames = freqs[order], frames[order]
+
+    hashes, times = [], []
+    for i in range(len(frames)):
+        paired = 0
+        for j in range(i + 1, len(frames)):
+            dt = frames[j] - frames[i]
+            if dt > max_dt:
+                break
+            df = freqs[j] - freqs[i]
+            if dt == 0 or abs(df) > max_df:
+                continue
+            hashes.append((int(freqs[i]) << 13) | ((int(df) + 64) << 6) | int(dt))
+            times.append(int(frames[i]))
+            paired += 1
+            if paired >= fan_out:
+                break
+
+    return np.array([hashes, times], dtype=np.int64).T.reshape(-1, 2)
+
+
+def fingerprint_file(file_path: str, max_duration: Optional[float] = None) -> np.ndarray:
+    """Decode (mono, 11025 Hz) and fingerprint an audio file"""
+    audio, sr = librosa.load(file_path, sr=FINGERPRINT_SR, mono=True, duration=max_duration)
+    return landmark_hashes(audio, sr)
+
+
+class AudioFingerprintIndex:
+    """
+    Persistent inverted index of landmark hashes
+    Finds recordings that contain the same audio as a query, even when
+    re-encoded, re-leveled or trimmed differently
+
+    A match is a stack of shared hashes that agree on one time offset;
+    unrelated audio shares hashes only at scattered offsets.
+    """
+
+    def __init__(self, index_path: str = "data/index/fingerprint_index.db"):
+        self.index_path = Path(index_path)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.index_path), check_same_thread=False)
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS items (
+                    item_key INTEGER PRIMARY KEY,
+                    item_id TEXT NOT NULL UNIQUE,
+                    n_hashes INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS postings (
+                    hash INTEGER NOT NULL,
+                    item_key INTEGER NOT NULL,
+                    frame INTEGER NOT NULL,
+                    PRIMARY KEY (hash, item_key, frame)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_postings_item ON postings (item_key);
+                CREATE TABLE IF NOT EXISTS hash_stats (
+                    hash INTEGER PRIMARY KEY,
+                    n_items INTEGER NOT NULL
+                );
+            """)
+
+    def add(self, item_id: str, landmarks: np.ndarray):
+        """Index (or re-index) the landmarks from landmark_hashes() under an ID"""
+        with self.conn:
+            self._remove(item_id)
+            cursor = self.conn.execute(
+                "INSERT INTO items (item_id, n_hashes) VALUES (?, ?)", (item_id, len(landmarks))
+            )
+            item_key = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO postings VALUES (?, ?, ?)",
+                ((int(h), item_key, int(t)) for h, t in landmarks)
+            )
+            self.conn.executemany(
+                "INSERT INTO hash_stats VALUES (?, 1) "
+                "ON CONFLICT (hash) DO UPDATE SET n_items = n_items + 1",
+                ((int(h),) for h in np.unique(landmarks[:, 0]))
+            )
+
+    def remove(self, item_id: str):
+        with self.conn:
+            self._remove(item_id)
+
+    def _remove(self, item_id: str):
+        row = self.conn.execute(
+            "SELECT item_key FROM items WHERE item_id = ?", (item_id,)
+        ).fetchone()
+        if row is not None:
+            self.conn.execute(
+                "UPDATE hash_stats SET n_items = n_items - 1 WHERE hash IN "
+                "(SELECT DISTINCT hash FROM postings WHERE item_key = ?)", row
+            )
+            self.conn.execute("DELETE FROM hash_stats WHERE n_items <= 0")
+            self.conn.execute("DELETE FROM postings WHERE item_key = ?", row)
+            self.conn.execute("DELETE FROM items WHERE item_key = ?", row)
+
+    def query(self, landmarks: np.ndarray, min_matches: int = 40,
+              min_score: float = 0.08, limit: int = 10,
+              exclude: Optional[str] = None, stop_fraction: float = 0.1) -> List[Dict]:
+        """
+        Find indexed items that share time-aligned landmarks with the query
+
+        Args:
+            landmarks: Query landmarks from landmark_hashes()
+            min_matches: Minimum aligned hashes for a match
+            min_score: Minimum aligned hashes as a fraction of the smaller
+                of the two fingerprints
+            limit: Maximum number of matches
+            exclude: Item ID to leave out (e.g. the query itself)
+            stop_fraction: Ignore hashes found in more than this fraction
+                of items (at least 20), such as the khaen drone; they say
+                nothing about identity and dominate lookup cost
+
+        Returns:
+            List of {'item_id', 'matches', 'score', 'offset_seconds'},
+            best first; offset_seconds is where the query starts in the item
+        """
+        if len(landmarks) == 0:
+            return []
+
+        landmarks = self._drop_stop_hashes(landmarks, stop_fraction)
+        if len(landmarks) == 0:
+            return []
+
+        order = np.argsort(landmarks[:, 0], kind='stable')
+        query_hashes, query_frames = landmarks[order, 0], landmarks[order, 1]
+        unique_hashes = np.unique(query_hashes).tolist()
+
+        # Postings are clustered by hash, so each lookup is one range scan
+        rows = []
+        for start in range(0, len(unique_hashes), 500):
+            chunk = unique_hashes[start:start + 500]
+            rows.extend(self.conn.execute(
+                f"SELECT hash, item_key, frame FROM postings "
+                f"WHERE hash IN ({','.join('?' * len(chunk))})", chunk
+            ))
+        if not rows:
+            return []
+        row_hashes, row_items, row_frames = np.array(rows, dtype=np.int64).T
+
+        # Pair every posting with every query landmark of the same hash
+        lo = np.searchsorted(query_hashes, row_hashes, side='left')
+        counts = np.searchsorted(query_hashes, row_hashes, side='right') - lo
+        row_index = np.repeat(np.arange(len(rows)), counts)
+        query_index = lo[row_index] + np.arange(len(row_index)) - np.repeat(np.cumsum(counts) - counts, counts)
+        deltas = row_frames[row_index] - query_frames[query_index]
+
+        # Histogram of (item, offset); adjacent offsets are merged because
+        # frame grids rarely line up exactly
+        span = 1 << 32
+        keys, key_counts = np.unique(row_items[row_index] * span + deltas + span // 2,
+                                     return_counts=True)
+        next_index = np.searchsorted(keys, keys + 1)
+        has_next = (next_index < len(keys)) & (keys[np.minimum(next_index, len(keys) - 1)] == keys + 1)
+        merged = key_counts + np.where(has_next, key_counts[np.minimum(next_index, len(keys) - 1)], 0)
+
+        # Best offset per item: last entry of each item after sorting by count
+        item_keys = keys // span
+        order = np.lexsort((merged, item_keys))
+        last = np.r_[item_keys[order][1:] != item_keys[order][:-1], True]
+        best = order[last]
+        best = best[merged[best] >= min_matches]
+
+        candidates = [
+            (count, item_key, delta)
+            for count, item_key, delta in zip(merged[best].tolist(), item_keys[best].tolist(),
+                                               (keys[best] % span - span // 2).tolist())
+        ]
+
+        if not candidates:
+            return []
+
+        items = {
+            item_key: (item_id, n_hashes)
+            for item_key, item_id, n_hashes in self.conn.execute(
+                f"SELECT item_key, item_id, n_hashes FROM items "
+                f"WHERE item_key IN ({','.join('?' * len(candidates))})",
+                [item_key for _, item_key, _ in candidates]
+            )
+        }
+
+        matches = []
+        for count, item_key, delta in sorted(candidates, reverse=True):
+            item_id, n_hashes = items[item_key]
+            if item_id == exclude:
+                continue
+            score = count / max(1, min(len(landmarks), n_hashes))
+            if score < min_score:
+                continue
+            matches.append({
+                'item_id': item_id,
+                'matches': int(count),
+                'score': float(min(score, 1.0)),
+                'offset_seconds': float(delta * HOP_LENGTH / FINGERPRINT_SR)
+            })
+            if len(matches) >= limit:
+                break
+
+        return matches
+
+    def _drop_stop_hashes(self, landmarks: np.ndarray, stop_fraction: float) -> np.ndarray:
+        max_items = max(20, int(stop_fraction * len(self)))
+        unique_hashes = np.unique(landmarks[:, 0]).tolist()
+
+        stop = []
+        for start in range(0, len(unique_hashes), 500):
+            chunk = unique_hashes[start:start + 500]
+            stop.extend(h for (h,) in self.conn.execute(
+                f"SELECT hash FROM hash_stats WHERE n_items > ? "
+                f"AND hash IN ({','.join('?' * len(chunk))})", [max_items] + chunk
+            ))
+
+        if not stop:
+            return landmarks
+        return landmarks[~np.isin(landmarks[:, 0], stop)]
+
+    def __contains__(self, item_id: str) -> bool:
+        return self.conn.execute(
+            "SELECT 1 FROM items WHERE item_id = ?", (item_id,)
+        ).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
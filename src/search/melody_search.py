@@ -0,0 +1,228 @@
+import heapq
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+
+def pitch_contour(transcription: Dict, length: int = 64) -> np.ndarray:
+    """
+    Resample a transcription's melody to a fixed-length pitch contour
+
+    The contour is a step function of MIDI pitch (each note held until the
+    next onset) sampled at `length` evenly spaced points and mean-centred,
+    so performances in different keys and tempos are comparable.
+    """
+    notes = sorted(transcription['notes'], key=lambda note: note['onset_time'])
+    if len(notes) == 0:
+        raise ValueError("Transcription has no notes")
+
+    onsets = np.array([note['onset_time'] for note in notes])
+    pitches = np.array([note['midi_note'] for note in notes], dtype=float)
+    end = max(note['onset_time'] + note['duration'] for note in notes)
+
+    sample_times = np.linspace(onsets[0], end, length, endpoint=False)
+    note_index = np.searchsorted(onsets, sample_times, side='right') - 1
+    contour = pitches[np.clip(note_index, 0, len(notes) - 1)]
+
+    return contour - contour.mean()
+
+
+def envelope(contour: np.ndarray, radius: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Upper and lower Keogh envelopes of a contour for a warping band radius"""
+    padded = np.pad(contour, radius, mode='edge')
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * radius + 1, axis=-1)
+    return windows.max(axis=-1), windows.min(axis=-1)
+
+
+def lb_keogh(query_upper: np.ndarray, query_lower: np.ndarray,
+             candidates: np.ndarray) -> np.ndarray:
+    """LB_Keogh lower bound of the banded DTW distance for every candidate row"""
+    above = np.maximum(candidates - query_upper, 0.0)
+    below = np.maximum(query_lower - candidates, 0.0)
+    return np.sqrt(np.sum(above ** 2 + below ** 2, axis=1))
+
+
+def banded_dtw(query: np.ndarray, candidates: np.ndarray, radius: int,
+               threshold: float = np.inf) -> np.ndarray:
+    """
+    Sakoe-Chiba banded DTW between one query and a batch of candidates
+
+    The recurrence is vectorized over the batch, so the Python loop runs
+    over band cells only. Candidates whose every cell in a row already
+    exceeds `threshold` are abandoned early and reported as inf.
+
+    Returns:
+        Array of DTW distances (square root of summed squared differences)
+    """
+    n_candidates, length = candidates.shape
+    limit = threshold ** 2
+    previous = np.full((n_candidates, length + 1), np.inf)
+    previous[:, 0] = 0.0
+    alive = np.ones(n_candidates, dtype=bool)
+
+    for i in range(1, length + 1):
+        current = np.full((n_candidates, length + 1), np.inf)
+        j_start = max(1, i - radius)
+        j_end = min(length, i + radius)
+
+        costs = (query[i - 1] - candidates[:, j_start - 1:j_end]) ** 2
+        diagonal_or_up = np.minimum(previous[:, j_start - 1:j_end], previous[:, j_start:j_end + 1])
+
+        left = current[:, j_start - 1]
+        for offset in range(j_end - j_start + 1):
+            left = costs[:, offset] + np.minimum(diagonal_or_up[:, offset], left)
+            current[:, j_start + offset] = left
+
+        alive &= current[:, j_start:j_end + 1].min(axis=1) <= limit
+        if not alive.any():
+            return np.full(n_candidates, np.inf)
+        previous = current
+
+    distances = np.sqrt(previous[:, length])
+    distances[~alive] = np.inf
+    return distances
+
+
+def _dtw_chunk(args) -> List[Tuple[float, int]]:
+    query, candidates, indices, radius, threshold = args
+    distances = banded_dtw(query, candidates, radius, threshold)
+    return [(float(d), int(i)) for d, i in zip(distances, indices) if np.isfinite(d)]
+
+
+class MelodySimilarityIndex:
+    """
+    k-nearest-melody search over MusicTranscriber pitch sequences
+
+    Candidates are ranked by a cheap LB_Keogh lower bound computed for the
+    whole corpus in one vectorized pass; exact banded DTW only runs on
+    candidates whose bound can still beat the current k-th best match.
+    """
+
+    def __init__(self, contour_length: int = 64, band_ratio: float = 0.1):
+        self.contour_length = contour_length
+        self.radius = max(1, int(round(contour_length * band_ratio)))
+        self.recording_ids: List[str] = []
+        self.contours = np.zeros((0, contour_length))
+        self.last_search_stats: Dict = {}
+
+    def add(self, recording_id: str, transcription: Dict):
+        self.add_many([(recording_id, transcription)])
+
+    def add_many(self, items: Iterable[Tuple[str, Dict]]) -> int:
+        """Add (recording_id, transcription) pairs; transcriptions without notes are skipped"""
+        ids, contours = [], []
+        for recording_id, transcription in items:
+            if len(transcription['notes']) == 0:
+                continue
+            ids.append(recording_id)
+            contours.append(pitch_contour(transcription, self.contour_length))
+
+        if contours:
+            self.recording_ids.extend(ids)
+            self.contours = np.vstack([self.contours, np.array(contours)])
+        return len(ids)
+
+    def __len__(self) -> int:
+        return len(self.recording_ids)
+
+    def save(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            recording_ids=np.array(self.recording_ids),
+            contours=self.contours,
+            radius=self.radius
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'MelodySimilarityIndex':
+        data = np.load(path, allow_pickle=False)
+        index = cls(contour_length=data['contours'].shape[1])
+        index.radius = int(data['radius'])
+        index.recording_ids = data['recording_ids'].tolist()
+        index.contours = data['contours']
+        return index
+
+    def search(self, query: Union[Dict, np.ndarray], k: int = 5,
+               batch_size: int = 256, workers: Optional[int] = None) -> List[Dict]:
+        """
+        Find the k recordings whose melodies are closest to the query
+
+        Args:
+            query: A transcription dict or a contour from pitch_contour()
+            k: Number of results
+            batch_size: Candidates per vectorized DTW batch
+            workers: Run DTW for the surviving candidates on a process pool
+                of this size (for large corpora); None searches in-process
+
+        Returns:
+            List of {'recording_id', 'distance'} sorted by distance
+        """
+        if len(self) == 0:
+            return []
+
+        if isinstance(query, dict):
+            query = pitch_contour(query, self.contour_length)
+        query = np.asarray(query, dtype=float)
+
+        k = min(k, len(self))
+        upper, lower = envelope(query, self.radius)
+        bounds = lb_keogh(upper, lower, self.contours)
+        order = np.argsort(bounds)
+
+        # Seed the k-th best distance from the most promising candidates
+        seed = order[:max(k, batch_size)]
+        best = [(-d, int(i)) for d, i in zip(
+            banded_dtw(query, self.contours[seed], self.radius), seed
+        )]
+        best = heapq.nsmallest(k, best, key=lambda item: -item[0])
+        heapq.heapify(best)
+        dtw_count = len(seed)
+
+        remaining = order[len(seed):]
+        threshold = -best[0][0] if len(best) == k else np.inf
+        remaining = remaining[bounds[remaining] < threshold]
+
+        if workers and len(remaining) > batch_size:
+            chunks = [
+                (query, self.contours[chunk], chunk, self.radius, threshold)
+                for chunk in np.array_split(remaining, workers * 4)
+                if len(chunk) > 0
+            ]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for found in executor.map(_dtw_chunk, chunks):
+                    for distance, idx in found:
+                        self._push(best, k, distance, idx)
+            dtw_count += len(remaining)
+        else:
+            for start in range(0, len(remaining), batch_size):
+                batch = remaining[start:start + batch_size]
+                threshold = -best[0][0] if len(best) == k else np.inf
+                batch = batch[bounds[batch] < threshold]
+                if len(batch) == 0:
+                    break
+                distances = banded_dtw(query, self.contours[batch], self.radius, threshold)
+                dtw_count += len(batch)
+                for distance, idx in zip(distances, batch):
+                    if np.isfinite(distance):
+                        self._push(best, k, float(distance), int(idx))
+
+        self.last_search_stats = {
+            'corpus_size': len(self),
+            'dtw_computed': dtw_count,
+            'pruned': len(self) - dtw_count
+        }
+
+        results = sorted((-neg_distance, idx) for neg_distance, idx in best)
+        return [
+            {'recording_id': self.recording_ids[idx], 'distance': float(distance)}
+            for distance, idx in results
+        ]
+
+    @staticmethod
+    def _push(best: list, k: int, distance: float, idx: int):
+        if len(best) < k:
+            heapq.heappush(best, (-distance, idx))
+        elif distance < -best[0][0]:
+            heapq.heapreplace(best, (-distance, idx))
@@ -0,0 +1,231 @@
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from datetime import datetime
+
+
+class PatternIndex:
+    """
+    Persistent n-gram index over transcribed melodies
+    Answers "where else does this lai (ลาย) phrase occur?" across a corpus
+    without rescanning every transcription
+
+    Each transcription is indexed three ways:
+    - 'pitch': MIDI note n-grams (exact pitch)
+    - 'interval': n-grams of semitone steps between notes (transposition invariant)
+    - 'notation': Thai notation n-grams (ด ร ม ฟ ซ ล ท with octave)
+    """
+
+    MODES = ('pitch', 'interval', 'notation')
+
+    def __init__(self, index_path: str = "data/index/pattern_index.db", n: int = 4):
+        self.index_path = Path(index_path)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.index_path))
+        self._create_schema()
+        self.n = self._check_gram_size(n)
+
+    def _create_schema(self):
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS recordings (
+                    recording_id TEXT PRIMARY KEY,
+                    midi_notes TEXT NOT NULL,
+                    notation TEXT NOT NULL,
+                    onsets_ms TEXT NOT NULL,
+                    offsets_ms TEXT NOT NULL,
+                    indexed_at TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS postings (
+                    mode TEXT NOT NULL,
+                    gram TEXT NOT NULL,
+                    recording_id TEXT NOT NULL,
+                    position INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_postings_gram ON postings (mode, gram);
+                CREATE INDEX IF NOT EXISTS idx_postings_recording ON postings (recording_id);
+            """)
+
+    def _check_gram_size(self, n: int) -> int:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'n'").fetchone()
+        if row is None:
+            with self.conn:
+                self.conn.execute("INSERT INTO meta (key, value) VALUES ('n', ?)", (str(n),))
+            return n
+        if int(row[0]) != n:
+            raise ValueError(
+                f"Index at {self.index_path} was built with n={row[0]}, not n={n}"
+            )
+        return n
+
+    @staticmethod
+    def _tokens(mode: str, midi_notes: Sequence[int], notation: Sequence[str]) -> List[str]:
+        if mode == 'pitch':
+            return [str(int(m)) for m in midi_notes]
+        if mode == 'interval':
+            return [str(int(b) - int(a)) for a, b in zip(midi_notes[:-1], midi_notes[1:])]
+        if mode == 'notation':
+            return list(notation)
+        raise ValueError(f"Unknown search mode: {mode}. Use one of {PatternIndex.MODES}")
+
+    def _grams(self, tokens: List[str]) -> List[Tuple[str, int]]:
+        return [
+            (' '.join(tokens[i:i + self.n]), i)
+            for i in range(len(tokens) - self.n + 1)
+        ]
+
+    def add_transcription(self, recording_id: str, transcription: Dict):
+        """Index (or re-index) the notes of one MusicTranscriber.transcribe() result"""
+        self.add_transcriptions([(recording_id, transcription)])
+
+    def add_transcriptions(self, items: Iterable[Tuple[str, Dict]]) -> int:
+        """
+        Index many transcriptions in a single transaction
+
+        Args:
+            items: (recording_id, transcription) pairs
+
+        Returns:
+            Number of transcriptions indexed
+        """
+        count = 0
+        with self.conn:
+            for recording_id, transcription in items:
+                notes = sorted(transcription['notes'], key=lambda note: note['onset_time'])
+                midi_notes = [int(note['midi_note']) for note in notes]
+                notation = [note['thai_notation'] for note in notes]
+                onsets_ms = [int(round(note['onset_time'] * 1000)) for note in notes]
+                offsets_ms = [
+                    int(round((note['onset_time'] + note['duration']) * 1000)) for note in notes
+                ]
+
+                self.conn.execute("DELETE FROM postings WHERE recording_id = ?", (recording_id,))
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO recordings VALUES (?, ?, ?, ?, ?, ?)",
+                    (recording_id, json.dumps(midi_notes),
+                     json.dumps(notation, ensure_ascii=False),
+                     json.dumps(onsets_ms), json.dumps(offsets_ms),
+                     datetime.now().isoformat())
+                )
+
+                for mode in self.MODES:
+                    tokens = self._tokens(mode, midi_notes, notation)
+                    self.conn.executemany(
+                        "INSERT INTO postings VALUES (?, ?, ?, ?)",
+                        ((mode, gram, recording_id, position)
+                         for gram, position in self._grams(tokens))
+                    )
+                count += 1
+        return count
+
+    def remove(self, recording_id: str):
+        with self.conn:
+            self.conn.execute("DELETE FROM postings WHERE recording_id = ?", (recording_id,))
+            self.conn.execute("DELETE FROM recordings WHERE recording_id = ?", (recording_id,))
+
+    def _load_recording(self, recording_id: str) -> Dict:
+        row = self.conn.execute(
+            "SELECT midi_notes, notation, onsets_ms, offsets_ms FROM recordings "
+            "WHERE recording_id = ?", (recording_id,)
+        ).fetchone()
+        midi_notes, notation, onsets_ms, offsets_ms = (json.loads(col) for col in row)
+        return {
+            'midi_notes': midi_notes,
+            'notation': notation,
+            'onsets_ms': onsets_ms,
+            'offsets_ms': offsets_ms
+        }
+
+    def search(self, phrase: Union[Sequence[int], Sequence[str], str],
+               mode: str = 'interval', limit: Optional[int] = None) -> List[Dict]:
+        """
+        Find every occurrence of a phrase in the indexed corpus
+
+        Args:
+            phrase: MIDI notes for 'pitch'/'interval' mode, Thai notation
+                tokens (list or space-separated string) for 'notation' mode
+            mode: 'interval' (any transposition), 'pitch' or 'notation'
+            limit: Maximum number of matches to return
+
+        Returns:
+            List of matches with recording_id, note position, start_ms,
+            end_ms and, for interval queries, the transposition in semitones
+        """
+        if isinstance(phrase, str):
+            phrase = phrase.split()
+
+        if mode == 'notation':
+            query = self._tokens(mode, [], [str(token) for token in phrase])
+        else:
+            query = self._tokens(mode, [int(m) for m in phrase], [])
+
+        if len(query) < self.n:
+            needed = self.n + 1 if mode == 'interval' else self.n
+            raise ValueError(f"Query phrase needs at least {needed} notes for {mode} search")
+
+        query_grams = self._grams(query)
+
+        # Drive the search from the rarest gram, then verify the full phrase
+        counts = [
+            (self.conn.execute(
+                "SELECT COUNT(*) FROM postings WHERE mode = ? AND gram = ?", (mode, gram)
+            ).fetchone()[0], gram, offset)
+            for gram, offset in query_grams
+        ]
+        _, anchor_gram, anchor_offset = min(counts)
+
+        postings = self.conn.execute(
+            "SELECT recording_id, position FROM postings WHERE mode = ? AND gram = ? "
+            "ORDER BY recording_id, position", (mode, anchor_gram)
+        ).fetchall()
+
+        matches = []
+        cache: Dict[str, Dict] = {}
+        phrase_notes = len(query) + 1 if mode == 'interval' else len(query)
+
+        for recording_id, position in postings:
+            start = position - anchor_offset
+            if start < 0:
+                continue
+
+            if recording_id not in cache:
+                recording = self._load_recording(recording_id)
+                recording['tokens'] = self._tokens(
+                    mode, recording['midi_notes'], recording['notation']
+                )
+                cache[recording_id] = recording
+            recording = cache[recording_id]
+
+            if recording['tokens'][start:start + len(query)] != query:
+                continue
+
+            match = {
+                'recording_id': recording_id,
+                'position': start,
+                'start_ms': recording['onsets_ms'][start],
+                'end_ms': recording['offsets_ms'][start + phrase_notes - 1]
+            }
+            if mode == 'interval':
+                match['transposition'] = recording['midi_notes'][start] - int(phrase[0])
+            matches.append(match)
+
+            if limit is not None and len(matches) >= limit:
+                break
+
+        return matches
+
+    def recording_ids(self) -> List[str]:
+        return [row[0] for row in self.conn.execute(
+            "SELECT recording_id FROM recordings ORDER BY recording_id"
+        )]
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM recordings").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,160 @@
+import numpy as np
+import librosa
+from typing import Dict
+
+
+class MultiPitchDetector:
+    """
+    Frame-level multi-pitch analysis using a harmonic-sum spectrum
+    Handles khaen chords and drones, where one peak per window is not enough
+
+    The STFT is computed once, block by block, and every candidate
+    fundamental is scored for every frame with a single matrix product
+    against a precomputed harmonic template, so cost grows linearly with
+    audio length and memory stays bounded by the block size.
+    """
+
+    def __init__(self, sr: int = 22050, n_fft: int = 4096, hop_length: int = 512,
+                 n_harmonics: int = 5, harmonic_decay: float = 0.8,
+                 bins_per_semitone: int = 3, fmin: str = 'C2', fmax: str = 'C6',
+                 compression: float = 10.0, block_frames: int = 2048):
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_harmonics = n_harmonics
+        self.harmonic_decay = harmonic_decay
+        self.bins_per_semitone = bins_per_semitone
+        self.fmin = librosa.note_to_hz(fmin)
+        self.fmax = librosa.note_to_hz(fmax)
+        self.compression = compression
+        self.block_frames = block_frames
+
+        min_midi = librosa.hz_to_midi(self.fmin)
+        max_midi = librosa.hz_to_midi(self.fmax)
+        n_candidates = int(round((max_midi - min_midi) * bins_per_semitone)) + 1
+        self.candidate_midi = min_midi + np.arange(n_candidates) / bins_per_semitone
+        self.candidate_freqs = librosa.midi_to_hz(self.candidate_midi)
+
+        self.window = np.hanning(n_fft).astype(np.float32)
+        self.harmonic_template = self._build_harmonic_template()
+
+    def _build_harmonic_template(self) -> np.ndarray:
+        """
+        Weights mapping an rfft magnitude frame to harmonic-sum salience
+
+        Row c sums the magnitudes at harmonics 1..n_harmonics of candidate c,
+        linearly interpolated between the two nearest bins.
+        """
+        n_bins = self.n_fft // 2 + 1
+        template = np.zeros((len(self.candidate_freqs), n_bins), dtype=np.float32)
+
+        for c, f0 in enumerate(self.candidate_freqs):
+            for h in range(1, self.n_harmonics + 1):
+                position = h * f0 * self.n_fft / self.sr
+                lo = int(np.floor(position))
+                if lo + 1 >= n_bins:
+                    break
+                frac = position - lo
+                weight = self.harmonic_decay ** (h - 1)
+                template[c, lo] += weight * (1 - frac)
+                template[c, lo + 1] += weight * frac
+
+        return template
+
+    def _frame_blocks(self, audio: np.ndarray):
+        padded = np.pad(audio.astype(np.float32), self.n_fft // 2)
+        if len(padded) < self.n_fft:
+            padded = np.pad(padded, (0, self.n_fft - len(padded)))
+
+        frames = np.lib.stride_tricks.sliding_window_view(padded, self.n_fft)[::self.hop_length]
+
+        for start in range(0, len(frames), self.block_frames):
+            yield frames[start:start + self.block_frames]
+
+    def compute_salience(self, audio: np.ndarray) -> np.ndarray:
+        """
+        Harmonic-sum salience for every candidate pitch and frame
+
+        Returns:
+            Array of shape (n_candidates, n_frames). For long recordings
+            prefer detect_pitches, which never holds the full matrix.
+        """
+        blocks = [self._block_salience(block) for block in self._frame_blocks(audio)]
+        return np.concatenate(blocks, axis=1)
+
+    def _block_salience(self, frames: np.ndarray) -> np.ndarray:
+        spectrum = np.abs(np.fft.rfft(frames * self.window, axis=1))
+        spectrum = np.log1p(self.compression * spectrum)
+        return self.harmonic_template @ spectrum.T
+
+    def _top_k(self, salience: np.ndarray, k: int, relative_threshold: float):
+        """Top-k local maxima along the pitch axis for every frame"""
+        n_candidates, n_frames = salience.shape
+
+        is_peak = np.zeros_like(salience, dtype=bool)
+        is_peak[1:-1] = (salience[1:-1] >= salience[:-2]) & (salience[1:-1] > salience[2:])
+
+        frame_max = salience.max(axis=0, keepdims=True)
+        is_peak &= salience >= relative_threshold * frame_max
+
+        peaks = np.where(is_peak, salience, 0.0)
+        k = min(k, n_candidates)
+        top = np.argpartition(-peaks, k - 1, axis=0)[:k]
+        top_salience = np.take_along_axis(peaks, top, axis=0)
+
+        order = np.argsort(-top_salience, axis=0)
+        top = np.take_along_axis(top, order, axis=0)
+        top_salience = np.take_along_axis(top_salience, order, axis=0)
+
+        return top.T, top_salience.T
+
+    def detect_pitches(self, audio: np.ndarray, k: int = 4,
+                       relative_threshold: float = 0.5,
+                       min_salience: float = 0.2) -> Dict:
+        """
+        Detect up to k simultaneous pitches in every frame
+
+        Args:
+            audio: Audio signal
+            k: Maximum number of pitch candidates per frame
+            relative_threshold: Candidates weaker than this fraction of the
+                frame's strongest salience are dropped
+            min_salience: Candidates below this fraction of the recording's
+                strongest salience are dropped (silences, noise floor)
+
+        Returns:
+            Dictionary with per-frame 'times' and (n_frames, k) arrays of
+            'frequencies', 'midi_notes' and 'salience' (0-1, sorted strongest
+            first; empty slots are 0)
+        """
+        candidate_blocks = []
+        salience_blocks = []
+
+        for frames in self._frame_blocks(audio):
+            salience = self._block_salience(frames)
+            candidates, top_salience = self._top_k(salience, k, relative_threshold)
+            candidate_blocks.append(candidates)
+            salience_blocks.append(top_salience)
+
+        candidates = np.concatenate(candidate_blocks, axis=0)
+        salience = np.concatenate(salience_blocks, axis=0)
+
+        peak = salience.max() if salience.size > 0 else 0.0
+        if peak > 0:
+            salience = salience / peak
+
+        active = salience >= min_salience
+        salience = np.where(active, salience, 0.0).astype(np.float32)
+        frequencies = np.where(active, self.candidate_freqs[candidates], 0.0)
+        midi_notes = np.where(active, np.round(self.candidate_midi[candidates]), 0).astype(int)
+
+        times = librosa.frames_to_time(
+            np.arange(len(candidates)), sr=self.sr, hop_length=self.hop_length
+        )
+
+        return {
+            'times': times,
+            'frequencies': frequencies,
+            'midi_notes': midi_notes,
+            'salience': salience
+        }
@@ -1,10 +1,15 @@
 import numpy as np
-import pretty_midi
+import librosa
 from typing import List, Dict, Tuple
 from pathlib import Path
 
+from .._lazy import lazy_import
 from .onset_detector import OnsetDetector
 from .pitch_detector import PitchDetector
+from .multi_pitch_detector import MultiPitchDetector
+
+# Only to_midi() needs it
+pretty_midi = lazy_import('pretty_midi')
 
 
 class MusicTranscriber:
@@ -17,18 +22,31 @@ class MusicTranscriber:
         self.sr = sr
         self.onset_detector = OnsetDetector(sr=sr)
         self.pitch_detector = PitchDetector(sr=sr)
+        self.multi_pitch_detector = MultiPitchDetector(sr=sr)
     
     def transcribe(self, audio: np.ndarray, 
-                   min_note_confidence: float = 0.3) -> Dict:
+                   min_note_confidence: float = 0.3,
+                   threshold_ratio: float = 1.5,
+                   min_duration: float = 0.05,
+                   window_size: float = 0.03) -> Dict:
         """
         Transcribe audio to musical notes
         
+        Args:
+            audio: Audio signal
+            min_note_confidence: Drop notes whose pitch confidence is below this
+            threshold_ratio: Onset threshold multiplier (see OnsetDetector.detect_onsets)
+            min_duration: Minimum time between onsets (seconds)
+            window_size: Pitch analysis window around each onset (seconds)
+        
         Returns:
             Dictionary containing detected notes with timing and pitch information
         """
         audio_duration = len(audio) / self.sr
         
-        onset_times = self.onset_detector.detect_onsets(audio)
+        onset_times = self.onset_detector.detect_onsets(
+            audio, threshold_ratio=threshold_ratio, min_duration=min_duration
+        )
         
         if len(onset_times) == 0:
             onset_times = np.array([0.0])
@@ -38,7 +56,7 @@ class MusicTranscriber:
         notes = []
         for onset_time, duration in zip(onset_times, durations):
             freq, confidence, midi_note, note_name, thai_note = \
-                self.pitch_detector.detect_pitch_at_time(audio, onset_time)
+                self.pitch_detector.detect_pitch_at_time(audio, onset_time, window_size=window_size)
             
             if confidence >= min_note_confidence and midi_note > 0:
                 notes.append({
@@ -58,6 +76,82 @@ class MusicTranscriber:
             'transcription_method': 'EWMA+FFT (KMUTT approach)'
         }
     
+    def transcribe_polyphonic(self, audio: np.ndarray,
+                              max_polyphony: int = 4,
+                              min_salience: float = 0.2,
+                              min_note_duration: float = 0.1,
+                              max_gap: float = 0.05) -> Dict:
+        """
+        Transcribe audio that may contain simultaneous notes (khaen chords, drones)
+        
+        Args:
+            audio: Audio signal
+            max_polyphony: Maximum number of simultaneous pitches per frame
+            min_salience: Minimum normalized harmonic-sum salience (0-1)
+            min_note_duration: Shorter notes are discarded (seconds)
+            max_gap: Dropouts up to this long inside a note are bridged (seconds)
+        
+        Returns:
+            Dictionary in the same format as transcribe(); notes may overlap
+            and each note carries its mean 'salience'
+        """
+        audio_duration = len(audio) / self.sr
+        pitches = self.multi_pitch_detector.detect_pitches(
+            audio, k=max_polyphony, min_salience=min_salience
+        )
+        
+        frame_time = self.multi_pitch_detector.hop_length / self.sr
+        max_gap_frames = int(round(max_gap / frame_time))
+        min_frames = max(1, int(round(min_note_duration / frame_time)))
+        
+        midi_frames = pitches['midi_notes']
+        salience_frames = pitches['salience']
+        times = pitches['times']
+        
+        notes = []
+        for midi_note in np.unique(midi_frames[midi_frames > 0]):
+            matches = midi_frames == midi_note
+            active = matches.any(axis=1)
+            salience = np.where(matches, salience_frames, 0.0).max(axis=1)
+            
+            edges = np.diff(np.concatenate(([0], active.astype(np.int8), [0])))
+            starts = np.flatnonzero(edges == 1)
+            ends = np.flatnonzero(edges == -1)
+            
+            if len(starts) > 1:
+                keep = np.concatenate(([True], starts[1:] - ends[:-1] > max_gap_frames))
+                starts = starts[keep]
+                ends = ends[np.concatenate((keep[1:], [True]))]
+            
+            for start, end in zip(starts, ends):
+                if end - start < min_frames:
+                    continue
+                
+                note_salience = salience[start:end]
+                note_salience = note_salience[note_salience > 0]
+                midi_int = int(midi_note)
+                onset_time = float(times[start])
+                
+                notes.append({
+                    'onset_time': onset_time,
+                    'duration': float(min(times[end - 1] + frame_time, audio_duration) - onset_time),
+                    'frequency': float(librosa.midi_to_hz(midi_int)),
+                    'midi_note': midi_int,
+                    'note_name': self.pitch_detector.midi_to_note_name(midi_int),
+                    'thai_notation': self.pitch_detector.midi_to_thai_notation(midi_int),
+                    'confidence': float(note_salience.max()),
+                    'salience': float(note_salience.mean())
+                })
+        
+        notes.sort(key=lambda note: (note['onset_time'], note['midi_note']))
+        
+        return {
+            'notes': notes,
+            'total_notes': len(notes),
+            'audio_duration': audio_duration,
+            'transcription_method': 'Harmonic-sum multi-pitch'
+        }
+    
     def to_midi(self, transcription: Dict, output_path: str, 
                 instrument_name: str = "Phin", tempo: int = 120):
         """
@@ -1,7 +1,6 @@
 import numpy as np
 import librosa
 from typing import List, Tuple
-from scipy.signal import find_peaks
 
 
 class OnsetDetector:
@@ -1,7 +1,10 @@
 import numpy as np
 import librosa
-from typing import List, Tuple, Optional
-from scipy.signal import find_peaks
+from typing import Dict, List, Tuple, Optional
+
+from .._lazy import lazy_import
+
+scipy_signal = lazy_import('scipy.signal')
 
 
 class PitchDetector:
@@ -10,11 +13,13 @@ class PitchDetector:
     Based on KMUTT research: achieved 97.34% F1-score for Thai instruments
     """
     
-    def __init__(self, sr: int = 22050, hop_length: int = 512):
+    def __init__(self, sr: int = 22050, hop_length: int = 512, zero_pad_factor: int = 4):
         self.sr = sr
         self.hop_length = hop_length
         self.fmin = librosa.note_to_hz('C2')
         self.fmax = librosa.note_to_hz('C7')
+        self.zero_pad_factor = zero_pad_factor
+        self._plans: Dict[int, Tuple[np.ndarray, int, int, int]] = {}
     
     def detect_pitch_fft(self, audio_segment: np.ndarray) -> Tuple[float, float]:
         """
@@ -35,7 +40,7 @@ class PitchDetector:
         valid_freqs = freqs[valid_idx]
         valid_mag = magnitude[valid_idx]
         
-        peaks, properties = find_peaks(valid_mag, height=np.max(valid_mag) * 0.3)
+        peaks, properties = scipy_signal.find_peaks(valid_mag, height=np.max(valid_mag) * 0.3)
         
         if len(peaks) == 0:
             max_idx = np.argmax(valid_mag)
@@ -49,6 +54,67 @@ class PitchDetector:
         
         return float(freq), confidence
     
+    def _get_plan(self, n_samples: int) -> Tuple[np.ndarray, int, int, int]:
+        """
+        Analysis window, padded FFT length and fmin..fmax bin range for a
+        segment length, computed once per length and reused
+        """
+        plan = self._plans.get(n_samples)
+        if plan is None:
+            window = np.hanning(n_samples)
+            n_fft = 1 << int(np.ceil(np.log2(n_samples * self.zero_pad_factor)))
+            lo_bin = int(np.ceil(self.fmin * n_fft / self.sr))
+            hi_bin = int(np.floor(self.fmax * n_fft / self.sr)) + 1
+            plan = (window, n_fft, lo_bin, min(hi_bin, n_fft // 2 + 1))
+            self._plans[n_samples] = plan
+        return plan
+    
+    def detect_pitch_interpolated(self, audio_segment: np.ndarray) -> Tuple[float, float]:
+        """
+        Detect pitch with a windowed, zero-padded FFT and parabolic peak interpolation
+        
+        Picks the same strongest peak as detect_pitch_fft, but refines its
+        frequency between bins, so short windows stay semitone-accurate
+        at low pitches.
+        
+        Returns:
+            (frequency_hz, confidence)
+        """
+        window, n_fft, lo_bin, hi_bin = self._get_plan(len(audio_segment))
+        
+        if hi_bin - lo_bin < 3:
+            return 0.0, 0.0
+        
+        magnitude = np.abs(np.fft.rfft(audio_segment * window, n=n_fft))
+        valid_mag = magnitude[lo_bin:hi_bin]
+        max_mag = np.max(valid_mag)
+        
+        if max_mag <= 0:
+            return 0.0, 0.0
+        
+        peaks, properties = scipy_signal.find_peaks(valid_mag, height=max_mag * 0.3)
+        
+        if len(peaks) == 0:
+            peak = int(np.argmax(valid_mag))
+            height = valid_mag[peak]
+        else:
+            strongest = np.argmax(properties['peak_heights'])
+            peak = int(peaks[strongest])
+            height = properties['peak_heights'][strongest]
+        
+        bin_index = lo_bin + peak
+        offset = 0.0
+        if 0 < bin_index < len(magnitude) - 1:
+            alpha, beta, gamma = np.log(magnitude[bin_index - 1:bin_index + 2] + 1e-12)
+            denominator = alpha - 2 * beta + gamma
+            if denominator < 0:
+                offset = float(np.clip(0.5 * (alpha - gamma) / denominator, -0.5, 0.5))
+        
+        freq = (bin_index + offset) * self.sr / n_fft
+        confidence = float(height / max_mag)
+        
+        return float(freq), confidence
+    
     def detect_pitch_librosa(self, audio_segment: np.ndarray) -> Tuple[float, float]:
         """Alternative pitch detection using librosa's piptrack"""
         pitches, magnitudes = librosa.piptrack(
@@ -124,10 +190,17 @@ class PitchDetector:
     
     def detect_pitch_at_time(self, audio: np.ndarray, 
                             time: float, 
-                            window_size: float = 0.05) -> Tuple[float, float, int, str, str]:
+                            window_size: float = 0.05,
+                            method: str = 'interpolated') -> Tuple[float, float, int, str, str]:
         """
         Detect pitch at a specific time point
         
+        Args:
+            audio: Audio signal
+            time: Analysis centre in seconds
+            window_size: Analysis window length in seconds
+            method: 'interpolated' (detect_pitch_interpolated) or 'fft' (detect_pitch_fft)
+        
         Returns:
             (frequency, confidence, midi_note, note_name, thai_notation)
         """
@@ -142,7 +215,12 @@ class PitchDetector:
         
         segment = audio[start_sample:end_sample]
         
-        freq, confidence = self.detect_pitch_fft(segment)
+        if method == 'interpolated':
+            freq, confidence = self.detect_pitch_interpolated(segment)
+        elif method == 'fft':
+            freq, confidence = self.detect_pitch_fft(segment)
+        else:
+            raise ValueError(f"Unknown pitch detection method: {method}")
         
         midi_note = self.frequency_to_midi(freq)
         note_name = self.midi_to_note_name(midi_note)
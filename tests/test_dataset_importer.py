@@ -0,0 +1,48 @@
+from src.models.dataset_importer import DatasetImporter
+from src.models.dataset_manager import DatasetManager
+
+
+def record(file_path: str) -> dict:
+    return {
+        'file_path': file_path,
+        'instrument': 'Khaen',
+        'technique': 'Lai Yai',
+        'performer_name': 'Performer',
+        'consent_status': True,
+        'cultural_attribution': 'Isan'
+    }
+
+
+class RacingImporter(DatasetImporter):
+    """Another process adds recordings while this importer is probing"""
+
+    def __init__(self, dataset_manager, other_manager, checksums, concurrent_records):
+        super().__init__(dataset_manager, workers=1)
+        self.other_manager = other_manager
+        self.checksums = checksums
+        self.concurrent_records = concurrent_records
+
+    def _probe(self, file_path):
+        if self.concurrent_records:
+            self.other_manager.add_recordings(self.concurrent_records)
+            self.concurrent_records = []
+        return {'sha256': self.checksums[file_path]}
+
+
+def test_checks_are_repeated_under_the_dataset_lock(tmp_path):
+    path = str(tmp_path / "dataset.sqlite")
+    manager = DatasetManager(path, backend='sqlite')
+    other = DatasetManager(path, backend='sqlite')
+    checksums = {'a.wav': 'sha_a', 'b.wav': 'sha_b', 'c.wav': 'sha_b', 'd.wav': 'sha_d'}
+    concurrent = [dict(record('a.wav'), audio_info={'sha256': 'sha_a'}),
+                  dict(record('c.wav'), audio_info={'sha256': 'sha_b'})]
+    importer = RacingImporter(manager, other, checksums, concurrent)
+
+    summary = importer.import_records([record('a.wav'), record('b.wav'), record('d.wav')])
+
+    # a.wav and b.wav's bytes were added by the other manager after the first checks
+    assert summary['skipped'] == ['a.wav']
+    assert summary['duplicates'] == [{'file_path': 'b.wav', 'duplicate_of': 'rec_0002'}]
+    assert summary['recording_ids'] == ['rec_0003']
+    assert sorted(rec['file_path'] for rec in manager.metadata['recordings']) == \
+        ['a.wav', 'c.wav', 'd.wav']
@@ -0,0 +1,65 @@
+import pytest
+
+from src.models.dataset_manager import DatasetManager
+
+BACKENDS = {'json': 'dataset.json', 'jsonl': 'dataset.jsonl', 'sqlite': 'dataset.sqlite'}
+
+
+def make_recording(i: int) -> dict:
+    return {
+        'file_path': f"data/raw/clip_{i}.wav",
+        'instrument': 'Phin',
+        'technique': 'Lai',
+        'performer_name': 'Performer',
+        'consent_status': True,
+        'cultural_attribution': 'Isan'
+    }
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_ids_not_reused_after_delete_and_reload(tmp_path, backend):
+    path = str(tmp_path / BACKENDS[backend])
+    manager = DatasetManager(path, backend=backend)
+    ids = manager.add_recordings([make_recording(i) for i in range(3)])
+    assert ids == ['rec_0001', 'rec_0002', 'rec_0003']
+    assert manager.remove_recording('rec_0003')
+    manager.close()
+
+    reloaded = DatasetManager(path, backend=backend)
+    assert reloaded.get_recording('rec_0003') is None
+    assert reloaded.add_recording(**make_recording(3)) == 'rec_0004'
+    reloaded.close()
+
+    assert DatasetManager(path, backend=backend).metadata['dataset_info']['last_recording_number'] == 4
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_failed_import_leaves_no_partial_state(tmp_path, backend):
+    path = str(tmp_path / BACKENDS[backend])
+    manager = DatasetManager(path, backend=backend)
+    manager.add_recordings([make_recording(i) for i in range(2)])
+
+    malformed = tmp_path / "import.json"
+    malformed.write_text('{"recordings": [{"recording_id": "rec_0100", "file_path": "x.wav"}]}')
+    with pytest.raises(KeyError):
+        manager.import_json(str(malformed))
+
+    assert manager.get_recording('rec_0100') is None
+    assert len(manager.metadata['recordings']) == 2
+    assert manager.add_recording(**make_recording(2)) == 'rec_0003'
+    assert len(DatasetManager(path, backend=backend).metadata['recordings']) == 3
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_dataset_info_is_replaced_as_a_whole(tmp_path, backend):
+    path = str(tmp_path / BACKENDS[backend])
+    manager = DatasetManager(path, backend=backend)
+    manager.add_recording(**make_recording(0))
+
+    imported = tmp_path / "import.json"
+    imported.write_text('{"dataset_info": {"name": "Field trip 2024"}, "recordings": []}')
+    manager.import_json(str(imported))
+    manager.close()
+
+    info = DatasetManager(path, backend=backend).metadata['dataset_info']
+    assert info == {'name': 'Field trip 2024', 'last_recording_number': 1}
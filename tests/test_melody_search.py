@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from src.search.melody_search import MelodySimilarityIndex, pitch_contour
+
+
+def random_transcription(rng):
+    n_notes = rng.integers(4, 16)
+    durations = rng.uniform(0.1, 0.6, n_notes)
+    onsets = np.concatenate([[0.0], np.cumsum(durations)[:-1]])
+    return {'notes': [
+        {'onset_time': float(onset), 'duration': float(duration), 'midi_note': int(midi)}
+        for onset, duration, midi in zip(onsets, durations, rng.integers(55, 80, n_notes))
+    ]}
+
+
+def reference_dtw(a, b, radius):
+    """Plain O(n * radius) Sakoe-Chiba DTW, one cell at a time"""
+    n = len(a)
+    cost = np.full((n + 1, n + 1), np.inf)
+    cost[0, 0] = 0.0
+    for i in range(1, n + 1):
+        for j in range(max(1, i - radius), min(n, i + radius) + 1):
+            cost[i, j] = (a[i - 1] - b[j - 1]) ** 2 + min(
+                cost[i - 1, j - 1], cost[i - 1, j], cost[i, j - 1]
+            )
+    return np.sqrt(cost[n, n])
+
+
+@pytest.fixture(scope='module')
+def corpus():
+    rng = np.random.default_rng(7)
+    return [(f"rec_{i:03d}", random_transcription(rng)) for i in range(60)]
+
+
+def brute_force(index, corpus, query, k):
+    contour = pitch_contour(query, index.contour_length)
+    distances = sorted(
+        (reference_dtw(contour, pitch_contour(transcription, index.contour_length),
+                       index.radius), rec_id)
+        for rec_id, transcription in corpus
+    )
+    return distances[:k]
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_search_matches_brute_force_dtw(corpus, seed):
+    index = MelodySimilarityIndex(contour_length=32)
+    index.add_many(corpus)
+    query = random_transcription(np.random.default_rng(100 + seed))
+
+    # Small batches, so most candidates go through the pruned path
+    results = index.search(query, k=5, batch_size=4)
+
+    expected = brute_force(index, corpus, query, 5)
+    assert [r['recording_id'] for r in results] == [rec_id for _, rec_id in expected]
+    np.testing.assert_allclose([r['distance'] for r in results], [d for d, _ in expected])
+    stats = index.last_search_stats
+    assert stats['pruned'] > 0
+    assert stats['dtw_computed'] + stats['pruned'] == len(corpus)
+
+
+def test_process_pool_search_matches_in_process(corpus):
+    index = MelodySimilarityIndex(contour_length=32)
+    index.add_many(corpus)
+    query = random_transcription(np.random.default_rng(42))
+
+    assert index.search(query, k=3, batch_size=4, workers=2) == index.search(query, k=3, batch_size=4)
+
+
+def test_saved_index_gives_same_results(tmp_path, corpus):
+    index = MelodySimilarityIndex(contour_length=32)
+    index.add_many(corpus + [('empty', {'notes': []})])
+    path = str(tmp_path / "melodies.npz")
+    index.save(path)
+
+    loaded = MelodySimilarityIndex.load(path)
+    query = corpus[0][1]
+
+    assert len(loaded) == len(corpus)
+    assert loaded.search(query, k=4) == index.search(query, k=4)
+    assert loaded.search(query, k=1)[0] == {'recording_id': corpus[0][0], 'distance': 0.0}
@@ -0,0 +1,94 @@
+import numpy as np
+
+from src.models.classifier import InstrumentClassifier
+from src.models.model_registry import ModelRegistry, ModelWatcher
+
+
+def trained_classifier() -> InstrumentClassifier:
+    rng = np.random.default_rng(0)
+    X = np.vstack([rng.normal(0, 1, (10, 4)), rng.normal(3, 1, (10, 4))])
+    y = np.array(['Phin'] * 10 + ['Khaen'] * 10)
+    classifier = InstrumentClassifier(n_estimators=5)
+    classifier.train(X, y)
+    return classifier
+
+
+class RacingRegistry(ModelRegistry):
+    """Publishes a new version while the first load() is in progress"""
+
+    def __init__(self, root, classifier):
+        super().__init__(root)
+        self.classifier = classifier
+        self.raced = False
+
+    def load(self, version=None):
+        loaded = super().load(version)
+        if not self.raced:
+            self.raced = True
+            self.publish(self.classifier, {'sample_rate': 22050})
+        return loaded
+
+
+def test_watcher_pairs_model_with_its_own_version(tmp_path):
+    classifier = trained_classifier()
+    registry = RacingRegistry(str(tmp_path / "registry"), classifier)
+    first = registry.publish(classifier, {'sample_rate': 22050})
+
+    watcher = ModelWatcher(registry, poll_interval=0.0)
+    assert watcher.version == first
+
+    # The version published during startup is still picked up
+    assert watcher.check()
+    assert watcher.version == registry.current_version() != first
+
+
+def corrupt(registry, version):
+    """Truncate a published model.pkl, as an interrupted copy would"""
+    path = registry.versions_dir / version / "model.pkl"
+    path.write_bytes(path.read_bytes()[:64])
+
+
+def test_watcher_keeps_serving_when_new_model_is_corrupt(tmp_path):
+    classifier = trained_classifier()
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    first = registry.publish(classifier, {'sample_rate': 22050})
+    watcher = ModelWatcher(registry, poll_interval=0.0)
+
+    broken = registry.publish(classifier, {'sample_rate': 22050})
+    corrupt(registry, broken)
+
+    assert not watcher.check()
+    assert watcher.version == first
+    assert broken in watcher.last_error
+    assert watcher.get()[1]['version'] == first
+
+
+def test_watcher_validates_model_loaded_at_startup(tmp_path):
+    def require_44k(metadata):
+        if metadata.get('sample_rate') != 44100:
+            raise ValueError("sample rate mismatch")
+
+    classifier = trained_classifier()
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    registry.publish(classifier, {'sample_rate': 22050})
+
+    watcher = ModelWatcher(registry, poll_interval=0.0, validate=require_44k)
+
+    assert watcher.get() is None
+    assert "sample rate mismatch" in watcher.last_error
+
+    # A compatible version published later is picked up
+    good = registry.publish(classifier, {'sample_rate': 44100})
+    assert watcher.check()
+    assert watcher.version == good
+    assert watcher.last_error is None
+
+
+def test_watcher_starts_without_model_when_current_is_corrupt(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    corrupt(registry, registry.publish(trained_classifier(), {'sample_rate': 22050}))
+
+    watcher = ModelWatcher(registry, poll_interval=0.0)
+
+    assert watcher.get() is None
+    assert watcher.last_error is not None
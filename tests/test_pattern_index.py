@@ -0,0 +1,96 @@
+import pytest
+
+from src.search.pattern_index import PatternIndex
+
+THAI = ['ด', 'ร', 'ม', 'ฟ', 'ซ', 'ล', 'ท']
+
+
+def transcription(midi_notes, note_seconds=0.25):
+    return {'notes': [
+        {'onset_time': i * note_seconds, 'duration': note_seconds, 'midi_note': midi,
+         'thai_notation': THAI[midi % 7]}
+        for i, midi in enumerate(midi_notes)
+    ]}
+
+
+CORPUS = {
+    'rec_a': [60, 62, 64, 65, 67, 65, 64, 62, 60],
+    'rec_b': [55, 67, 69, 70, 72, 70, 69],           # rec_a's phrase a fourth up
+    'rec_c': [60, 60, 62, 64, 65, 67, 60, 62, 64, 65, 67],
+    'rec_d': [72, 71, 69, 67, 65, 64, 62, 60],
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = PatternIndex(str(tmp_path / "patterns.db"), n=3)
+    index.add_transcriptions((rec_id, transcription(notes)) for rec_id, notes in CORPUS.items())
+    yield index
+    index.close()
+
+
+def brute_force(phrase, transpose=False, to_token=lambda midi: midi):
+    """Every (recording_id, position) where the phrase occurs, scanning all notes"""
+    found = []
+    for rec_id, notes in sorted(CORPUS.items()):
+        for start in range(len(notes) - len(phrase) + 1):
+            window = notes[start:start + len(phrase)]
+            shift = window[0] - phrase[0] if transpose else 0
+            if [to_token(note - shift) for note in window] == [to_token(p) for p in phrase]:
+                found.append((rec_id, start))
+    return found
+
+
+@pytest.mark.parametrize('phrase', [[62, 64, 65, 67], [65, 64, 62, 60], [67, 65, 64, 62, 60]])
+@pytest.mark.parametrize('mode', ['pitch', 'interval'])
+def test_search_matches_brute_force(index, phrase, mode):
+    matches = index.search(phrase, mode=mode)
+
+    assert matches
+    assert [(m['recording_id'], m['position']) for m in matches] == \
+        brute_force(phrase, transpose=mode == 'interval')
+
+
+def test_interval_matches_report_transposition_and_times(index):
+    matches = {m['recording_id']: m for m in index.search([62, 64, 65, 67], mode='interval')}
+
+    assert matches['rec_a']['transposition'] == 0
+    assert matches['rec_b']['transposition'] == 5
+    assert matches['rec_b']['start_ms'] == 250
+    assert matches['rec_b']['end_ms'] == 1250
+
+
+def test_notation_search(index):
+    def to_token(midi):
+        return THAI[midi % 7]
+
+    phrase = ' '.join(to_token(midi) for midi in [62, 64, 65])
+    matches = index.search(phrase, mode='notation')
+
+    assert [(m['recording_id'], m['position']) for m in matches] == \
+        brute_force([62, 64, 65], to_token=to_token)
+
+
+def test_reindex_and_remove(index):
+    index.add_transcription('rec_a', transcription([50, 51, 52, 53]))
+    assert 'rec_a' not in {m['recording_id'] for m in index.search([62, 64, 65], mode='pitch')}
+
+    index.remove('rec_c')
+    assert index.recording_ids() == ['rec_a', 'rec_b', 'rec_d']
+    assert index.search([62, 64, 65], mode='pitch') == []
+
+
+def test_index_persists_and_checks_gram_size(tmp_path, index):
+    index.close()
+    reopened = PatternIndex(str(tmp_path / "patterns.db"), n=3)
+    assert len(reopened) == len(CORPUS)
+    assert reopened.search([62, 64, 65], mode='pitch', limit=1)[0]['recording_id'] == 'rec_a'
+    reopened.close()
+
+    with pytest.raises(ValueError):
+        PatternIndex(str(tmp_path / "patterns.db"), n=4)
+
+
+def test_short_phrase_is_rejected(index):
+    with pytest.raises(ValueError):
+        index.search([60, 62, 64], mode='interval')
@@ -0,0 +1,39 @@
+from src.inference.cache import PredictionCache
+
+RESULT = {'predicted_instrument': 'Phin', 'confidence': 0.9,
+          'all_probabilities': {'Phin': 0.9, 'Khaen': 0.1}}
+
+
+def test_alternating_versions_during_swap_keep_new_entries():
+    cache = PredictionCache()
+    cache.put('old_clip', 'v1', RESULT)
+    cache.put('new_clip', 'v2', RESULT)
+    # An in-flight request finishing on the old model
+    cache.put('late_clip', 'v1', RESULT)
+
+    assert cache.get('new_clip', 'v2') is not None
+    assert cache.get('late_clip', 'v1') is not None
+    assert cache.get('old_clip', 'v1') is None
+    assert cache.get('late_clip', 'v2') is None
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_memory_is_lru_bounded():
+    cache = PredictionCache(max_entries=2)
+    for clip in ('a', 'b'):
+        cache.put(clip, 'v1', RESULT)
+    cache.get('a', 'v1')
+    cache.put('c', 'v1', RESULT)
+
+    assert cache.get('b', 'v1') is None
+    assert cache.get('a', 'v1') is not None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_disk_layer_survives_restart(tmp_path):
+    PredictionCache(cache_dir=str(tmp_path)).put('clip', 'v1', RESULT)
+
+    cache = PredictionCache(cache_dir=str(tmp_path))
+    assert cache.get('clip', 'v1') == RESULT
+    assert cache.get('clip', 'v2') is None
+    assert cache.stats()['disk_hits'] == 1
@@ -0,0 +1,145 @@
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+from src.data_collection.download_index import DownloadIndex
+from src.data_collection.youtube_downloader import YouTubeAudioDownloader
+
+
+class FakeYoutubeDL:
+    """
+    Stand-in for yt_dlp.YoutubeDL: "downloads" a short FLAC per URL
+
+    outcomes maps a video ID to the exceptions to raise on its first calls;
+    later calls succeed. delays maps a video ID to seconds to wait first.
+    """
+
+    def __init__(self, outcomes=None, delays=None):
+        self.outcomes = {key: list(value) for key, value in (outcomes or {}).items()}
+        self.delays = delays or {}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, ydl_opts):
+        self.ydl_opts = ydl_opts
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=True):
+        video_id = url.rsplit('=', 1)[-1]
+        with self._lock:
+            self.calls.append((video_id, time.monotonic()))
+            pending = self.outcomes.get(video_id)
+            error = pending.pop(0) if pending else None
+        time.sleep(self.delays.get(video_id, 0.0))
+        if error is not None:
+            raise error
+
+        title = f"Title {video_id}"
+        path = Path(self.ydl_opts['outtmpl'].replace('%(title)s', title)
+                    .replace('%(id)s', video_id).replace('%(ext)s', 'flac'))
+        sf.write(path, np.zeros(2205, dtype=np.float32), 22050, format='FLAC')
+        return {'id': video_id, 'title': title, 'uploader': 'Uploader',
+                'requested_downloads': [{'filepath': str(path)}]}
+
+
+def make_downloader(tmp_path, fake):
+    return YouTubeAudioDownloader(
+        output_dir=str(tmp_path / "raw"), ydl_factory=fake,
+        index=DownloadIndex(str(tmp_path / "raw" / "download_index.db"))
+    )
+
+
+def video(video_id, host="https://www.youtube.com"):
+    return {'url': f"{host}/watch?v={video_id}", 'instrument': 'Phin'}
+
+
+def calls_for(fake, video_id):
+    return sum(1 for called, _ in fake.calls if called == video_id)
+
+
+def test_results_keep_input_order(tmp_path):
+    fake = FakeYoutubeDL(delays={'vid_a': 0.2})
+    downloader = make_downloader(tmp_path, fake)
+    videos = [video('vid_a'), video('vid_b'), video('vid_c')]
+
+    results = downloader.download_batch(videos, max_workers=3, requests_per_second=0,
+                                        verbose=False)
+
+    assert [r['metadata']['video_id'] for r in results] == ['vid_a', 'vid_b', 'vid_c']
+    assert all(r['success'] and not r['skipped'] for r in results)
+
+
+def test_transient_errors_are_retried(tmp_path):
+    fake = FakeYoutubeDL(outcomes={'vid_a': [Exception('HTTP Error 503'),
+                                             Exception('Connection reset')]})
+    downloader = make_downloader(tmp_path, fake)
+
+    result = downloader.download_video(video('vid_a'), max_retries=3, backoff=0.0)
+
+    assert result['success']
+    assert result['attempts'] == 3
+    assert calls_for(fake, 'vid_a') == 3
+
+
+def test_gives_up_after_max_retries(tmp_path):
+    fake = FakeYoutubeDL(outcomes={'vid_a': [Exception('HTTP Error 503')] * 5})
+    downloader = make_downloader(tmp_path, fake)
+
+    result = downloader.download_video(video('vid_a'), max_retries=2, backoff=0.0)
+
+    assert not result['success']
+    assert result['attempts'] == 3
+
+
+def test_permanent_errors_are_not_retried(tmp_path):
+    fake = FakeYoutubeDL(outcomes={'vid_a': [Exception('ERROR: Private video. Sign in')]})
+    downloader = make_downloader(tmp_path, fake)
+
+    result = downloader.download_video(video('vid_a'), max_retries=3, backoff=0.0)
+
+    assert not result['success']
+    assert result['attempts'] == 1
+    assert calls_for(fake, 'vid_a') == 1
+
+
+def test_batch_skips_downloaded_videos_and_resumes(tmp_path):
+    fake = FakeYoutubeDL()
+    downloader = make_downloader(tmp_path, fake)
+    videos = [video('vid_a'), video('vid_b'), video('vid_c')]
+    first = downloader.download_batch(videos, requests_per_second=0, verbose=False)
+
+    # Lost audio is downloaded again; everything else is taken from the index
+    Path(first[1]['file_path']).unlink()
+    second = downloader.download_batch(videos, requests_per_second=0, verbose=False)
+
+    assert [r['skipped'] for r in second] == [True, False, True]
+    assert all(r['success'] for r in second)
+    assert second[0]['attempts'] == 0
+    assert [calls_for(fake, v) for v in ('vid_a', 'vid_b', 'vid_c')] == [1, 2, 1]
+
+
+def test_requests_are_rate_limited_per_host(tmp_path):
+    fake = FakeYoutubeDL()
+    downloader = make_downloader(tmp_path, fake)
+    videos = [video(f'yt_{i}') for i in range(4)] + \
+        [video(f'other_{i}', host="https://example.org") for i in range(2)]
+
+    downloader.download_batch(videos, max_workers=6, requests_per_second=10, verbose=False)
+
+    def call_times(prefix):
+        return sorted(t for video_id, t in fake.calls if video_id.startswith(prefix))
+
+    # 10 requests/s per host: consecutive calls to one host are >= 0.1 s apart
+    assert min(np.diff(call_times('yt_'))) >= 0.09
+    assert call_times('yt_')[-1] - call_times('yt_')[0] >= 0.27
+    # ...but another host is not held up behind them
+    assert call_times('other_')[0] - call_times('yt_')[0] < 0.09
@@ -6,11 +6,17 @@ import json
 sys.path.append(str(Path(__file__).parent))
 
 from src.preprocessing.audio_processor import AudioProcessor
+from src.preprocessing.audio_manifest import AudioManifest
 from src.features.feature_extractor import FeatureExtractor
+from src.features.feature_cache import (FEATURE_CACHE_VERSION, feature_cache_path,
+                                       load_cached_features, save_cached_features)
 from src.models.classifier import InstrumentClassifier
 from src.models.dataset_manager import DatasetManager
+from src.models.model_registry import ModelRegistry, training_data_hash
 from src.evaluation.model_evaluator import ModelEvaluator
 
+SEGMENT_DURATION = 3.0
+
 
 def train_model_pipeline():
     print("=" * 60)
@@ -47,8 +53,37 @@ def train_model_pipeline():
     processor = AudioProcessor(target_sr=22050)
     extractor = FeatureExtractor(sr=22050)
     
+    manifest = AudioManifest()
+    manifest_summary = manifest.build(df['file_path'].tolist())
+    print(f"\n📋 Audio manifest: {manifest_summary['probed']} probed, "
+          f"{manifest_summary['unchanged']} unchanged, "
+          f"{manifest_summary['missing']} missing, "
+          f"{manifest_summary['unreadable']} unreadable")
+    
+    for moved in manifest.find_moved():
+        print(f"  ⚠️  Moved: {moved['old_path']} -> {moved['new_path']}")
+    # Train on one copy of duplicated audio, so copies cannot land on
+    # both sides of the train/validation split. The kept copy is the
+    # first one that passes preflight, so one bad copy does not drop all
+    dataset_paths = set(df['file_path'])
+    duplicate_paths = set()
+    for digest, paths in manifest.find_duplicates().items():
+        paths = [path for path in paths if path in dataset_paths]
+        if len(paths) > 1:
+            print(f"  ⚠️  Duplicate content ({digest[:12]}): {', '.join(paths)}")
+            kept = next((path for path in paths if manifest.preflight(path)['is_valid']), paths[0])
+            duplicate_paths.update(path for path in paths if path != kept)
+    
+    planned = sum(
+        manifest.planned_segments(path, segment_duration=SEGMENT_DURATION)
+        for path in df['file_path']
+        if manifest.preflight(path)['is_valid'] and path not in duplicate_paths
+    )
+    print(f"  Planned segments: {planned}")
+    
     features_list = []
     labels_list = []
+    training_files = []
     
     for idx, row in df.iterrows():
         file_path = row['file_path']
@@ -58,25 +93,40 @@ def train_model_pipeline():
         print(f"  Instrument: {instrument}")
         
         try:
-            if not Path(file_path).exists():
-                print(f"  ⚠️  File not found, skipping...")
+            if file_path in duplicate_paths:
+                print(f"  ⚠️  Duplicate of another recording, skipping...")
                 continue
             
-            audio, sr, quality = processor.preprocess_audio(file_path)
-            
-            if not quality['is_valid']:
-                print(f"  ⚠️  Quality check failed: {quality.get('reason', 'Unknown')}")
+            preflight = manifest.preflight(file_path)
+            if not preflight['is_valid']:
+                print(f"  ⚠️  {preflight['reason']}, skipping...")
                 continue
             
-            segments = processor.extract_segments(audio, sr, segment_duration=3.0)
-            print(f"  ✓ Extracted {len(segments)} segments")
-            
-            for seg_idx, segment in enumerate(segments):
-                features = extractor.extract_all_features(segment)
-                features_list.append(features)
-                labels_list.append(instrument)
+            cache_path = feature_cache_path(manifest.get(file_path)['sha256'], processor.target_sr,
+                                            SEGMENT_DURATION)
+            file_features = load_cached_features(cache_path)
+            if file_features is not None:
+                print(f"  ✓ Unchanged, reused {len(file_features)} cached feature vectors")
+            else:
+                audio, sr, quality = processor.preprocess_audio(file_path)
+                
+                if not quality['is_valid']:
+                    print(f"  ⚠️  Quality check failed: {quality.get('reason', 'Unknown')}")
+                    continue
+                
+                segments = processor.extract_segments(audio, sr, segment_duration=SEGMENT_DURATION)
+                print(f"  ✓ Extracted {len(segments)} segments")
+                
+                file_features = np.array([
+                    extractor.extract_all_features(segment) for segment in segments
+                ])
+                
+                save_cached_features(cache_path, file_features)
+                print(f"  ✓ Features extracted successfully")
             
-            print(f"  ✓ Features extracted successfully")
+            features_list.extend(file_features)
+            labels_list.extend([instrument] * len(file_features))
+            training_files.append((manifest.get(file_path)['sha256'], instrument))
             
         except Exception as e:
             print(f"  ❌ Error: {str(e)}")
@@ -136,9 +186,21 @@ def train_model_pipeline():
     models_dir = Path("models")
     models_dir.mkdir(exist_ok=True)
     
-    model_path = models_dir / "instrument_classifier.pkl"
-    classifier.save_model(str(model_path))
-    print(f"\n✓ Model saved to: {model_path}")
+    # Publish as a new version; running apps and servers pick it up without a restart
+    registry = ModelRegistry()
+    version = registry.publish(classifier, {
+        'feature_names': feature_names,
+        'n_features': int(X.shape[1]),
+        'sample_rate': processor.target_sr,
+        'segment_duration': SEGMENT_DURATION,
+        'feature_cache_version': FEATURE_CACHE_VERSION,
+        'metrics': {key: results[key] for key in
+                    ('train_accuracy', 'validation_accuracy', 'cv_mean', 'cv_std')},
+        'training_data_hash': training_data_hash(training_files),
+        'n_recordings': len(training_files),
+        'n_segments': int(len(X))
+    })
+    print(f"\n✓ Model published as version {version} (now current) in: {registry.root}")
     
     results_path = models_dir / "training_results.json"
     with open(results_path, 'w') as f: